@@ -8,21 +8,73 @@ Este archivo:
 - Crea la aplicación Flask.
 - Registra el Blueprint de tareas.
 - (Opcional) expone una ruta raíz "/" para verificación rápida.
+- Configura el proveedor JSON de la aplicación (orjson si está instalado; si
+  no, `json` estándar).
 """
 
-from flask import Flask, jsonify
+from typing import Any
+
+import click
+from flask import Flask, Response, jsonify
+from flask.json.provider import DefaultJSONProvider
 
 from rutas.rutas_ai import plano_rutas_ai
 from rutas.rutas_tareas import plano_rutas_tareas
+from servicios.codificador_json import CodificadorJson, crear_codificador_json
+from servicios.servicio_ia import reentrenar_clasificador_categorias
+
+
+class ProveedorJsonAplicacion(DefaultJSONProvider):
+	"""Proveedor JSON de Flask sobre el `CodificadorJson` de la aplicación.
+
+	Lo usan `request.get_json()` y `jsonify()` en todos los Blueprints. Se
+	comporta como `DefaultJSONProvider` (`default` para fechas, Decimal, UUID y
+	dataclasses; `sort_keys`), salvo que no escapa caracteres no ASCII. Las
+	respuestas se arman directamente con los bytes del codificador.
+
+	Los argumentos extra de `dumps()`/`loads()` (p. ej. `indent`) y las salidas
+	no compactas o con `ensure_ascii` se delegan en `DefaultJSONProvider`.
+	"""
+
+	ensure_ascii = False
 
+	def __init__(self, aplicacion: Flask, codificador: CodificadorJson) -> None:
+		super().__init__(aplicacion)
+		self.codificador = codificador
 
-def crear_aplicacion() -> Flask:
+	def _codificar(self, obj: Any) -> bytes:
+		return self.codificador.codificar(obj, ordenar_claves=self.sort_keys, por_defecto=self.default)
+
+	def dumps(self, obj: Any, **kwargs: Any) -> str:
+		if kwargs or self.ensure_ascii:
+			return super().dumps(obj, **kwargs)
+		return self._codificar(obj).decode("utf-8")
+
+	def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+		if kwargs:
+			return super().loads(s, **kwargs)
+		return self.codificador.decodificar(s)
+
+	def response(self, *args: Any, **kwargs: Any) -> Response:
+		if self.ensure_ascii or self.compact is False or (self.compact is None and self._app.debug):
+			return super().response(*args, **kwargs)
+		obj = self._prepare_response_obj(args, kwargs)
+		return self._app.response_class(self._codificar(obj) + b"\n", mimetype=self.mimetype)
+
+
+def crear_aplicacion(proveedor_json: str | None = None) -> Flask:
 	"""Crea y configura la aplicación Flask.
 
 	Se expone como factory para permitir tests con `pytest` sin necesidad de
 	levantar un servidor real.
+
+	- `proveedor_json`: "auto" (por defecto), "orjson" o "estandar" (ver
+	  servicios/codificador_json.py). Sin valor se usa TAREAS_PROVEEDOR_JSON.
+	  El codificador es propio de la aplicación (`aplicacion.json.codificador`):
+	  no cambia el de otras aplicaciones del proceso ni el del almacenamiento.
 	"""
 	aplicacion = Flask(__name__)
+	aplicacion.json = ProveedorJsonAplicacion(aplicacion, crear_codificador_json(proveedor_json))
 
 	# Registro del Blueprint que contiene endpoints CRUD.
 	aplicacion.register_blueprint(plano_rutas_tareas)
@@ -35,6 +87,16 @@ def crear_aplicacion() -> Flask:
 		"""Ruta raíz opcional para verificar que la app está levantada."""
 		return jsonify({"estado": "aplicacion_en_ejecucion"}), 200
 
+	@aplicacion.cli.command("reentrenar-clasificador")
+	def reentrenar_clasificador():
+		"""Reentrena el clasificador local de categorías con las tareas guardadas."""
+		resumen = reentrenar_clasificador_categorias()
+		if resumen["ejemplos"] == 0:
+			click.echo("No hay tareas categorizadas suficientes: solo se usarán las reglas.")
+		else:
+			click.echo(f"Modelo entrenado con {resumen['ejemplos']} tareas: {resumen['por_categoria']}")
+		click.echo(f"Guardado en {resumen['ruta']}")
+
 	return aplicacion
 
 
@@ -3,18 +3,27 @@
 Este módulo define el Blueprint para endpoints de IA del Entregable 2.
 
 Restricciones:
-- Implementar únicamente endpoints /ai/tareas/* del Entregable 2.
+- Implementar únicamente endpoints /ai/tareas/* del Entregable 2 (más GET /ai/cache,
+  métricas de la caché de respuestas). Cada operación tiene también su variante por
+  lote, /ai/tareas/<operacion>/batch.
 - No persistir tareas.
 - No modificar el CRUD existente.
 
 Nota:
 - La integración con el proveedor de IA está encapsulada en `servicios/servicio_ia.py`.
+- Las respuestas del proveedor se cachean (servicios/cache_ia.py). Una solicitud con
+  `Cache-Control: no-cache` consulta al proveedor aunque haya respuesta guardada.
 """
 
 from __future__ import annotations
 
-from flask import Blueprint, jsonify, request
+from typing import Any, Callable
 
+from flask import Blueprint, g, jsonify, request
+
+from servicios.cache_ia import obtener_cache_ia, omitir_cache_ia, restaurar_cache_ia
+from servicios.clasificador_categorias import ORIGEN_OPENAI
+from servicios.estimador_horas import ORIGEN_HISTORICO
 from servicios.servicio_ia import (
 	generar_respuesta_prueba,
 	obtener_categoria_simulada,
@@ -22,12 +31,49 @@ from servicios.servicio_ia import (
 	extraer_primer_numero_como_float,
 	generar_analisis_riesgo,
 	generar_mitigacion_riesgo,
+	obtener_metricas_agrupacion,
+	clasificar_categoria_local,
+	estimar_horas_local,
+	procesar_en_paralelo,
+	generar_campos_tarea,
+	CAMPOS_ENRIQUECIMIENTO,
 )
 
 
 plano_rutas_ai = Blueprint("rutas_ai", __name__, url_prefix="/ai")
 
 
+@plano_rutas_ai.before_request
+def _configurar_cache_ia():
+	"""Con `Cache-Control: no-cache`, las consultas de esta solicitud omiten la caché."""
+	directivas = {
+		directiva.strip().lower() for directiva in request.headers.get("Cache-Control", "").split(",")
+	}
+	g.token_cache_ia = omitir_cache_ia("no-cache" in directivas)
+
+
+@plano_rutas_ai.teardown_request
+def _restaurar_cache_ia(_excepcion):
+	token = g.pop("token_cache_ia", None)
+	if token is not None:
+		restaurar_cache_ia(token)
+
+
+@plano_rutas_ai.get("/cache")
+def obtener_metricas_cache_ia():
+	"""Métricas de la caché de respuestas de IA.
+
+	Respuestas:
+	- 200: {"aciertos_memoria", "aciertos_sqlite", "fallos", "omisiones", "guardadas",
+	  "errores_sqlite", "tasa_aciertos", "entradas_memoria", "capacidad", "ttl_segundos", "sqlite", "activa",
+	  "agrupacion": {"ejecutadas", "agrupadas", "en_curso"}}. `agrupacion` cuenta las
+	  consultas que no llegaron al proveedor por haber otra igual en curso.
+	"""
+	metricas = obtener_cache_ia().obtener_metricas()
+	metricas["agrupacion"] = obtener_metricas_agrupacion()
+	return jsonify(metricas), 200
+
+
 @plano_rutas_ai.post("/tareas/describe")
 def describir_tarea():
 	"""Completa el campo "descripcion" de una tarea usando IA (simulada).
@@ -42,18 +88,21 @@ def describir_tarea():
 	if not isinstance(datos_tarea, dict):
 		return jsonify({"mensaje": "El cuerpo de la solicitud debe ser un JSON"}), 400
 
+	cuerpo, estado = _describir(datos_tarea)
+	return jsonify(cuerpo), estado
+
+
+def _describir(datos_tarea: dict[str, Any]) -> tuple[dict[str, Any], int]:
+	"""Lógica de describir_tarea() para una tarea: (cuerpo de la respuesta, código HTTP)."""
 	descripcion = datos_tarea.get("descripcion")	
 	descripcion_vacia = descripcion is None or str(descripcion).strip() == ""
 
 	if not descripcion_vacia:
-		return jsonify(datos_tarea), 200
+		return datos_tarea, 200
 
 	titulo = datos_tarea.get("titulo")
 	if titulo is None or str(titulo).strip() == "":
-		return (
-			jsonify({"mensaje": "Falta el campo requerido: titulo"}),
-			400,
-		)
+		return {"mensaje": "Falta el campo requerido: titulo"}, 400
 
 	prioridad = datos_tarea.get("prioridad")
 	estado = datos_tarea.get("estado")
@@ -77,7 +126,7 @@ def describir_tarea():
 	descripcion_generada = generar_respuesta_prueba(prompt)
 	datos_tarea["descripcion"] = descripcion_generada
 
-	return jsonify(datos_tarea), 200
+	return datos_tarea, 200
 
 
 @plano_rutas_ai.post("/tareas/categorize")
@@ -86,7 +135,11 @@ def categorizar_tarea():
 
 	Reglas:
 	- Recibe una tarea en formato JSON.
-	- Si "categoria" está vacía, en blanco o es None: clasifica usando IA simulada.
+	- Si "categoria" está vacía, en blanco o es None: clasifica con el clasificador
+	  local (reglas o modelo entrenado con las tareas guardadas) y, si no alcanza la
+	  confianza mínima, usando IA.
+	- Informa el camino usado en "origen_categoria" ("reglas", "modelo_local" u
+	  "openai") y su "confianza_categoria" (null si respondió el proveedor).
 	- Si "categoria" ya tiene contenido: devuelve la tarea sin modificar.
 	- La categoría devuelta debe ser una de la lista controlada.
 	- No persiste la tarea.
@@ -95,26 +148,35 @@ def categorizar_tarea():
 	if not isinstance(datos_tarea, dict):
 		return jsonify({"mensaje": "El cuerpo de la solicitud debe ser un JSON"}), 400
 
+	cuerpo, estado = _categorizar(datos_tarea)
+	return jsonify(cuerpo), estado
+
+
+def _categorizar(datos_tarea: dict[str, Any]) -> tuple[dict[str, Any], int]:
+	"""Lógica de categorizar_tarea() para una tarea: (cuerpo de la respuesta, código HTTP)."""
 	categoria = datos_tarea.get("categoria")
 	categoria_vacia = categoria is None or str(categoria).strip() == ""
 	if not categoria_vacia:
-		return jsonify(datos_tarea), 200
+		return datos_tarea, 200
 
 	titulo = datos_tarea.get("titulo")
 	if titulo is None or str(titulo).strip() == "":
-		return (
-			jsonify({"mensaje": "Falta el campo requerido: titulo"}),
-			400,
-		)
+		return {"mensaje": "Falta el campo requerido: titulo"}, 400
 
 	descripcion = datos_tarea.get("descripcion")
-	categoria_generada = obtener_categoria_simulada(
-		titulo=str(titulo),
-		descripcion=str(descripcion) if descripcion is not None else None,
-	)
+	descripcion = str(descripcion) if descripcion is not None else None
+	# Primero el clasificador local; el proveedor solo si no está seguro.
+	resultado_local = clasificar_categoria_local(str(titulo), descripcion)
+	if resultado_local is not None:
+		categoria_generada, confianza, origen = resultado_local
+	else:
+		categoria_generada = obtener_categoria_simulada(titulo=str(titulo), descripcion=descripcion)
+		confianza, origen = None, ORIGEN_OPENAI
 
 	datos_tarea["categoria"] = categoria_generada
-	return jsonify(datos_tarea), 200
+	datos_tarea["origen_categoria"] = origen
+	datos_tarea["confianza_categoria"] = round(confianza, 4) if confianza is not None else None
+	return datos_tarea, 200
 
 
 @plano_rutas_ai.post("/tareas/estimate")
@@ -123,7 +185,11 @@ def estimar_horas_tarea():
 
 	Reglas:
 	- Recibe una tarea en formato JSON.
-	- Si "horas_estimadas" está ausente, es null o es "": estima usando IA simulada.
+	- Si "horas_estimadas" está ausente, es null o es "": estima con el histórico de
+	  tareas guardadas parecidas (misma prioridad y categoría primero) y, si la
+	  confianza no alcanza el umbral, usando IA.
+	- Informa el camino usado en "origen_horas" ("historico" u "openai") y su
+	  "confianza_horas" (null si respondió el modelo).
 	- Si "horas_estimadas" ya tiene valor: devuelve la tarea sin modificar.
 	- La respuesta final debe contener "horas_estimadas" como número (float).
 	- No persiste la tarea.
@@ -132,9 +198,15 @@ def estimar_horas_tarea():
 	if not isinstance(datos_tarea, dict):
 		return jsonify({"mensaje": "El cuerpo de la solicitud debe ser JSON"}), 400
 
+	cuerpo, estado = _estimar_horas(datos_tarea)
+	return jsonify(cuerpo), estado
+
+
+def _estimar_horas(datos_tarea: dict[str, Any]) -> tuple[dict[str, Any], int]:
+	"""Lógica de estimar_horas_tarea() para una tarea: (cuerpo de la respuesta, código HTTP)."""
 	titulo = datos_tarea.get("titulo")
 	if titulo is None or str(titulo).strip() == "":
-		return jsonify({"mensaje": "Falta el campo requerido: titulo"}), 400
+		return {"mensaje": "Falta el campo requerido: titulo"}, 400
 
 	horas_estimadas = datos_tarea.get("horas_estimadas")
 	horas_estimadas_vacias = (
@@ -143,28 +215,39 @@ def estimar_horas_tarea():
 		or str(horas_estimadas).strip() == ""
 	)
 	if not horas_estimadas_vacias:
-		return jsonify(datos_tarea), 200
+		return datos_tarea, 200
 
 	descripcion = datos_tarea.get("descripcion")
-	respuesta_ia = obtener_estimacion_simulada(
-		titulo=str(titulo),
-		descripcion=str(descripcion) if descripcion is not None else None,
+	descripcion = str(descripcion) if descripcion is not None else None
+	# Primero el histórico de tareas parecidas; el modelo solo si no hay confianza.
+	estimacion_local = estimar_horas_local(
+		str(titulo),
+		descripcion,
+		prioridad=datos_tarea.get("prioridad"),
+		categoria=datos_tarea.get("categoria"),
 	)
+	if estimacion_local is not None:
+		datos_tarea["horas_estimadas"] = estimacion_local["horas"]
+		datos_tarea["origen_horas"] = ORIGEN_HISTORICO
+		datos_tarea["confianza_horas"] = estimacion_local["confianza"]
+		return datos_tarea, 200
+
+	respuesta_ia = obtener_estimacion_simulada(titulo=str(titulo), descripcion=descripcion)
 
 	horas_estimadas_float = extraer_primer_numero_como_float(respuesta_ia)
 	if horas_estimadas_float is None:
 		return (
-			jsonify(
-				{
-					"mensaje": "No se pudo interpretar horas_estimadas como número",
-					"respuesta_ia": respuesta_ia,
-				}
-			),
+			{
+				"mensaje": "No se pudo interpretar horas_estimadas como número",
+				"respuesta_ia": respuesta_ia,
+			},
 			400,
 		)
 
 	datos_tarea["horas_estimadas"] = float(horas_estimadas_float)
-	return jsonify(datos_tarea), 200
+	datos_tarea["origen_horas"] = ORIGEN_OPENAI
+	datos_tarea["confianza_horas"] = None
+	return datos_tarea, 200
 
 
 @plano_rutas_ai.post("/tareas/audit")
@@ -180,9 +263,15 @@ def auditar_riesgos_tarea():
 	if not isinstance(datos_tarea, dict):
 		return jsonify({"mensaje": "El cuerpo de la solicitud debe ser JSON"}), 400
 
+	cuerpo, estado = _auditar_riesgos(datos_tarea)
+	return jsonify(cuerpo), estado
+
+
+def _auditar_riesgos(datos_tarea: dict[str, Any]) -> tuple[dict[str, Any], int]:
+	"""Lógica de auditar_riesgos_tarea() para una tarea: (cuerpo de la respuesta, código HTTP)."""
 	titulo = datos_tarea.get("titulo")
 	if titulo is None or str(titulo).strip() == "":
-		return jsonify({"mensaje": "Falta el campo requerido: titulo"}), 400
+		return {"mensaje": "Falta el campo requerido: titulo"}, 400
 
 	analisis_riesgo = datos_tarea.get("analisis_riesgo")
 	mitigacion_riesgo = datos_tarea.get("mitigacion_riesgo")
@@ -204,4 +293,176 @@ def auditar_riesgos_tarea():
 		)
 		datos_tarea["mitigacion_riesgo"] = mitigacion_riesgo_generada
 
-	return jsonify(datos_tarea), 200
+	return datos_tarea, 200
+
+
+@plano_rutas_ai.post("/tareas/enrich")
+def enriquecer_tarea():
+	"""Completa todos los campos faltantes de una tarea con una sola consulta a IA.
+
+	Intención:
+	- Evitar las hasta cinco consultas sucesivas de describe, categorize, estimate
+	  y audit al dar de alta una tarea.
+
+	Reglas:
+	- Recibe una tarea en formato JSON; completa los campos vacíos (ausentes, null o
+	  en blanco) entre descripcion, categoria, horas_estimadas, analisis_riesgo y
+	  mitigacion_riesgo. Los que ya tienen contenido se mantienen.
+	- categoria y horas_estimadas se resuelven primero en local (clasificador e
+	  histórico), como en categorize y estimate, con su origen y confianza.
+	- Lo que falte se pide al modelo en una sola respuesta JSON, validada campo a
+	  campo; solo los campos inválidos se piden una vez más (una reparación).
+	- No persiste la tarea.
+
+	Respuestas:
+	- 200: la tarea completada.
+	- 400: JSON inválido, falta `titulo`, o tras la reparación algún campo sigue sin
+	  ser válido ({"mensaje", "campos_invalidos": {campo: motivo}}).
+	"""
+	datos_tarea = request.get_json(silent=True)
+	if not isinstance(datos_tarea, dict):
+		return jsonify({"mensaje": "El cuerpo de la solicitud debe ser JSON"}), 400
+
+	cuerpo, estado = _enriquecer(datos_tarea)
+	return jsonify(cuerpo), estado
+
+
+def _enriquecer(datos_tarea: dict[str, Any]) -> tuple[dict[str, Any], int]:
+	"""Lógica de enriquecer_tarea() para una tarea: (cuerpo de la respuesta, código HTTP)."""
+	titulo = datos_tarea.get("titulo")
+	if titulo is None or str(titulo).strip() == "":
+		return {"mensaje": "Falta el campo requerido: titulo"}, 400
+
+	campos_faltantes = [
+		campo
+		for campo in CAMPOS_ENRIQUECIMIENTO
+		if datos_tarea.get(campo) is None or str(datos_tarea.get(campo)).strip() == ""
+	]
+	descripcion = datos_tarea.get("descripcion")
+	descripcion = str(descripcion) if descripcion is not None else None
+
+	# Primero los caminos locales; el modelo solo recibe lo que quede.
+	if "categoria" in campos_faltantes:
+		resultado_local = clasificar_categoria_local(str(titulo), descripcion)
+		if resultado_local is not None:
+			categoria_local, confianza, origen = resultado_local
+			datos_tarea["categoria"] = categoria_local
+			datos_tarea["origen_categoria"] = origen
+			datos_tarea["confianza_categoria"] = round(confianza, 4)
+			campos_faltantes.remove("categoria")
+
+	if "horas_estimadas" in campos_faltantes:
+		estimacion_local = estimar_horas_local(
+			str(titulo),
+			descripcion,
+			prioridad=datos_tarea.get("prioridad"),
+			categoria=datos_tarea.get("categoria"),
+		)
+		if estimacion_local is not None:
+			datos_tarea["horas_estimadas"] = estimacion_local["horas"]
+			datos_tarea["origen_horas"] = ORIGEN_HISTORICO
+			datos_tarea["confianza_horas"] = estimacion_local["confianza"]
+			campos_faltantes.remove("horas_estimadas")
+
+	if not campos_faltantes:
+		return datos_tarea, 200
+
+	valores, campos_invalidos = generar_campos_tarea(datos_tarea, campos_faltantes)
+	if campos_invalidos:
+		return (
+			{
+				"mensaje": "La respuesta de IA no completó todos los campos",
+				"campos_invalidos": campos_invalidos,
+			},
+			400,
+		)
+
+	datos_tarea.update(valores)
+	if "categoria" in valores:
+		datos_tarea["origen_categoria"] = ORIGEN_OPENAI
+		datos_tarea["confianza_categoria"] = None
+	if "horas_estimadas" in valores:
+		datos_tarea["origen_horas"] = ORIGEN_OPENAI
+		datos_tarea["confianza_horas"] = None
+	return datos_tarea, 200
+
+
+# Lógica por tarea de cada operación, por su nombre en la URL.
+OPERACIONES_POR_LOTE = {
+	"describe": _describir,
+	"categorize": _categorizar,
+	"estimate": _estimar_horas,
+	"audit": _auditar_riesgos,
+	"enrich": _enriquecer,
+}
+
+# Máximo de tareas aceptadas por petición en /ai/tareas/<operacion>/batch.
+LIMITE_MAXIMO_LOTE_IA = 1000
+
+
+def _procesar_elemento_lote(
+	procesar: Callable[[dict[str, Any]], tuple[dict[str, Any], int]], elemento: Any
+) -> dict[str, Any]:
+	"""Resultado de un elemento del lote con el formato de /tareas/bulk (sin `indice`)."""
+	if not isinstance(elemento, dict):
+		return {"estado": 400, "mensaje": "El elemento debe ser un objeto JSON"}
+	cuerpo, estado = procesar(elemento)
+	if estado >= 400:
+		return {"estado": estado, **cuerpo}
+	return {"estado": estado, "tarea": cuerpo}
+
+
+@plano_rutas_ai.post("/tareas/<operacion>/batch")
+def procesar_lote_tareas(operacion: str):
+	"""Aplica una operación de IA (describe, categorize, estimate, audit o enrich) a una lista de tareas.
+
+	Intención:
+	- Enriquecer muchas tareas en una sola petición: las consultas al proveedor de
+	  cada tarea corren en un pool de hilos acotado (OPENAI_CONCURRENCIA_LOTE,
+	  por defecto 8, compartido por todas las solicitudes).
+	- Cada tarea sigue las mismas reglas que el endpoint individual.
+	- Una tarea lenta o con error no impide completar las demás.
+
+	Respuestas:
+	- 200: {"resultados": [...], "exitosos": n, "fallidos": m}, en el orden del
+	  body. Cada resultado tiene `indice` y `estado` (200 con la `tarea`; 400 o 500
+	  con `mensaje`), como en /tareas/bulk.
+	- 400: el body no es una lista (o supera el máximo de elementos).
+	- 404: operación desconocida.
+	"""
+	procesar = OPERACIONES_POR_LOTE.get(operacion)
+	if procesar is None:
+		return jsonify({"mensaje": f"Operación desconocida: {operacion}"}), 404
+
+	elementos = request.get_json(silent=True)
+	if not isinstance(elementos, list):
+		return jsonify({"mensaje": "El body debe ser una lista JSON"}), 400
+	if len(elementos) > LIMITE_MAXIMO_LOTE_IA:
+		return jsonify({"mensaje": f"Se admiten como máximo {LIMITE_MAXIMO_LOTE_IA} elementos"}), 400
+
+	resultados: list[dict[str, Any]] = []
+	procesados = procesar_en_paralelo(
+		lambda elemento: _procesar_elemento_lote(procesar, elemento), elementos
+	)
+	for indice, procesado in enumerate(procesados):
+		if isinstance(procesado, (RuntimeError, ValueError, TypeError)):
+			# Mensajes del servicio de IA: no incluyen secretos.
+			resultados.append({"indice": indice, "estado": 500, "mensaje": str(procesado)})
+		elif isinstance(procesado, Exception):
+			resultados.append(
+				{"indice": indice, "estado": 500, "mensaje": "Error inesperado al procesar la tarea"}
+			)
+		else:
+			resultados.append({"indice": indice, **procesado})
+
+	exitosos = sum(1 for resultado in resultados if resultado["estado"] < 400)
+	return (
+		jsonify(
+			{
+				"resultados": resultados,
+				"exitosos": exitosos,
+				"fallidos": len(resultados) - exitosos,
+			}
+		),
+		200,
+	)
@@ -9,32 +9,711 @@ Reglas de este paso (según agents.md):
 - No implementar DELETE.
 
 Funcionalidad:
-- GET /tareas: lee las tareas desde `datos/tareas.json` usando `GestorTareas`.
-- Convierte cada objeto `Tarea` a diccionario con `a_diccionario()`.
+- GET /tareas: lee las tareas desde `datos/tareas.json` usando `GestorTareas`,
+  con filtros y orden opcionales por query params.
+- Convierte cada objeto `Tarea` a diccionario con `a_diccionario()`; el listado
+  concatena el JSON ya codificado de cada tarea (caché de fragmentos del estado).
 - Responde con JSON y código 200.
+- POST/PATCH/DELETE /tareas/bulk: operaciones por lote con una sola lectura y
+  una sola escritura, con resultado por elemento.
 """
 
-from flask import Blueprint, jsonify, request
+import base64
+import binascii
+import gzip
+import hashlib
+import zlib
+from typing import Any, Callable, Iterable, Iterator
+
+from flask import Blueprint, Response, current_app, jsonify, request
 
-from servicios.gestor_tareas import GestorTareas
 from modelos.tarea import Tarea
+from servicios.gestor_tareas import GestorTareas
+from servicios.busqueda_tareas import calcular_clave_relevancia, es_clave_relevancia_valida
+from servicios.indices_tareas import (
+	CAMPOS_FILTRABLES,
+	CAMPOS_ORDENABLES,
+	calcular_clave_orden,
+	es_clave_orden_valida,
+)
 
 
 # Blueprint de rutas de tareas.
 plano_rutas_tareas = Blueprint("rutas_tareas", __name__)
 
+# Campos que el cliente debe enviar al crear y que puede modificar al actualizar.
+CAMPOS_REQUERIDOS_TAREA = [
+	"titulo",
+	"descripcion",
+	"prioridad",
+	"horas_estimadas",
+	"estado",
+	"asignado_a",
+]
+
+# Campos opcionales del modelo que se aceptan al importar.
+CAMPOS_OPCIONALES_TAREA = ["categoria", "analisis_riesgo", "mitigacion_riesgo"]
+
+# Máximo de elementos aceptados por petición en los endpoints /tareas/bulk.
+LIMITE_MAXIMO_LOTE = 10000
+
+# Tamaño máximo de página aceptado en `limite`.
+LIMITE_MAXIMO_PAGINA = 1000
+# Tareas serializadas por cada fragmento de la respuesta en streaming.
+TAREAS_POR_FRAGMENTO = 200
+# Resultados por página en GET /tareas/buscar cuando no se indica `limite`.
+LIMITE_BUSQUEDA_POR_DEFECTO = 20
+# Valor de `ordenar_por` que guardan los cursores de búsqueda.
+ORDEN_RELEVANCIA = "relevancia"
+# Espera máxima aceptada en el long-poll de GET /tareas/cambios.
+MAXIMO_ESPERA_CAMBIOS_SEGUNDOS = 30
+# Tareas validadas y persistidas juntas (una escritura) en POST /tareas/importar.
+TAREAS_POR_LOTE_IMPORTACION = 1000
+# Tamaño máximo de una línea NDJSON importada (una tarea).
+MAXIMO_BYTES_LINEA_IMPORTACION = 1024 * 1024
+# Errores de importación que se detallan en la respuesta (el resto solo se cuenta).
+MAXIMO_ERRORES_INFORMADOS = 100
+# Sin cambios, el flujo SSE envía un comentario cada tantos segundos para que
+# proxies y clientes no den la conexión por muerta.
+INTERVALO_LATIDO_SSE_SEGUNDOS = 15
+
+
+def _convertir_listas_a_tuplas(valor: Any) -> Any:
+	"""JSON no tiene tuplas: las claves de orden vuelven como listas anidadas."""
+	if isinstance(valor, list):
+		return tuple(_convertir_listas_a_tuplas(elemento) for elemento in valor)
+	return valor
+
+
+def _codificar_cursor(
+	ordenar_por: str,
+	descendente: bool,
+	clave_orden: tuple[Any, ...],
+	version: int | None = None,
+) -> str:
+	"""Cursor opaco: la clave de orden de la última tarea entregada (base64url).
+
+	Con `version`, el cursor solo vale mientras el conjunto de tareas no cambie.
+	"""
+	datos_cursor: dict[str, Any] = {
+		"ordenar_por": ordenar_por,
+		"descendente": descendente,
+		"clave": clave_orden,
+	}
+	if version is not None:
+		datos_cursor["version"] = version
+	contenido = current_app.json.dumps(datos_cursor)
+	return base64.urlsafe_b64encode(contenido.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decodificar_cursor(cursor: str) -> dict[str, Any]:
+	"""Inverso de `_codificar_cursor()`. Lanza `ValueError` si el cursor es inválido."""
+	try:
+		relleno = "=" * (-len(cursor) % 4)
+		contenido = current_app.json.loads(base64.urlsafe_b64decode(cursor + relleno))
+		return {
+			"ordenar_por": str(contenido["ordenar_por"]),
+			"descendente": bool(contenido["descendente"]),
+			"clave": _convertir_listas_a_tuplas(contenido["clave"]),
+			"version": contenido.get("version"),
+		}
+	except (binascii.Error, ValueError, KeyError, TypeError):
+		# `ValueError` incluye JSON y UTF-8 inválidos.
+		raise ValueError("cursor inválido") from None
+
+
+def _calcular_etag_consulta(version: int) -> str:
+	"""ETag de GET /tareas: versión del conjunto más la consulta (filtros, página...)."""
+	if not request.query_string:
+		return str(version)
+	huella_consulta = hashlib.sha1(request.query_string).hexdigest()[:16]
+	return f"{version}-{huella_consulta}"
+
+
+def _responder_no_modificado(etag: str) -> Response:
+	"""Respuesta 304 sin cuerpo para un `If-None-Match` que coincide."""
+	respuesta = Response(status=304)
+	respuesta.set_etag(etag)
+	return respuesta
+
+
+def _generar_lista_json(fragmentos: Iterable[bytes]) -> Iterator[bytes]:
+	"""Emite la lista JSON por bloques, sin construir la respuesta completa.
+
+	Cada tarea llega ya codificada (caché de fragmentos del estado, ver
+	`GestorTareas.iterar_tareas_json()`): aquí solo se concatenan.
+	"""
+	bloque: list[bytes] = [b"["]
+	hay_tareas = False
+	for fragmento in fragmentos:
+		if hay_tareas:
+			bloque.append(b",")
+		bloque.append(fragmento)
+		hay_tareas = True
+		if len(bloque) >= 2 * TAREAS_POR_FRAGMENTO:
+			yield b"".join(bloque)
+			bloque = []
+	bloque.append(b"]")
+	yield b"".join(bloque)
+
+
+def _leer_parametros_consulta(parametros: Any) -> dict[str, Any]:
+	"""Convierte los query params de GET /tareas en argumentos de `consultar_tareas()`.
+
+	Lanza `ValueError` con un mensaje para el cliente si algún valor es inválido.
+	"""
+	filtros = {
+		campo: parametros.getlist(campo)
+		for campo in CAMPOS_FILTRABLES
+		if parametros.getlist(campo)
+	}
+
+	rango_horas: dict[str, float | None] = {}
+	for nombre_parametro, argumento in (
+		("horas_estimadas_min", "horas_minimas"),
+		("horas_estimadas_max", "horas_maximas"),
+	):
+		valor_texto = parametros.get(nombre_parametro)
+		if valor_texto is None:
+			rango_horas[argumento] = None
+			continue
+		try:
+			rango_horas[argumento] = float(valor_texto)
+		except ValueError:
+			raise ValueError(f"{nombre_parametro} debe ser un número") from None
+
+	ordenar_por = parametros.get("ordenar_por")
+	if ordenar_por is not None and ordenar_por not in CAMPOS_ORDENABLES:
+		raise ValueError(
+			"ordenar_por debe ser uno de: " + ", ".join(CAMPOS_ORDENABLES)
+		)
+
+	orden = parametros.get("orden", "asc").lower()
+	if orden not in ("asc", "desc"):
+		raise ValueError("orden debe ser asc o desc")
+
+	limite_texto = parametros.get("limite")
+	cursor = parametros.get("cursor")
+	limite: int | None = None
+	despues_de: tuple[Any, ...] | None = None
+	if limite_texto is not None or cursor is not None:
+		try:
+			limite = int(limite_texto) if limite_texto is not None else LIMITE_MAXIMO_PAGINA
+		except ValueError:
+			raise ValueError("limite debe ser un entero") from None
+		if not 1 <= limite <= LIMITE_MAXIMO_PAGINA:
+			raise ValueError(f"limite debe estar entre 1 y {LIMITE_MAXIMO_PAGINA}")
+
+		# Sin orden explícito, las páginas siguen el orden de identificador.
+		ordenar_por = ordenar_por or "identificador"
+		if cursor is not None:
+			datos_cursor = _decodificar_cursor(cursor)
+			if (
+				datos_cursor["ordenar_por"] != ordenar_por
+				or datos_cursor["descendente"] != (orden == "desc")
+			):
+				raise ValueError("El cursor corresponde a otro orden")
+			if not es_clave_orden_valida(ordenar_por, datos_cursor["clave"]):
+				raise ValueError("cursor inválido")
+			despues_de = datos_cursor["clave"]
+
+	return {
+		"filtros": filtros,
+		**rango_horas,
+		"ordenar_por": ordenar_por,
+		"descendente": orden == "desc",
+		"despues_de": despues_de,
+		"limite": limite,
+	}
+
 
 @plano_rutas_tareas.get("/tareas")
 def obtener_tareas():
-	"""Devuelve la lista de tareas almacenadas.
+	"""Devuelve la lista de tareas almacenadas, opcionalmente filtrada y ordenada.
+
+	Query params (todos opcionales, combinables):
+	- estado, prioridad, asignado_a, categoria: igualdad sin distinguir mayúsculas.
+	  Se pueden repetir para aceptar varios valores (?estado=pendiente&estado=bloqueada).
+	- horas_estimadas_min, horas_estimadas_max: rango inclusivo de horas.
+	- ordenar_por: identificador, titulo, prioridad, horas_estimadas, estado,
+	  asignado_a o categoria. orden: asc (por defecto) o desc.
+	- limite, cursor: paginación. La respuesta pasa a ser
+	  {"tareas": [...], "siguiente_cursor": "..."} y `siguiente_cursor` (null en la
+	  última página) se envía tal cual para pedir la página siguiente. El cursor
+	  guarda la posición por clave de orden (por defecto, identificador), así que las
+	  altas y bajas no desplazan las páginas.
+
+	- Los filtros y el orden se resuelven con índices secundarios (`GestorTareas.iterar_tareas()`).
+	- Sin paginación, la lista JSON se emite en streaming: la memoria no crece con
+	  el número de tareas y el primer byte sale sin esperar a serializarlas todas.
+
+	Caché HTTP:
+	- Se envía `ETag` derivado de la versión del conjunto de tareas y de la consulta.
+	- Con `If-None-Match` coincidente se responde 304 sin leer ni serializar tareas.
+
+	Respuestas:
+	- 200: lista de tareas (o página).
+	- 304: no hubo cambios desde el `ETag` recibido.
+	- 400: algún parámetro es inválido.
+	"""
+	try:
+		parametros_consulta = _leer_parametros_consulta(request.args)
+	except ValueError as error:
+		return jsonify({"mensaje": str(error)}), 400
+
+	# La versión se consulta antes de leer tareas: si no cambió, no se carga ni
+	# serializa nada.
+	etag = _calcular_etag_consulta(GestorTareas.obtener_version())
+	if etag in request.if_none_match:
+		return _responder_no_modificado(etag)
+
+	try:
+		limite = parametros_consulta["limite"]
+		if limite is not None:
+			# Se pide una tarea de más para saber si existe una página siguiente.
+			parametros_consulta = {**parametros_consulta, "limite": limite + 1}
+		tareas_json = GestorTareas.iterar_tareas_json(
+			**parametros_consulta, codificador=current_app.json.codificador
+		)
+	except ValueError as error:
+		return jsonify({"mensaje": str(error)}), 400
+
+	if limite is None:
+		respuesta = Response(
+			_generar_lista_json(fragmento for _, fragmento in tareas_json),
+			status=200,
+			mimetype="application/json",
+		)
+		respuesta.set_etag(etag)
+		return respuesta
+
+	pagina = list(tareas_json)
+	siguiente_cursor = None
+	if len(pagina) > limite:
+		pagina = pagina[:limite]
+		# El cursor apunta a la última tarea entregada.
+		siguiente_cursor = _codificar_cursor(
+			parametros_consulta["ordenar_por"],
+			parametros_consulta["descendente"],
+			calcular_clave_orden(parametros_consulta["ordenar_por"], pagina[-1][0]),
+		)
+	# Mismo contenido que jsonify({"tareas": [...], "siguiente_cursor": ...}),
+	# armado con los fragmentos ya codificados.
+	cuerpo = b"".join(
+		[
+			b'{"tareas":',
+			*_generar_lista_json(fragmento for _, fragmento in pagina),
+			b',"siguiente_cursor":',
+			current_app.json.dumps(siguiente_cursor).encode("utf-8"),
+			b"}",
+		]
+	)
+	respuesta = Response(cuerpo, status=200, mimetype="application/json")
+	respuesta.set_etag(etag)
+	return respuesta
+
+
+@plano_rutas_tareas.get("/tareas/buscar")
+def buscar_tareas():
+	"""Busca tareas por palabras de `titulo` y `descripcion`, por relevancia.
+
+	Query params:
+	- q (obligatorio): palabras a buscar. Se ignoran mayúsculas y acentos
+	  ("documentacion" encuentra "Documentación") y deben aparecer todas.
+	- limite (por defecto 20, máximo 1000) y cursor: paginación como en GET /tareas.
+	  La puntuación depende del conjunto de tareas, así que el cursor solo vale
+	  para la versión en la que se emitió: tras cualquier escritura se rechaza
+	  (las páginas podrían saltarse o repetir resultados).
+
+	Intención:
+	- Resolver la búsqueda con el índice invertido en memoria
+	  (`GestorTareas.buscar_tareas()`), que se mantiene al día en cada alta,
+	  modificación o baja, sin recorrer todas las tareas.
+
+	Respuestas:
+	- 200: {"resultados": [{"tarea": {...}, "puntuacion": 4.2}, ...],
+	  "total": <coincidencias>, "siguiente_cursor": "..." | null}.
+	- 304: no hubo cambios desde el `ETag` recibido.
+	- 400: falta `q`, no contiene palabras o la paginación es inválida.
+	- 409: el cursor es de una versión anterior de las tareas (volver a la
+	  primera página).
+	"""
+	consulta = request.args.get("q", "")
+	limite_texto = request.args.get("limite")
+	cursor = request.args.get("cursor")
+	try:
+		limite = int(limite_texto) if limite_texto is not None else LIMITE_BUSQUEDA_POR_DEFECTO
+	except ValueError:
+		return jsonify({"mensaje": "limite debe ser un entero"}), 400
+	if not 1 <= limite <= LIMITE_MAXIMO_PAGINA:
+		return jsonify({"mensaje": f"limite debe estar entre 1 y {LIMITE_MAXIMO_PAGINA}"}), 400
+
+	despues_de = None
+	if cursor is not None:
+		try:
+			datos_cursor = _decodificar_cursor(cursor)
+		except ValueError as error:
+			return jsonify({"mensaje": str(error)}), 400
+		if datos_cursor["ordenar_por"] != ORDEN_RELEVANCIA:
+			return jsonify({"mensaje": "El cursor corresponde a otro orden"}), 400
+		if not es_clave_relevancia_valida(datos_cursor["clave"]):
+			return jsonify({"mensaje": "cursor inválido"}), 400
+		despues_de = datos_cursor["clave"]
+
+	# La versión se lee antes de buscar: si una escritura llega en medio, el
+	# cursor emitido queda con la anterior y se rechaza (nunca al revés).
+	version = GestorTareas.obtener_version()
+	etag = _calcular_etag_consulta(version)
+	if etag in request.if_none_match:
+		return _responder_no_modificado(etag)
+	if cursor is not None and datos_cursor["version"] != version:
+		return (
+			jsonify({"mensaje": "Las tareas cambiaron: repite la búsqueda desde la primera página"}),
+			409,
+		)
+
+	try:
+		# Se pide un resultado de más para saber si existe una página siguiente.
+		resultados, total = GestorTareas.buscar_tareas(consulta, despues_de, limite + 1)
+	except ValueError as error:
+		return jsonify({"mensaje": str(error)}), 400
+
+	siguiente_cursor = None
+	if len(resultados) > limite:
+		resultados = resultados[:limite]
+		ultima_tarea, ultima_puntuacion = resultados[-1]
+		siguiente_cursor = _codificar_cursor(
+			ORDEN_RELEVANCIA,
+			False,
+			calcular_clave_relevancia(ultima_puntuacion, ultima_tarea.identificador),
+			version,
+		)
+
+	respuesta = jsonify(
+		{
+			"resultados": [
+				{"tarea": tarea.a_diccionario(), "puntuacion": puntuacion}
+				for tarea, puntuacion in resultados
+			],
+			"total": total,
+			"siguiente_cursor": siguiente_cursor,
+		}
+	)
+	respuesta.set_etag(etag)
+	return respuesta, 200
+
+
+@plano_rutas_tareas.get("/tareas/estadisticas")
+def obtener_estadisticas_tareas():
+	"""Devuelve los agregados de las tareas para los reportes de planificación.
+
+	Intención:
+	- Evitar que el cliente descargue todas las tareas para sumarlas: los
+	  agregados se mantienen como contadores que cada alta, modificación o baja
+	  ajusta (`GestorTareas.obtener_estadisticas()`).
+
+	Respuestas:
+	- 200: {"total_tareas": 3, "horas_estimadas_total": 7.5,
+	  "por_estado": {"pendiente": 2, ...}, "por_prioridad": {...},
+	  "por_asignado_a": {...}, "por_categoria": {...}}. Los grupos usan el valor
+	  en minúsculas; "" agrupa los vacíos o ausentes.
+	- 304: no hubo cambios desde el `ETag` recibido.
+	"""
+	etag = str(GestorTareas.obtener_version())
+	if etag in request.if_none_match:
+		return _responder_no_modificado(etag)
+
+	respuesta = jsonify(GestorTareas.obtener_estadisticas())
+	respuesta.set_etag(etag)
+	return respuesta, 200
+
+
+def _leer_parametros_cambios(desde_texto: str | None, es_flujo_sse: bool) -> tuple[int, float, int]:
+	"""(desde, espera, limite) de GET /tareas/cambios.
+
+	Lanza `ValueError` con un mensaje para el cliente si algún valor es inválido.
+	"""
+	if desde_texto is None:
+		if not es_flujo_sse:
+			raise ValueError("Falta el parámetro desde")
+		# El flujo sin punto de partida empieza en la versión actual.
+		desde = GestorTareas.obtener_version()
+	else:
+		try:
+			desde = int(desde_texto)
+		except ValueError:
+			raise ValueError("desde debe ser un entero") from None
+		if desde < 0:
+			raise ValueError("desde debe ser mayor o igual que 0")
+
+	try:
+		espera = float(request.args.get("espera", 0))
+	except ValueError:
+		raise ValueError("espera debe ser un número") from None
+	if not 0 <= espera <= MAXIMO_ESPERA_CAMBIOS_SEGUNDOS:
+		raise ValueError(f"espera debe estar entre 0 y {MAXIMO_ESPERA_CAMBIOS_SEGUNDOS}")
+
+	try:
+		limite = int(request.args.get("limite", LIMITE_MAXIMO_PAGINA))
+	except ValueError:
+		raise ValueError("limite debe ser un entero") from None
+	if not 1 <= limite <= LIMITE_MAXIMO_PAGINA:
+		raise ValueError(f"limite debe estar entre 1 y {LIMITE_MAXIMO_PAGINA}")
+	return desde, espera, limite
+
+
+def _generar_eventos_cambios(desde: int, serializar: Callable[[Any], str]) -> Iterator[str]:
+	"""Flujo SSE de cambios a partir de `desde`; no termina hasta que el cliente corta.
+
+	- Cada cambio es un evento `cambio` con `id` = secuencia, así el navegador
+	  reanuda solo (cabecera Last-Event-ID) tras una reconexión.
+	- Si los cambios pendientes ya no están disponibles se envía un evento
+	  `reiniciar`: el cliente debe volver a leer GET /tareas.
+	"""
+	while True:
+		cambios, secuencia_actual = GestorTareas.esperar_cambios(
+			desde, INTERVALO_LATIDO_SSE_SEGUNDOS, LIMITE_MAXIMO_PAGINA
+		)
+		if cambios is None:
+			datos = serializar({"secuencia_actual": secuencia_actual})
+			yield f"id: {secuencia_actual}\nevent: reiniciar\ndata: {datos}\n\n"
+			desde = secuencia_actual
+			continue
+		if not cambios:
+			yield ": latido\n\n"
+			continue
+		yield "".join(
+			f"id: {cambio['secuencia']}\nevent: cambio\ndata: {serializar(cambio)}\n\n"
+			for cambio in cambios
+		)
+		desde = cambios[-1]["secuencia"]
+
+
+@plano_rutas_tareas.get("/tareas/cambios")
+def obtener_cambios_tareas():
+	"""Devuelve los cambios posteriores a una secuencia (change feed).
+
+	Cada mutación persistida tiene un número de secuencia (la misma versión que el
+	`ETag` de GET /tareas). Un cliente con copia local lee la lista una vez y
+	luego solo pide los cambios.
+
+	Query params:
+	- desde: última secuencia que el cliente ya tiene (obligatorio en JSON).
+	- espera: segundos (máximo 30) a esperar si todavía no hay cambios (long-poll).
+	- limite: máximo de cambios por respuesta (por defecto y máximo 1000).
+
+	Con `Accept: text/event-stream` la respuesta es un flujo Server-Sent Events
+	que no termina; `desde` es opcional (se toma de Last-Event-ID o, si no, se
+	empieza en la secuencia actual).
+
+	Respuestas:
+	- 200: {"cambios": [{"secuencia", "operacion", "identificador", "tarea"}],
+	  "ultima_secuencia": <siguiente `desde`>, "secuencia_actual": n}.
+	- 400: parámetros inválidos.
+	- 410: esos cambios ya no están disponibles; volver a leer GET /tareas y
+	  continuar desde `secuencia_actual`.
+	"""
+	es_flujo_sse = (
+		request.accept_mimetypes.best_match(["application/json", "text/event-stream"])
+		== "text/event-stream"
+	)
+	desde_texto = request.args.get("desde")
+	if desde_texto is None and es_flujo_sse:
+		desde_texto = request.headers.get("Last-Event-ID")
+	try:
+		desde, espera, limite = _leer_parametros_cambios(desde_texto, es_flujo_sse)
+	except ValueError as error:
+		return jsonify({"mensaje": str(error)}), 400
 
-	- Carga tareas usando el servicio `GestorTareas`.
-	- Convierte cada tarea a diccionario.
-	- Devuelve una lista JSON.
+	if es_flujo_sse:
+		return Response(
+			_generar_eventos_cambios(desde, current_app.json.dumps),
+			status=200,
+			mimetype="text/event-stream",
+			headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+		)
+
+	cambios, secuencia_actual = GestorTareas.esperar_cambios(desde, espera, limite)
+	if cambios is None:
+		return (
+			jsonify(
+				{
+					"mensaje": "Los cambios pedidos ya no están disponibles; vuelva a leer GET /tareas",
+					"secuencia_actual": secuencia_actual,
+				}
+			),
+			410,
+		)
+	return (
+		jsonify(
+			{
+				"cambios": cambios,
+				"ultima_secuencia": cambios[-1]["secuencia"] if cambios else desde,
+				"secuencia_actual": secuencia_actual,
+			}
+		),
+		200,
+	)
+
+
+def _generar_ndjson(fragmentos: Iterable[bytes], comprimir: bool) -> Iterator[bytes]:
+	"""Una tarea por línea, por bloques; con `comprimir`, en gzip sobre la marcha."""
+	compresor = zlib.compressobj(wbits=31) if comprimir else None
+	bloque: list[bytes] = []
+	for fragmento in fragmentos:
+		bloque.append(fragmento)
+		bloque.append(b"\n")
+		if len(bloque) >= 2 * TAREAS_POR_FRAGMENTO:
+			datos = b"".join(bloque)
+			bloque = []
+			if compresor is not None:
+				datos = compresor.compress(datos)
+			if datos:
+				yield datos
+	datos = b"".join(bloque)
+	if compresor is not None:
+		datos = compresor.compress(datos) + compresor.flush()
+	if datos:
+		yield datos
+
+
+@plano_rutas_tareas.get("/tareas/exportar")
+def exportar_tareas():
+	"""Exporta todas las tareas como NDJSON (una tarea JSON por línea), en streaming.
+
+	Query params:
+	- comprimir=gzip (opcional): el cuerpo se comprime sobre la marcha y se envía
+	  con `Content-Encoding: gzip`.
+
+	Intención:
+	- Respaldar o migrar el almacenamiento sin construir la lista completa: cada
+	  línea es el fragmento JSON ya codificado de la tarea, así que la memoria del
+	  envío no crece con el número de tareas. El resultado se puede volver a
+	  cargar con POST /tareas/importar.
+
+	Respuestas:
+	- 200: application/x-ndjson.
+	- 400: valor de `comprimir` desconocido.
 	"""
-	lista_tareas = GestorTareas.cargar_tareas()
-	lista_diccionarios_tareas = [tarea.a_diccionario() for tarea in lista_tareas]
-	return jsonify(lista_diccionarios_tareas), 200
+	comprimir = request.args.get("comprimir")
+	if comprimir not in (None, "gzip"):
+		return jsonify({"mensaje": "comprimir solo admite el valor gzip"}), 400
+
+	tareas_json = GestorTareas.iterar_tareas_json(codificador=current_app.json.codificador)
+	respuesta = Response(
+		_generar_ndjson((fragmento for _, fragmento in tareas_json), comprimir == "gzip"),
+		status=200,
+		mimetype="application/x-ndjson",
+		headers={"Content-Disposition": 'attachment; filename="tareas.ndjson"'},
+	)
+	if comprimir == "gzip":
+		respuesta.headers["Content-Encoding"] = "gzip"
+	return respuesta
+
+
+def _iterar_lineas_ndjson(flujo: Any) -> Iterator[bytes | None]:
+	"""Líneas no vacías del flujo, leídas de a una; None si una excede el máximo."""
+	while True:
+		linea = flujo.readline(MAXIMO_BYTES_LINEA_IMPORTACION + 1)
+		if not linea:
+			return
+		if len(linea) > MAXIMO_BYTES_LINEA_IMPORTACION:
+			# Se descarta el resto de la línea sin cargarla en memoria.
+			while linea and not linea.endswith(b"\n"):
+				linea = flujo.readline(MAXIMO_BYTES_LINEA_IMPORTACION)
+			yield None
+			continue
+		if linea.strip():
+			yield linea
+
+
+def _importar_lote(lote: list[tuple[int, dict[str, Any]]], resumen: dict[str, Any]) -> None:
+	"""Persiste un lote de tareas ya validadas y acumula el resultado en `resumen`."""
+	resultados = GestorTareas.importar_varias([campos for _, campos in lote])
+	for (numero_linea, _), resultado in zip(lote, resultados):
+		if isinstance(resultado, Exception):
+			_registrar_error_importacion(resumen, numero_linea, str(resultado))
+		elif resultado[0] == "crear":
+			resumen["creadas"] += 1
+		else:
+			resumen["actualizadas"] += 1
+	resumen["lotes"] += 1
+
+
+def _registrar_error_importacion(resumen: dict[str, Any], numero_linea: int, mensaje: str) -> None:
+	resumen["fallidas"] += 1
+	if len(resumen["errores"]) < MAXIMO_ERRORES_INFORMADOS:
+		resumen["errores"].append({"linea": numero_linea, "mensaje": mensaje})
+
+
+@plano_rutas_tareas.post("/tareas/importar")
+def importar_tareas():
+	"""Importa tareas desde un body NDJSON (una tarea JSON por línea), en streaming.
+
+	Intención:
+	- Leer el body línea a línea (también comprimido, con `Content-Encoding: gzip`)
+	  sin cargarlo entero: solo se retiene el lote en curso.
+	- Validar cada línea como POST /tareas (objeto JSON con los campos
+	  requeridos) y persistir cada `TAREAS_POR_LOTE_IMPORTACION` tareas con una
+	  sola escritura (`GestorTareas.importar_varias()`).
+	- Conservar el identificador de cada tarea: la misma tarea importada dos
+	  veces se reemplaza en lugar de duplicarse. Sin identificador se asigna uno.
+
+	Respuestas:
+	- 200: {"creadas", "actualizadas", "fallidas", "lotes", "errores": [{"linea",
+	  "mensaje"}, ...]} (como mucho 100 errores detallados). Las líneas inválidas
+	  no impiden importar las demás; los lotes ya persistidos no se deshacen.
+	- 400: `Content-Encoding` no soportado o gzip inválido.
+	"""
+	codificacion = request.headers.get("Content-Encoding", "").strip().lower()
+	if codificacion not in ("", "identity", "gzip"):
+		return jsonify({"mensaje": "Content-Encoding solo admite gzip"}), 400
+	flujo = gzip.GzipFile(fileobj=request.stream) if codificacion == "gzip" else request.stream
+
+	decodificar = current_app.json.loads
+	campos_modelo = ["identificador", *CAMPOS_REQUERIDOS_TAREA, *CAMPOS_OPCIONALES_TAREA]
+	resumen: dict[str, Any] = {
+		"creadas": 0,
+		"actualizadas": 0,
+		"fallidas": 0,
+		"lotes": 0,
+		"errores": [],
+	}
+	lote: list[tuple[int, dict[str, Any]]] = []
+	try:
+		for numero_linea, linea in enumerate(_iterar_lineas_ndjson(flujo), start=1):
+			if linea is None:
+				_registrar_error_importacion(resumen, numero_linea, "Línea demasiado larga")
+				continue
+			try:
+				datos_tarea = decodificar(linea)
+			except ValueError:
+				_registrar_error_importacion(resumen, numero_linea, "La línea no es JSON válido")
+				continue
+			if not isinstance(datos_tarea, dict):
+				_registrar_error_importacion(resumen, numero_linea, "La línea debe ser un objeto JSON")
+				continue
+			campos_faltantes = [campo for campo in CAMPOS_REQUERIDOS_TAREA if campo not in datos_tarea]
+			if campos_faltantes:
+				_registrar_error_importacion(
+					resumen, numero_linea, "Faltan campos requeridos: " + ", ".join(campos_faltantes)
+				)
+				continue
+			lote.append(
+				(numero_linea, {campo: datos_tarea[campo] for campo in campos_modelo if campo in datos_tarea})
+			)
+			if len(lote) >= TAREAS_POR_LOTE_IMPORTACION:
+				_importar_lote(lote, resumen)
+				lote = []
+	except (OSError, EOFError, zlib.error):
+		# gzip inválido o truncado. Lo ya persistido queda importado.
+		if lote:
+			_importar_lote(lote, resumen)
+		return jsonify({"mensaje": "El body gzip es inválido o está truncado", **resumen}), 400
+
+	if lote:
+		_importar_lote(lote, resumen)
+	return jsonify(resumen), 200
 
 
 @plano_rutas_tareas.get("/tareas/<identificador>")
@@ -42,19 +721,29 @@ def obtener_tarea_por_identificador(identificador: str):
 	"""Devuelve una tarea específica por su identificador.
 
 	Intención:
-	- Reutilizar la carga de tareas desde `GestorTareas.cargar_tareas()`.
-	- Buscar recorriendo la lista, comparando el identificador como string.
+	- Buscar en el índice por identificador con `GestorTareas.obtener_por_id()`
+	  (comparación como string, sin recorrer la lista).
 	
+	- Enviar `ETag` con la versión de la tarea; con `If-None-Match` coincidente
+	  se responde 304 sin copiar ni serializar la tarea.
+
 	Respuestas:
 	- 200: si la tarea existe.
+	- 304: la tarea no cambió desde el `ETag` recibido.
 	- 404: si no se encuentra.
 	"""
-	# Cargamos todas las tareas y recorremos la lista para encontrar coincidencia.
-	lista_tareas = GestorTareas.cargar_tareas()
-	for tarea in lista_tareas:
-		# Comparación directa como string (sin conversiones adicionales).
-		if tarea.identificador == identificador:
-			return jsonify(tarea.a_diccionario()), 200
+	version_tarea = GestorTareas.obtener_version_tarea(identificador)
+	if version_tarea is not None:
+		etag = str(version_tarea)
+		if etag in request.if_none_match:
+			return _responder_no_modificado(etag)
+
+	tarea = GestorTareas.obtener_por_id(identificador)
+	if tarea is not None:
+		respuesta = jsonify(tarea.a_diccionario())
+		if version_tarea is not None:
+			respuesta.set_etag(str(version_tarea))
+		return respuesta, 200
 
 	# Si no se encontró, devolvemos un mensaje claro con código 404.
 	return (
@@ -70,8 +759,9 @@ def crear_tarea():
 	Intención:
 	- Recibir datos JSON en el body.
 	- Validar que existan los campos requeridos.
-	- Asignar un identificador incremental automáticamente.
-	- Guardar la lista actualizada en `datos/tareas.json` usando `GestorTareas`.
+	- Asignar un identificador incremental automáticamente (contador persistido
+	  en `GestorTareas.crear()`; no se reutilizan identificadores eliminados).
+	- Persistir la tarea nueva en `datos/tareas.json` usando `GestorTareas`.
 	
 	Nota:
 	- No se agregan validaciones avanzadas (duplicados, catálogos, etc.).
@@ -84,14 +774,7 @@ def crear_tarea():
 		return jsonify({"mensaje": "El body debe ser un JSON"}), 400
 
 	# Validamos presencia de campos requeridos.
-	campos_requeridos = [
-		"titulo",
-		"descripcion",
-		"prioridad",
-		"horas_estimadas",
-		"estado",
-		"asignado_a",
-	]
+	campos_requeridos = CAMPOS_REQUERIDOS_TAREA
 	campos_faltantes = [
 		campo for campo in campos_requeridos if campo not in datos_tarea
 	]
@@ -107,38 +790,11 @@ def crear_tarea():
 			400,
 		)
 
-	# Cargamos tareas existentes para calcular el siguiente identificador.
-	lista_tareas = GestorTareas.cargar_tareas()
-
-	# Calculamos el máximo identificador numérico existente.
-	maximo_identificador_numerico = 0
-	for tarea in lista_tareas:
-		try:
-			identificador_numerico = int(str(tarea.identificador))
-		except (TypeError, ValueError):
-			# Si el identificador no es numérico, se ignora.
-			continue
-		if identificador_numerico > maximo_identificador_numerico:
-			maximo_identificador_numerico = identificador_numerico
-
-	# Si no hay tareas, el máximo será 0 y el nuevo será 1.
-	nuevo_identificador = maximo_identificador_numerico + 1
-
-	# Creamos el objeto Tarea con los datos recibidos.
-	nueva_tarea = Tarea(
-		identificador=str(nuevo_identificador),
-		titulo=datos_tarea["titulo"],
-		descripcion=datos_tarea["descripcion"],
-		prioridad=datos_tarea["prioridad"],
-		horas_estimadas=datos_tarea["horas_estimadas"],
-		estado=datos_tarea["estado"],
-		asignado_a=datos_tarea["asignado_a"],
+	# El gestor asigna el identificador y persiste solo la tarea nueva.
+	nueva_tarea = GestorTareas.crear(
+		{campo: datos_tarea[campo] for campo in campos_requeridos}
 	)
 
-	# Agregamos y guardamos la lista actualizada.
-	lista_tareas.append(nueva_tarea)
-	GestorTareas.guardar_tareas(lista_tareas)
-
 	# Devolvemos la tarea creada.
 	return jsonify(nueva_tarea.a_diccionario()), 201
 
@@ -149,9 +805,8 @@ def actualizar_tarea(identificador: str):
 
 	Intención:
 	- Recibir datos JSON en el body.
-	- Buscar la tarea por identificador (comparación como string).
 	- Actualizar solo los campos enviados (sin permitir cambiar el identificador).
-	- Guardar la lista actualizada usando `GestorTareas.guardar_tareas()`.
+	- Delegar búsqueda por identificador y persistencia en `GestorTareas.actualizar()`.
 
 	Respuestas:
 	- 200: tarea actualizada.
@@ -165,28 +820,17 @@ def actualizar_tarea(identificador: str):
 	if not isinstance(datos_actualizacion, dict):
 		return jsonify({"mensaje": "El cuerpo de la solicitud debe ser JSON"}), 400
 
-	# Cargamos la lista actual y buscamos la tarea por identificador.
-	lista_tareas = GestorTareas.cargar_tareas()
-	for tarea in lista_tareas:
-		if tarea.identificador != identificador:
-			continue
-
-		# Actualización parcial: solo se modifican campos permitidos presentes.
-		campos_permitidos = [
-			"titulo",
-			"descripcion",
-			"prioridad",
-			"horas_estimadas",
-			"estado",
-			"asignado_a",
-		]
-
-		for campo in campos_permitidos:
-			if campo in datos_actualizacion:
-				setattr(tarea, campo, datos_actualizacion[campo])
+	# Actualización parcial: solo se modifican campos permitidos presentes.
+	# Si llega un identificador en el body, se ignora (no se cambia).
+	campos_permitidos = CAMPOS_REQUERIDOS_TAREA
+	campos_actualizados = {
+		campo: datos_actualizacion[campo]
+		for campo in campos_permitidos
+		if campo in datos_actualizacion
+	}
 
-		# Si llega un identificador en el body, se ignora (no se cambia).
-		GestorTareas.guardar_tareas(lista_tareas)
+	tarea = GestorTareas.actualizar(identificador, campos_actualizados)
+	if tarea is not None:
 		return jsonify(tarea.a_diccionario()), 200
 
 	# Si no se encontró la tarea, devolvemos 404.
@@ -198,24 +842,223 @@ def eliminar_tarea(identificador: str):
 	"""Elimina una tarea existente por su identificador.
 
 	Intención:
-	- Cargar la lista actual de tareas.
-	- Encontrar la tarea por identificador (comparación como string).
-	- Eliminarla de la lista.
-	- Guardar la lista actualizada usando `GestorTareas.guardar_tareas()`.
+	- Eliminar por identificador (comparación como string) con `GestorTareas.eliminar()`.
 
 	Respuestas:
 	- 200: tarea eliminada.
 	- 404: la tarea no existe.
 	"""
-	# Cargamos la lista actual y buscamos la tarea por identificador.
-	lista_tareas = GestorTareas.cargar_tareas()
-
-	for indice_tarea, tarea in enumerate(lista_tareas):
-		if tarea.identificador == identificador:
-			# Eliminamos la tarea encontrada y persistimos el cambio.
-			del lista_tareas[indice_tarea]
-			GestorTareas.guardar_tareas(lista_tareas)
-			return jsonify({"mensaje": "Tarea eliminada"}), 200
+	if GestorTareas.eliminar(identificador):
+		return jsonify({"mensaje": "Tarea eliminada"}), 200
 
 	# Si no se encontró, devolvemos 404 con un mensaje claro.
 	return jsonify({"mensaje": "La tarea no existe"}), 404
+
+
+def _leer_lote() -> tuple[list[Any] | None, Any]:
+	"""Lee el body de un endpoint /tareas/bulk: (lista, None) o (None, respuesta 400)."""
+	elementos = request.get_json(silent=True)
+	if not isinstance(elementos, list):
+		return None, (jsonify({"mensaje": "El body debe ser una lista JSON"}), 400)
+	if len(elementos) > LIMITE_MAXIMO_LOTE:
+		return None, (
+			jsonify({"mensaje": f"Se admiten como máximo {LIMITE_MAXIMO_LOTE} elementos"}),
+			400,
+		)
+	return elementos, None
+
+
+def _responder_lote(resultados: list[dict[str, Any]]):
+	"""Respuesta común de /tareas/bulk: resultado por elemento y resumen.
+
+	Cada resultado lleva `indice` (posición en el body) y `estado` (código HTTP
+	que habría tenido la operación individual). Un fallo parcial no impide
+	aplicar el resto, así que la respuesta es 200 si el body era válido.
+	"""
+	resultados.sort(key=lambda resultado: resultado["indice"])
+	exitosos = sum(1 for resultado in resultados if resultado["estado"] < 400)
+	return (
+		jsonify(
+			{
+				"resultados": resultados,
+				"exitosos": exitosos,
+				"fallidos": len(resultados) - exitosos,
+			}
+		),
+		200,
+	)
+
+
+@plano_rutas_tareas.post("/tareas/bulk")
+def crear_tareas_en_lote():
+	"""Crea varias tareas con una sola lectura y una sola escritura.
+
+	Intención:
+	- Recibir una lista de tareas con las mismas reglas que POST /tareas.
+	- Validar cada elemento por separado; los inválidos se informan y no se crean.
+	- Crear los válidos con `GestorTareas.crear_varias()` (persistencia única).
+
+	Respuestas:
+	- 200: {"resultados": [...], "exitosos": n, "fallidos": m}; cada resultado
+	  tiene estado 201 con la tarea creada, o 400 con el motivo.
+	- 400: el body no es una lista (o supera el máximo de elementos).
+	"""
+	elementos, respuesta_error = _leer_lote()
+	if elementos is None:
+		return respuesta_error
+
+	resultados: list[dict[str, Any]] = []
+	indices_validos: list[int] = []
+	campos_validos: list[dict[str, Any]] = []
+	for indice, datos_tarea in enumerate(elementos):
+		if not isinstance(datos_tarea, dict):
+			resultados.append(
+				{"indice": indice, "estado": 400, "mensaje": "El elemento debe ser un objeto JSON"}
+			)
+			continue
+		campos_faltantes = [
+			campo for campo in CAMPOS_REQUERIDOS_TAREA if campo not in datos_tarea
+		]
+		if campos_faltantes:
+			resultados.append(
+				{
+					"indice": indice,
+					"estado": 400,
+					"mensaje": "Faltan campos requeridos",
+					"campos_faltantes": campos_faltantes,
+				}
+			)
+			continue
+		indices_validos.append(indice)
+		campos_validos.append({campo: datos_tarea[campo] for campo in CAMPOS_REQUERIDOS_TAREA})
+
+	if campos_validos:
+		for indice, tarea in zip(indices_validos, GestorTareas.crear_varias(campos_validos)):
+			if isinstance(tarea, Exception):
+				resultados.append({"indice": indice, "estado": 400, "mensaje": str(tarea)})
+			else:
+				resultados.append({"indice": indice, "estado": 201, "tarea": tarea.a_diccionario()})
+
+	return _responder_lote(resultados)
+
+
+@plano_rutas_tareas.patch("/tareas/bulk")
+def actualizar_tareas_en_lote():
+	"""Actualiza parcialmente varias tareas con una sola lectura y una sola escritura.
+
+	Intención:
+	- Recibir una lista de objetos con `identificador` y los campos a modificar
+	  (los mismos que admite PUT /tareas/<identificador>).
+	- Aplicarlas en orden con `GestorTareas.actualizar_varias()`.
+
+	Respuestas:
+	- 200: resultado por elemento: 200 con la tarea, 400 si falta el
+	  identificador o 404 si la tarea no existe.
+	- 400: el body no es una lista (o supera el máximo de elementos).
+	"""
+	elementos, respuesta_error = _leer_lote()
+	if elementos is None:
+		return respuesta_error
+
+	resultados: list[dict[str, Any]] = []
+	indices_validos: list[int] = []
+	actualizaciones: list[tuple[str, dict[str, Any]]] = []
+	for indice, datos_actualizacion in enumerate(elementos):
+		if not isinstance(datos_actualizacion, dict) or "identificador" not in datos_actualizacion:
+			resultados.append(
+				{
+					"indice": indice,
+					"estado": 400,
+					"mensaje": "El elemento debe ser un objeto JSON con identificador",
+				}
+			)
+			continue
+		indices_validos.append(indice)
+		actualizaciones.append(
+			(
+				str(datos_actualizacion["identificador"]),
+				{
+					campo: datos_actualizacion[campo]
+					for campo in CAMPOS_REQUERIDOS_TAREA
+					if campo in datos_actualizacion
+				},
+			)
+		)
+
+	if actualizaciones:
+		tareas_actualizadas = GestorTareas.actualizar_varias(actualizaciones)
+		for indice, (identificador, _campos), tarea in zip(
+			indices_validos, actualizaciones, tareas_actualizadas
+		):
+			if tarea is None:
+				resultados.append(
+					{
+						"indice": indice,
+						"estado": 404,
+						"identificador": identificador,
+						"mensaje": "La tarea no existe",
+					}
+				)
+			elif isinstance(tarea, Exception):
+				resultados.append({"indice": indice, "estado": 400, "mensaje": str(tarea)})
+			else:
+				resultados.append({"indice": indice, "estado": 200, "tarea": tarea.a_diccionario()})
+
+	return _responder_lote(resultados)
+
+
+@plano_rutas_tareas.delete("/tareas/bulk")
+def eliminar_tareas_en_lote():
+	"""Elimina varias tareas con una sola lectura y una sola escritura.
+
+	Intención:
+	- Recibir una lista de identificadores (o de objetos con `identificador`).
+	- Eliminarlas con `GestorTareas.eliminar_varias()`.
+
+	Respuestas:
+	- 200: resultado por elemento: 200 si se eliminó, 404 si no existía o 400
+	  si el elemento no indica un identificador.
+	- 400: el body no es una lista (o supera el máximo de elementos).
+	"""
+	elementos, respuesta_error = _leer_lote()
+	if elementos is None:
+		return respuesta_error
+
+	resultados: list[dict[str, Any]] = []
+	indices_validos: list[int] = []
+	identificadores: list[str] = []
+	for indice, elemento in enumerate(elementos):
+		if isinstance(elemento, dict):
+			elemento = elemento.get("identificador")
+		if not isinstance(elemento, (str, int)) or isinstance(elemento, bool):
+			resultados.append(
+				{"indice": indice, "estado": 400, "mensaje": "Identificador inválido"}
+			)
+			continue
+		indices_validos.append(indice)
+		identificadores.append(str(elemento))
+
+	if identificadores:
+		for indice, identificador, eliminada in zip(
+			indices_validos, identificadores, GestorTareas.eliminar_varias(identificadores)
+		):
+			if eliminada:
+				resultados.append(
+					{
+						"indice": indice,
+						"estado": 200,
+						"identificador": identificador,
+						"mensaje": "Tarea eliminada",
+					}
+				)
+			else:
+				resultados.append(
+					{
+						"indice": indice,
+						"estado": 404,
+						"identificador": identificador,
+						"mensaje": "La tarea no existe",
+					}
+				)
+
+	return _responder_lote(resultados)
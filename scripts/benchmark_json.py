@@ -0,0 +1,82 @@
+"""Benchmark: rendimiento de los codificadores JSON disponibles.
+
+Codifica y decodifica una lista de N tareas (por defecto 100 000) con cada
+codificador de servicios/codificador_json.py que esté instalado, y muestra el
+tiempo y el caudal (MB/s) de cada sentido.
+
+Uso:
+	python scripts/benchmark_json.py [N]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modelos.tarea import Tarea  # noqa: E402
+from servicios.codificador_json import (  # noqa: E402
+	PROVEEDOR_ESTANDAR,
+	PROVEEDOR_ORJSON,
+	crear_codificador_json,
+)
+
+
+REPETICIONES = 3
+
+
+def generar_tareas(cantidad: int) -> list[dict]:
+	"""Diccionarios de `cantidad` tareas, con texto no ASCII como en datos reales."""
+	estados = ("pendiente", "en_progreso", "completada")
+	return Tarea.a_lista(
+		Tarea(
+			identificador=str(numero),
+			titulo=f"Revisión de la tarea {numero}",
+			descripcion=f"Descripción detallada número {numero}, con acentos y eñes",
+			prioridad=("baja", "media", "alta")[numero % 3],
+			horas_estimadas=float(numero % 40) + 0.5,
+			estado=estados[numero % len(estados)],
+			asignado_a=f"persona{numero % 25}",
+			categoria="backend" if numero % 2 else None,
+		)
+		for numero in range(1, cantidad + 1)
+	)
+
+
+def medir(funcion, *argumentos):
+	"""Mejor tiempo de `REPETICIONES` ejecuciones y el resultado de la última."""
+	mejor = float("inf")
+	resultado = None
+	for _ in range(REPETICIONES):
+		inicio = time.perf_counter()
+		resultado = funcion(*argumentos)
+		mejor = min(mejor, time.perf_counter() - inicio)
+	return mejor, resultado
+
+
+def main() -> None:
+	cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+	tareas = generar_tareas(cantidad)
+	print(f"Tareas: {cantidad}")
+
+	for proveedor in (PROVEEDOR_ESTANDAR, PROVEEDOR_ORJSON):
+		try:
+			codificador = crear_codificador_json(proveedor)
+		except ValueError:
+			print(f"{proveedor:>9}: no instalado")
+			continue
+		tiempo_codificar, datos = medir(codificador.codificar, tareas)
+		tiempo_decodificar, decodificadas = medir(codificador.decodificar, datos)
+		assert decodificadas == tareas
+		megabytes = len(datos) / (1024 * 1024)
+		print(
+			f"{proveedor:>9}: {megabytes:.1f} MB | "
+			f"codificar {tiempo_codificar * 1000:7.1f} ms ({megabytes / tiempo_codificar:6.1f} MB/s) | "
+			f"decodificar {tiempo_decodificar * 1000:7.1f} ms ({megabytes / tiempo_decodificar:6.1f} MB/s)"
+		)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,107 @@
+"""Benchmark: memoria por tarea residente en la caché.
+
+Compara la representación anterior de `Tarea` (clase con `__dict__` por
+instancia y sin internar cadenas) con la actual (`__slots__` + `sys.intern` de
+los campos de pocos valores distintos).
+
+Qué se mide:
+- Se genera un JSON con N tareas y se decodifica, como hace la carga real: cada
+  "pendiente" del archivo llega como una cadena distinta.
+- Se construyen las tareas y se descartan los diccionarios; con `tracemalloc`
+  se mide la memoria que queda retenida, dividida entre N.
+
+Uso:
+	python scripts/benchmark_memoria_tareas.py [N]
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modelos.tarea import Tarea  # noqa: E402
+
+
+class TareaConDiccionario:
+	"""Réplica de la `Tarea` anterior: atributos en `__dict__`, sin internar."""
+
+	def __init__(self, **campos: Any) -> None:
+		for campo, valor in campos.items():
+			setattr(self, campo, valor)
+
+	@staticmethod
+	def desde_diccionario(diccionario_tarea: dict[str, Any]) -> TareaConDiccionario:
+		return TareaConDiccionario(
+			identificador=str(diccionario_tarea["identificador"]),
+			titulo=str(diccionario_tarea["titulo"]),
+			descripcion=str(diccionario_tarea["descripcion"]),
+			prioridad=str(diccionario_tarea["prioridad"]),
+			horas_estimadas=float(diccionario_tarea["horas_estimadas"]),
+			estado=str(diccionario_tarea["estado"]),
+			asignado_a=str(diccionario_tarea["asignado_a"]),
+			categoria=diccionario_tarea.get("categoria"),
+			analisis_riesgo=diccionario_tarea.get("analisis_riesgo"),
+			mitigacion_riesgo=diccionario_tarea.get("mitigacion_riesgo"),
+		)
+
+
+def generar_json(cantidad: int) -> str:
+	"""JSON con `cantidad` tareas de valores repetidos en los campos de baja cardinalidad."""
+	estados = ("pendiente", "en_progreso", "completada")
+	prioridades = ("baja", "media", "alta", "urgente")
+	return json.dumps(
+		[
+			{
+				"identificador": str(numero),
+				"titulo": f"Tarea {numero}",
+				"descripcion": f"Descripción de la tarea {numero}",
+				"prioridad": prioridades[numero % len(prioridades)],
+				"horas_estimadas": float(numero % 40),
+				"estado": estados[numero % len(estados)],
+				"asignado_a": f"persona{numero % 25}",
+				"categoria": "backend" if numero % 2 else "frontend",
+				"analisis_riesgo": None,
+				"mitigacion_riesgo": None,
+			}
+			for numero in range(1, cantidad + 1)
+		]
+	)
+
+
+def medir_bytes_por_tarea(texto: str, construir: Callable[[dict[str, Any]], Any]) -> float:
+	"""Memoria retenida por tarea tras construir todas y descartar los diccionarios."""
+	gc.collect()
+	tracemalloc.start()
+	inicial, _ = tracemalloc.get_traced_memory()
+	diccionarios = json.loads(texto)
+	cantidad = len(diccionarios)
+	tareas = [construir(diccionario) for diccionario in diccionarios]
+	del diccionarios
+	gc.collect()
+	final, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	del tareas
+	return (final - inicial) / cantidad
+
+
+def main() -> None:
+	cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+	texto = generar_json(cantidad)
+
+	antes = medir_bytes_por_tarea(texto, TareaConDiccionario.desde_diccionario)
+	despues = medir_bytes_por_tarea(texto, Tarea.desde_diccionario)
+
+	print(f"Tareas: {cantidad}")
+	print(f"Antes (__dict__, sin internar): {antes:8.1f} bytes/tarea")
+	print(f"Ahora (__slots__ + intern):     {despues:8.1f} bytes/tarea")
+	print(f"Ahorro: {100 * (1 - despues / antes):.1f} %")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,77 @@
+"""Servicio: agrupación de consultas idénticas en curso ("single-flight").
+
+Si llegan a la vez varias consultas iguales al proveedor de IA (un doble envío
+del frontend, o varios usuarios categorizando la misma tarea importada), solo la
+primera llama al proveedor; las demás esperan y reciben su mismo resultado o su
+misma excepción.
+
+Comportamiento:
+- Las consultas se identifican con la misma clave que la caché de respuestas
+	(ver servicios/cache_ia.py); la caché evita repetir consultas ya resueltas y
+	el agrupador, las que todavía están en curso.
+- La agrupación solo dura mientras la consulta está en curso: al terminar, la
+	siguiente consulta con esa clave vuelve a ejecutarse (o la resuelve la caché).
+- `obtener_metricas()` cuenta las consultas ejecutadas y las agrupadas (las que
+	no llegaron al proveedor por haber otra igual en curso).
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable
+
+
+class _ConsultaEnCurso:
+	"""Resultado compartido de una consulta que todavía no terminó."""
+
+	def __init__(self) -> None:
+		self.terminada = threading.Event()
+		self.resultado: Any = None
+		self.excepcion: BaseException | None = None
+
+
+class AgrupadorConsultas:
+	"""Ejecuta una sola vez las consultas con la misma clave que coinciden en el tiempo."""
+
+	def __init__(self) -> None:
+		self._en_curso: dict[str, _ConsultaEnCurso] = {}
+		self._cerrojo = threading.Lock()
+		self._metricas = {"ejecutadas": 0, "agrupadas": 0}
+
+	def ejecutar(self, clave: str, funcion: Callable[[], Any]) -> Any:
+		"""Resultado de `funcion()`, compartido con las llamadas concurrentes de igual clave.
+
+		Si `funcion` lanza una excepción, la reciben todas las llamadas agrupadas.
+		"""
+		with self._cerrojo:
+			consulta = self._en_curso.get(clave)
+			if consulta is None:
+				consulta = _ConsultaEnCurso()
+				self._en_curso[clave] = consulta
+				self._metricas["ejecutadas"] += 1
+				es_primera = True
+			else:
+				self._metricas["agrupadas"] += 1
+				es_primera = False
+
+		if not es_primera:
+			consulta.terminada.wait()
+			if consulta.excepcion is not None:
+				raise consulta.excepcion
+			return consulta.resultado
+
+		try:
+			consulta.resultado = funcion()
+		except BaseException as excepcion:
+			consulta.excepcion = excepcion
+			raise
+		finally:
+			with self._cerrojo:
+				del self._en_curso[clave]
+			consulta.terminada.set()
+		return consulta.resultado
+
+	def obtener_metricas(self) -> dict[str, int]:
+		"""Contadores actuales (copia), con las consultas en curso en este momento."""
+		with self._cerrojo:
+			return {**self._metricas, "en_curso": len(self._en_curso)}
@@ -0,0 +1,649 @@
+"""Servicio: almacenamiento de tareas en archivo JSON.
+
+Implementa `AlmacenamientoTareas` sobre `datos/tareas.json` (o TAREAS_JSON_PATH).
+
+Archivos:
+- `<archivo>`: snapshot con la lista de tareas (JSON legible con indentación).
+- `<archivo>.meta`: secuencia de la última mutación, último identificador asignado
+	y firma del snapshot al que corresponden. Al cargar, el contador se ajusta al
+	máximo identificador numérico presente, por si el JSON se editó a mano; si la
+	firma del snapshot ya no es la registrada (edición externa o corte entre
+	snapshot y metadatos), la secuencia avanza para que cambien versiones y ETag.
+- `<archivo>.lock`: archivo vacío sobre el que se toma el cerrojo entre procesos
+	(ver servicios/cerrojo_archivo.py).
+- `<archivo>.bitacora` (solo modo bitácora): una línea NDJSON compacta por mutación
+	con su número de secuencia: {"secuencia": 3, "operacion": "actualizar", "tarea": {...}}.
+
+Modo completo (por defecto):
+- Cada mutación reescribe metadatos y snapshot.
+
+Modo bitácora (TAREAS_MODO_ESCRITURA=bitacora):
+- Cada mutación agrega una línea a la bitácora (costo independiente del número de tareas).
+- La lectura reproduce la bitácora sobre el snapshot. Si solo se agregaron líneas
+	nuevas, se reproduce únicamente el tramo nuevo.
+- Cuando la bitácora supera TAREAS_BITACORA_LIMITE_BYTES se compacta en segundo plano:
+	se escribe un snapshot nuevo y la bitácora conserva solo lo agregado después.
+- Los registros contienen la tarea completa, por lo que reproducirlos dos veces
+	(por ejemplo tras un corte durante la compactación) da el mismo resultado.
+
+Concurrencia entre procesos:
+- Las lecturas toman el cerrojo compartido y las escrituras el exclusivo, así que
+	varios workers pueden leer a la vez y nunca se pisan dos escrituras.
+- Todo archivo reemplazado se escribe en un temporal, se sincroniza con
+	`os.fsync` y se publica con `os.replace`; después se sincroniza el directorio.
+	Las líneas de la bitácora también se sincronizan antes de confirmar.
+
+Lectura y escritura en streaming:
+- El snapshot se decodifica por bloques con `iterar_tareas_json()`: en memoria
+	solo conviven el bloque leído y las `Tarea` ya construidas (ni el texto completo
+	ni la lista de diccionarios intermedia).
+- El snapshot se escribe tarea por tarea en un archivo temporal del mismo
+	directorio que luego reemplaza al original con `os.replace` (atómico): un
+	lector nunca ve un snapshot a medio escribir.
+- Cada tarea se toma de la caché de fragmentos de `EstadoTareas` (formatos
+	`FORMATO_LEGIBLE` para el snapshot y compacto para la bitácora): reescribir el
+	snapshot solo vuelve a codificar las tareas que cambiaron.
+
+Notas:
+- Si el JSON está vacío o es inválido, se considera una lista vacía sin romper la app.
+- Los elementos o registros mal formados se ignoran.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Hashable, Iterable, Iterator, TextIO
+
+from modelos.tarea import Tarea
+from servicios.cerrojo_archivo import CerrojoArchivo
+from servicios.codificador_json import obtener_codificador_json
+from servicios.escritura_atomica import reemplazar_archivo
+from servicios.almacenamiento_tareas import (
+	AlmacenamientoTareas,
+	ConflictoEscrituraConcurrente,
+	EstadoTareas,
+	Mutacion,
+	indexar_tareas,
+	obtener_identificador_numerico,
+)
+
+
+MODO_ESCRITURA_COMPLETO = "completo"
+MODO_ESCRITURA_BITACORA = "bitacora"
+LIMITE_BITACORA_BYTES_POR_DEFECTO = 1024 * 1024
+
+# Caracteres leídos por bloque al decodificar el snapshot.
+TAMANO_BLOQUE_LECTURA = 64 * 1024
+# Caracteres que se leen más allá de un error de decodificación antes de darlo
+# por definitivo. Un elemento solo cortado falla cerca del final del búfer (o al
+# inicio de una cadena sin cerrar), así que solo una cadena más larga que esto
+# podría tomarse por JSON inválido.
+MAXIMO_CARACTERES_TRAS_ERROR = 1024 * 1024
+# Tareas serializadas que se acumulan antes de cada escritura al archivo.
+TAREAS_POR_BLOQUE_ESCRITURA = 256
+# Formato de los fragmentos del snapshot en la caché de `EstadoTareas`.
+FORMATO_LEGIBLE = "legible"
+
+_ESPACIOS_JSON = " \t\n\r"
+
+# Codificadores reutilizados: crear uno por tarea domina el costo de serializar.
+_codificador_compacto = json.JSONEncoder(ensure_ascii=False)
+_codificador_legible = json.JSONEncoder(ensure_ascii=False, indent=4)
+
+
+# Firma de un archivo: (mtime en nanosegundos, tamaño en bytes, inodo).
+FirmaArchivo = tuple[int, int, int]
+
+
+def _obtener_firma_archivo(ruta_archivo: Path) -> FirmaArchivo | None:
+	"""Devuelve la firma actual del archivo o None si no existe."""
+	try:
+		estado_archivo = ruta_archivo.stat()
+	except FileNotFoundError:
+		return None
+	return (estado_archivo.st_mtime_ns, estado_archivo.st_size, estado_archivo.st_ino)
+
+
+def _convertir_registro_bitacora(registro: Any) -> Mutacion | None:
+	"""Mutación descrita por un registro de bitácora, o None si está mal formado."""
+	if not isinstance(registro, dict):
+		return None
+	try:
+		operacion = registro["operacion"]
+		secuencia = int(registro["secuencia"])
+		if operacion in ("crear", "actualizar"):
+			return Mutacion(secuencia, operacion, Tarea.desde_diccionario(registro["tarea"]))
+		if operacion == "eliminar":
+			return Mutacion(secuencia, operacion, str(registro["identificador"]))
+		return None
+	except (KeyError, TypeError, ValueError):
+		return None
+
+
+def _aplicar_registro_bitacora(estado: EstadoTareas, registro: Any) -> int | None:
+	"""Aplica un registro de bitácora sobre `estado` y devuelve su secuencia.
+
+	Los registros mal formados se ignoran (devuelve None), igual que los elementos
+	inválidos del snapshot.
+	"""
+	mutacion = _convertir_registro_bitacora(registro)
+	if mutacion is None:
+		return None
+	if isinstance(mutacion.objetivo, Tarea):
+		estado.guardar_tarea(mutacion.objetivo, version=mutacion.secuencia)
+	else:
+		estado.quitar_tarea(mutacion.objetivo)
+	return mutacion.secuencia
+
+
+def _iterar_elementos_lista_json(archivo: TextIO) -> Iterator[Any]:
+	"""Decodifica incrementalmente una lista JSON y devuelve sus elementos.
+
+	- Un archivo vacío equivale a una lista vacía.
+	- Si el contenido no es una lista JSON válida se lanza `json.JSONDecodeError`
+	  (posiblemente después de haber devuelto algunos elementos). Tras un error
+	  se lee a lo sumo `MAXIMO_CARACTERES_TRAS_ERROR` más, de modo que un archivo
+	  corrupto no se vuelve a decodificar bloque a bloque hasta el final.
+	"""
+	decodificador = json.JSONDecoder()
+	contenido = ""
+	posicion = 0
+	fin_archivo = False
+
+	def _leer_bloque() -> str:
+		# Se descarta lo ya consumido para que el búfer no crezca con el archivo.
+		nonlocal contenido, posicion, fin_archivo
+		bloque = archivo.read(TAMANO_BLOQUE_LECTURA)
+		fin_archivo = bloque == ""
+		contenido = contenido[posicion:] + bloque
+		posicion = 0
+		return bloque
+
+	def _siguiente_caracter() -> str:
+		# Salta espacios y devuelve el siguiente carácter significativo ("" al final).
+		nonlocal posicion
+		while True:
+			while posicion < len(contenido) and contenido[posicion] in _ESPACIOS_JSON:
+				posicion += 1
+			if posicion < len(contenido) or fin_archivo:
+				return contenido[posicion] if posicion < len(contenido) else ""
+			_leer_bloque()
+
+	caracter = _siguiente_caracter()
+	if caracter == "":
+		return
+	if caracter != "[":
+		raise json.JSONDecodeError("Se esperaba una lista", contenido, posicion)
+	posicion += 1
+
+	if _siguiente_caracter() == "]":
+		posicion += 1
+	else:
+		while True:
+			_siguiente_caracter()
+			# Un valor que llega justo al final del búfer puede estar cortado
+			# (por ejemplo un número): se lee otro bloque antes de aceptarlo.
+			while True:
+				try:
+					elemento, fin_elemento = decodificador.raw_decode(contenido, posicion)
+				except json.JSONDecodeError as error:
+					# Los elementos de la lista terminan en '}' o ']' (el último, en
+					# el ']' de la lista): reintentar antes de leer uno no sirve.
+					caracteres_tras_error = len(contenido) - error.pos
+					while not fin_archivo and caracteres_tras_error <= MAXIMO_CARACTERES_TRAS_ERROR:
+						bloque = _leer_bloque()
+						caracteres_tras_error += len(bloque)
+						if "}" in bloque or "]" in bloque:
+							break
+					else:
+						raise
+					continue
+				if fin_elemento < len(contenido) or fin_archivo:
+					break
+				_leer_bloque()
+			posicion = fin_elemento
+			yield elemento
+
+			caracter = _siguiente_caracter()
+			posicion += 1
+			if caracter == "]":
+				break
+			if caracter != ",":
+				raise json.JSONDecodeError("Se esperaba ',' o ']'", contenido, posicion - 1)
+
+	# Después de la lista solo se admiten espacios.
+	if _siguiente_caracter() != "":
+		raise json.JSONDecodeError("Contenido adicional tras la lista", contenido, posicion)
+
+
+def iterar_tareas_json(ruta_archivo: Path) -> Iterator[Tarea]:
+	"""Recorre las tareas de un snapshot JSON sin cargarlo completo en memoria.
+
+	- Los elementos que no son diccionarios o no forman una `Tarea` se ignoran.
+	- Si el archivo no existe no se devuelve nada.
+	- Si el JSON es inválido se lanza `ValueError` al llegar a la parte inválida.
+	"""
+	try:
+		archivo = ruta_archivo.open("r", encoding="utf-8")
+	except FileNotFoundError:
+		return
+	with archivo:
+		for elemento in _iterar_elementos_lista_json(archivo):
+			# Cada elemento debe ser un diccionario con los campos de la tarea.
+			if not isinstance(elemento, dict):
+				continue
+			try:
+				tarea = Tarea.desde_diccionario(elemento)
+			except (KeyError, TypeError, ValueError):
+				# Si algún elemento está mal formado, se ignora sin romper el proceso.
+				continue
+			yield tarea
+
+
+def _serializar_tarea_legible(diccionario_tarea: dict[str, Any]) -> str:
+	"""Texto de la tarea tal como aparece dentro de la lista indentada.
+
+	Los campos de una tarea son escalares, así que cada valor se codifica por
+	separado (cadenas con el codificador en C) en lugar de pasar por el
+	codificador indentado, que es Python puro.
+	"""
+	lineas: list[str] = []
+	for clave, valor in diccionario_tarea.items():
+		if isinstance(valor, str):
+			texto_valor = json.encoder.encode_basestring(valor)
+		elif valor is None:
+			texto_valor = "null"
+		elif isinstance(valor, (int, float)):
+			texto_valor = _codificador_compacto.encode(valor)
+		else:
+			# Valor anidado (poco habitual): se usa el codificador indentado completo.
+			return _codificador_legible.encode(diccionario_tarea).replace("\n", "\n    ")
+		lineas.append(f"        {json.encoder.encode_basestring(str(clave))}: {texto_valor}")
+	if not lineas:
+		return "{}"
+	return "{\n" + ",\n".join(lineas) + "\n    }"
+
+
+def codificar_tarea_legible(tarea: Tarea) -> bytes:
+	"""Fragmento de la tarea dentro del snapshot legible (UTF-8)."""
+	return _serializar_tarea_legible(tarea.a_diccionario()).encode("utf-8")
+
+
+def escribir_tareas_json(
+	archivo: BinaryIO,
+	tareas: Iterable[Tarea],
+	obtener_fragmento: Callable[[Tarea], bytes] = codificar_tarea_legible,
+) -> None:
+	"""Escribe las tareas como lista JSON legible (UTF-8), por bloques.
+
+	El resultado es idéntico a `json.dumps(lista, ensure_ascii=False, indent=4)`,
+	pero nunca se construye la lista de diccionarios ni el texto completo.
+	`obtener_fragmento` permite reutilizar fragmentos ya codificados (ver
+	`EstadoTareas.obtener_fragmento_json()`).
+	"""
+	bloque: list[bytes] = []
+	hay_tareas = False
+	for tarea in tareas:
+		# Cada tarea va indentada un nivel dentro de la lista.
+		bloque.append(b",\n    " if hay_tareas else b"[\n    ")
+		bloque.append(obtener_fragmento(tarea))
+		hay_tareas = True
+		if len(bloque) >= 2 * TAREAS_POR_BLOQUE_ESCRITURA:
+			archivo.write(b"".join(bloque))
+			bloque.clear()
+	bloque.append(b"\n]" if hay_tareas else b"[]")
+	archivo.write(b"".join(bloque))
+
+
+class AlmacenamientoJson(AlmacenamientoTareas):
+	"""Persistencia en archivo JSON, con modo bitácora opcional.
+
+	La firma es (firma del snapshot, firma de la bitácora). En la firma de la
+	bitácora el tamaño es lo ya consumido, para que una línea a medio escribir
+	por otro proceso se vuelva a leer en la siguiente consulta.
+	"""
+
+	def __init__(
+		self,
+		ruta_archivo_tareas: Path,
+		modo_bitacora: bool = False,
+		limite_bitacora_bytes: int = LIMITE_BITACORA_BYTES_POR_DEFECTO,
+	) -> None:
+		self.ruta_archivo_tareas = ruta_archivo_tareas
+		self.ruta_bitacora = ruta_archivo_tareas.with_name(ruta_archivo_tareas.name + ".bitacora")
+		self.ruta_metadatos = ruta_archivo_tareas.with_name(ruta_archivo_tareas.name + ".meta")
+		self.modo_bitacora = modo_bitacora
+		self.limite_bitacora_bytes = limite_bitacora_bytes
+		# Bytes de la bitácora ya reflejados en el estado en memoria.
+		self._desplazamiento_bitacora = 0
+		self._cerrojo = CerrojoArchivo(
+			ruta_archivo_tareas.with_name(ruta_archivo_tareas.name + ".lock")
+		)
+
+	def bloquear_lectura(self) -> Any:
+		"""Cerrojo compartido sobre `<archivo>.lock`."""
+		return self._cerrojo.compartido()
+
+	def bloquear_escritura(self) -> Any:
+		"""Cerrojo exclusivo sobre `<archivo>.lock`."""
+		return self._cerrojo.exclusivo()
+
+	def obtener_firma(self) -> Hashable:
+		"""Firma de snapshot y bitácora.
+
+		Si el archivo no existe, se crea con una lista vacía (comportamiento
+		histórico de `cargar_tareas()`).
+		"""
+		if not self.ruta_archivo_tareas.exists():
+			self.ruta_archivo_tareas.parent.mkdir(parents=True, exist_ok=True)
+			self.ruta_archivo_tareas.write_text("[]", encoding="utf-8")
+
+		firma_snapshot = _obtener_firma_archivo(self.ruta_archivo_tareas)
+		if not self.modo_bitacora:
+			return (firma_snapshot, None)
+		return (firma_snapshot, _obtener_firma_archivo(self.ruta_bitacora))
+
+	def _firma_consumida(self, firma: Any) -> Hashable:
+		"""Sustituye el tamaño de la bitácora por lo efectivamente consumido."""
+		firma_snapshot, firma_bitacora = firma
+		if firma_bitacora is None:
+			return (firma_snapshot, None)
+		return (
+			firma_snapshot,
+			(firma_bitacora[0], self._desplazamiento_bitacora, firma_bitacora[2]),
+		)
+
+	def cargar(self) -> EstadoTareas:
+		"""Lee snapshot, metadatos y (en modo bitácora) reproduce la bitácora."""
+		# La firma se toma ANTES de leer: si el archivo cambia durante la lectura,
+		# la firma guardada quedará desactualizada y se releerá en la próxima llamada.
+		firma = self.obtener_firma()
+
+		lista_tareas = self._leer_snapshot()
+		secuencia, ultimo_identificador, firma_registrada = self._leer_metadatos()
+		estado = EstadoTareas(
+			indexar_tareas(lista_tareas),
+			secuencia=secuencia,
+			ultimo_identificador=max(
+				[ultimo_identificador]
+				+ [obtener_identificador_numerico(tarea.identificador) for tarea in lista_tareas]
+			),
+		)
+
+		self._desplazamiento_bitacora = 0
+		if self.modo_bitacora and firma[1] is not None:
+			self._reproducir_bitacora(estado)
+		if firma_registrada != firma[0]:
+			if firma_registrada is not None:
+				# El snapshot no es el que escribimos: cualquier tarea pudo cambiar.
+				estado.fijar_secuencia_completa(estado.secuencia + 1)
+			# Se registra la firma para que los demás procesos (y las próximas
+			# cargas) obtengan la misma secuencia.
+			self._escribir_metadatos(estado.secuencia, estado.ultimo_identificador, firma[0])
+		estado.firma = self._firma_consumida(firma)
+		return estado
+
+	def refrescar(self, estado: EstadoTareas, firma_actual: Hashable) -> bool:
+		"""Si el snapshot no cambió y la bitácora solo creció, lee solo el tramo nuevo."""
+		if not self.modo_bitacora or estado.firma is None:
+			return False
+
+		firma_snapshot_anterior, firma_bitacora_anterior = estado.firma
+		firma_snapshot, firma_bitacora = firma_actual
+		if firma_snapshot != firma_snapshot_anterior or firma_bitacora is None:
+			return False
+		if firma_bitacora_anterior is None:
+			# La bitácora no existía: solo es continuación si no se había consumido nada.
+			if self._desplazamiento_bitacora != 0:
+				return False
+		elif firma_bitacora_anterior[2] != firma_bitacora[2]:
+			return False
+		if firma_bitacora[1] < self._desplazamiento_bitacora:
+			return False
+
+		self._reproducir_bitacora(estado)
+		estado.firma = self._firma_consumida(firma_actual)
+		return True
+
+	def _leer_snapshot(self) -> list[Tarea]:
+		"""Decodifica el snapshot en streaming, tolerando contenido vacío o inválido."""
+		try:
+			return list(iterar_tareas_json(self.ruta_archivo_tareas))
+		except ValueError:
+			# JSON inválido (o no es una lista): se considera vacío, como siempre.
+			return []
+
+	def _leer_metadatos(self) -> tuple[int, int, FirmaArchivo | None]:
+		"""Devuelve (secuencia, ultimo_identificador, firma del snapshot) registrados.
+
+		Si el archivo no existe o es inválido, los valores son 0, 0 y None. La
+		firma también es None en metadatos de versiones anteriores.
+		"""
+		try:
+			metadatos = obtener_codificador_json().decodificar(self.ruta_metadatos.read_bytes())
+			firma_snapshot = metadatos.get("firma_snapshot")
+			return (
+				int(metadatos.get("secuencia", 0)),
+				int(metadatos.get("ultimo_identificador", 0)),
+				tuple(int(valor) for valor in firma_snapshot) if firma_snapshot else None,
+			)
+		except (FileNotFoundError, AttributeError, TypeError, ValueError):
+			# `ValueError` incluye JSON y UTF-8 inválidos.
+			return 0, 0, None
+
+	def _escribir_metadatos(
+		self, secuencia: int, ultimo_identificador: int, firma_snapshot: FirmaArchivo | None
+	) -> None:
+		"""Guarda secuencia, contador de identificadores y firma del snapshot (reemplazo atómico)."""
+		contenido = obtener_codificador_json().codificar(
+			{
+				"secuencia": secuencia,
+				"ultimo_identificador": ultimo_identificador,
+				"firma_snapshot": firma_snapshot,
+			}
+		)
+		reemplazar_archivo(self.ruta_metadatos, lambda archivo: archivo.write(contenido))
+
+	def _reproducir_bitacora(self, estado: EstadoTareas) -> None:
+		"""Aplica sobre el estado las líneas completas posteriores al desplazamiento."""
+		try:
+			with self.ruta_bitacora.open("rb") as archivo_bitacora:
+				archivo_bitacora.seek(self._desplazamiento_bitacora)
+				contenido_nuevo = archivo_bitacora.read()
+		except FileNotFoundError:
+			return
+
+		decodificar = obtener_codificador_json().decodificar
+		# Solo se consumen líneas terminadas en salto de línea.
+		fin_ultima_linea = contenido_nuevo.rfind(b"\n") + 1
+		for linea in contenido_nuevo[:fin_ultima_linea].splitlines():
+			if linea.strip() == b"":
+				continue
+			try:
+				registro = decodificar(linea)
+			except ValueError:
+				# JSON o UTF-8 inválido (`UnicodeDecodeError` es un `ValueError`).
+				continue
+			secuencia = _aplicar_registro_bitacora(estado, registro)
+			if secuencia is None:
+				continue
+			estado.secuencia = max(estado.secuencia, secuencia)
+			if registro["operacion"] == "crear":
+				estado.ultimo_identificador = max(
+					estado.ultimo_identificador,
+					obtener_identificador_numerico(registro["tarea"]["identificador"]),
+				)
+		self._desplazamiento_bitacora += fin_ultima_linea
+
+	@staticmethod
+	def _escribir_snapshot(
+		ruta_archivo: Path, lista_tareas: Iterable[Tarea], estado: EstadoTareas | None = None
+	) -> None:
+		"""Escribe el snapshot JSON legible con las tareas recibidas (reemplazo atómico).
+
+		Con `estado`, las tareas se toman de su caché de fragmentos: solo se
+		codifican las que cambiaron desde el snapshot anterior.
+		"""
+		obtener_fragmento = codificar_tarea_legible
+		if estado is not None:
+
+			def obtener_fragmento(tarea: Tarea) -> bytes:
+				return estado.obtener_fragmento_json(tarea, FORMATO_LEGIBLE, codificar_tarea_legible)
+
+		def _escribir(archivo_binario: Any) -> None:
+			# Guardamos JSON legible (indentación) y con caracteres Unicode intactos.
+			# El archivo lo cierra `reemplazar_archivo`.
+			escribir_tareas_json(archivo_binario, lista_tareas, obtener_fragmento)
+
+		reemplazar_archivo(ruta_archivo, _escribir)
+
+	def persistir_mutaciones(self, estado: EstadoTareas, mutaciones: list[Mutacion]) -> None:
+		"""Reescribe el snapshot una vez (modo completo) o agrega las líneas (modo bitácora).
+
+		En modo bitácora todas las líneas del lote se agregan con una sola
+		escritura y un solo `fsync`.
+		"""
+		firma_actual = self.obtener_firma()
+		if estado.firma is None or firma_actual[0] != estado.firma[0]:
+			raise ConflictoEscrituraConcurrente("El snapshot cambió desde la última lectura")
+
+		if not self.modo_bitacora:
+			# Los metadatos se escriben después del snapshot porque registran su
+			# firma: si se corta en medio, la próxima carga avanza la secuencia.
+			self._escribir_snapshot(self.ruta_archivo_tareas, estado.tareas.values(), estado)
+			estado.firma = self.obtener_firma()
+			self._escribir_metadatos(estado.secuencia, estado.ultimo_identificador, estado.firma[0])
+			return
+
+		tamano_bitacora = firma_actual[1][1] if firma_actual[1] is not None else 0
+		if tamano_bitacora != self._desplazamiento_bitacora:
+			raise ConflictoEscrituraConcurrente("La bitácora creció desde la última lectura")
+
+		lineas: list[bytes] = []
+		codificar = obtener_codificador_json().codificar
+		for mutacion in mutaciones:
+			# Misma línea que codificar el registro completo, pero la tarea se toma
+			# de la caché de fragmentos (que luego reutiliza GET /tareas).
+			if isinstance(mutacion.objetivo, Tarea):
+				cuerpo = b'"tarea":' + estado.obtener_fragmento_json(mutacion.objetivo)
+			else:
+				cuerpo = b'"identificador":' + codificar(mutacion.objetivo)
+			cabecera = (
+				b'{"secuencia":' + codificar(mutacion.secuencia)
+				+ b',"operacion":' + codificar(mutacion.operacion) + b","
+			)
+			lineas.append(cabecera + cuerpo + b"}\n")
+		linea = b"".join(lineas)
+
+		with self.ruta_bitacora.open("ab") as archivo_bitacora:
+			archivo_bitacora.write(linea)
+			archivo_bitacora.flush()
+			os.fsync(archivo_bitacora.fileno())
+
+		firma_nueva = self.obtener_firma()
+		desplazamiento_esperado = self._desplazamiento_bitacora + len(linea)
+		if firma_nueva[1] is not None and firma_nueva[1][1] == desplazamiento_esperado:
+			self._desplazamiento_bitacora = desplazamiento_esperado
+			estado.firma = firma_nueva
+		else:
+			# Otro proceso escribió en paralelo: la siguiente lectura recarga todo.
+			estado.firma = None
+
+	def persistir_todo(self, estado: EstadoTareas) -> None:
+		"""Escribe snapshot y metadatos; en modo bitácora, la bitácora se vacía."""
+		self._escribir_snapshot(self.ruta_archivo_tareas, estado.tareas.values(), estado)
+		if self.modo_bitacora:
+			self.ruta_bitacora.unlink(missing_ok=True)
+		self._desplazamiento_bitacora = 0
+		estado.firma = self.obtener_firma()
+		self._escribir_metadatos(estado.secuencia, estado.ultimo_identificador, estado.firma[0])
+
+	def leer_mutaciones_desde(self, desde: int, hasta: int) -> list[Mutacion] | None:
+		"""Mutaciones (desde, hasta] leídas de la bitácora (solo modo bitácora).
+
+		Devuelve None si la bitácora no las contiene todas (por ejemplo, porque
+		una compactación ya las incorporó al snapshot).
+		"""
+		if not self.modo_bitacora:
+			return None
+		try:
+			contenido = self.ruta_bitacora.read_bytes()
+		except FileNotFoundError:
+			contenido = b""
+
+		decodificar = obtener_codificador_json().decodificar
+		mutaciones_por_secuencia: dict[int, Mutacion] = {}
+		# Solo líneas completas; tras un corte durante la compactación una secuencia
+		# puede repetirse con el mismo contenido.
+		for linea in contenido[: contenido.rfind(b"\n") + 1].splitlines():
+			try:
+				mutacion = _convertir_registro_bitacora(decodificar(linea))
+			except ValueError:
+				continue
+			if mutacion is not None and desde < mutacion.secuencia <= hasta:
+				mutaciones_por_secuencia[mutacion.secuencia] = mutacion
+
+		if sorted(mutaciones_por_secuencia) != list(range(desde + 1, hasta + 1)):
+			return None
+		return [mutaciones_por_secuencia[secuencia] for secuencia in range(desde + 1, hasta + 1)]
+
+	def requiere_compactacion(self) -> bool:
+		"""La bitácora superó el límite configurado."""
+		return self.modo_bitacora and self._desplazamiento_bitacora > self.limite_bitacora_bytes
+
+	def preparar_compactacion(self, estado: EstadoTareas) -> Any:
+		"""Captura el estado vigente y la posición de la bitácora que lo incluye."""
+		return {
+			"tareas": list(estado.tareas.values()),
+			# Los fragmentos se validan por identidad de la tarea, así que se pueden
+			# consultar fuera del cerrojo aunque el estado siga cambiando.
+			"estado": estado,
+			"secuencia": estado.secuencia,
+			"ultimo_identificador": estado.ultimo_identificador,
+			"desplazamiento_bitacora": self._desplazamiento_bitacora,
+			"firma_snapshot": estado.firma[0] if estado.firma is not None else None,
+			# Nombre propio del proceso: dos procesos pueden compactar a la vez.
+			"ruta_temporal": self.ruta_archivo_tareas.with_name(
+				f"{self.ruta_archivo_tareas.name}.compactacion.{os.getpid()}.tmp"
+			),
+		}
+
+	def escribir_compactacion(self, captura: Any) -> None:
+		"""Serializa el snapshot capturado en un archivo temporal."""
+		self._escribir_snapshot(captura["ruta_temporal"], captura["tareas"], captura["estado"])
+
+	def finalizar_compactacion(self, estado: EstadoTareas, captura: Any) -> None:
+		"""Publica el snapshot nuevo y recorta la bitácora ya incorporada.
+
+		Las mutaciones llegadas mientras se serializaba se conservan en la cola.
+		"""
+		ruta_temporal: Path = captura["ruta_temporal"]
+		if estado.firma is None or estado.firma[0] != captura["firma_snapshot"]:
+			# El snapshot fue reemplazado mientras tanto (p. ej. por guardar_tareas).
+			ruta_temporal.unlink(missing_ok=True)
+			return
+
+		# Orden seguro ante cortes: snapshot, metadatos y por último la bitácora.
+		# Si se interrumpe antes de recortar, reproducir de nuevo es idempotente.
+		# (El directorio se sincroniza al reemplazar los metadatos.)
+		os.replace(ruta_temporal, self.ruta_archivo_tareas)
+		self._escribir_metadatos(
+			captura["secuencia"],
+			captura["ultimo_identificador"],
+			_obtener_firma_archivo(self.ruta_archivo_tareas),
+		)
+
+		try:
+			with self.ruta_bitacora.open("rb") as archivo_bitacora:
+				archivo_bitacora.seek(captura["desplazamiento_bitacora"])
+				cola_bitacora = archivo_bitacora.read()
+		except FileNotFoundError:
+			cola_bitacora = b""
+		reemplazar_archivo(self.ruta_bitacora, lambda archivo: archivo.write(cola_bitacora))
+
+		# Lo ya aplicado de la cola se mantiene aplicado; una posible línea a medio
+		# escribir queda después del desplazamiento y se leerá más adelante.
+		self._desplazamiento_bitacora -= captura["desplazamiento_bitacora"]
+		estado.firma = self._firma_consumida(self.obtener_firma())
@@ -0,0 +1,303 @@
+"""Servicio: almacenamiento de tareas en SQLite.
+
+Implementa `AlmacenamientoTareas` sobre una base SQLite (TAREAS_ALMACENAMIENTO=sqlite).
+
+Esquema:
+- `tareas`: una fila por tarea. `posicion` conserva el orden de creación e
+	`identificador` es único. Hay índices sobre las columnas filtrables
+	(`estado`, `prioridad`, `asignado_a`, `categoria`).
+- `metadatos`: pares clave/valor con `secuencia`, `ultimo_identificador` y la
+	marca `migrado_desde_json`.
+
+Comportamiento:
+- Se usa modo WAL: los lectores no bloquean al escritor ni viceversa. Con
+	`synchronous=FULL`, cada transacción confirmada sobrevive a un corte de energía.
+- Cada mutación es un upsert o delete de UNA fila; las mutaciones de un mismo
+	lote y la actualización de metadatos van en una sola transacción.
+- La firma es el valor de `secuencia`, que toda escritura incrementa.
+- No usa cerrojos de archivo propios: SQLite ya serializa a los escritores
+	(BEGIN IMMEDIATE) y una escritura basada en datos desactualizados se detecta
+	por la secuencia y se reintenta.
+- La primera vez que se abre la base se migran las tareas de `datos/tareas.json`
+	(o TAREAS_JSON_PATH) si el archivo existe. La migración ocurre una sola vez.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Hashable
+
+from modelos.tarea import Tarea
+from servicios.almacenamiento_json import AlmacenamientoJson
+from servicios.almacenamiento_tareas import (
+	AlmacenamientoTareas,
+	ConflictoEscrituraConcurrente,
+	EstadoTareas,
+	Mutacion,
+	indexar_tareas,
+	obtener_identificador_numerico,
+)
+
+
+COLUMNAS_TAREA = [
+	"identificador",
+	"titulo",
+	"descripcion",
+	"prioridad",
+	"horas_estimadas",
+	"estado",
+	"asignado_a",
+	"categoria",
+	"analisis_riesgo",
+	"mitigacion_riesgo",
+]
+
+SENTENCIAS_ESQUEMA = [
+	"""
+	CREATE TABLE IF NOT EXISTS tareas (
+		posicion INTEGER PRIMARY KEY,
+		identificador TEXT NOT NULL UNIQUE,
+		titulo TEXT,
+		descripcion TEXT,
+		prioridad TEXT,
+		horas_estimadas REAL,
+		estado TEXT,
+		asignado_a TEXT,
+		categoria TEXT,
+		analisis_riesgo TEXT,
+		mitigacion_riesgo TEXT
+	)
+	""",
+	"CREATE INDEX IF NOT EXISTS indice_tareas_estado ON tareas (estado)",
+	"CREATE INDEX IF NOT EXISTS indice_tareas_prioridad ON tareas (prioridad)",
+	"CREATE INDEX IF NOT EXISTS indice_tareas_asignado_a ON tareas (asignado_a)",
+	"CREATE INDEX IF NOT EXISTS indice_tareas_categoria ON tareas (categoria)",
+	"""
+	CREATE TABLE IF NOT EXISTS metadatos (
+		clave TEXT PRIMARY KEY,
+		valor INTEGER NOT NULL
+	)
+	""",
+]
+
+SENTENCIA_UPSERT_TAREA = (
+	"INSERT INTO tareas ("
+	+ ", ".join(COLUMNAS_TAREA)
+	+ ") VALUES ("
+	+ ", ".join("?" for _ in COLUMNAS_TAREA)
+	+ ") ON CONFLICT (identificador) DO UPDATE SET "
+	+ ", ".join(f"{columna} = excluded.{columna}" for columna in COLUMNAS_TAREA[1:])
+)
+
+SENTENCIA_GUARDAR_METADATO = (
+	"INSERT INTO metadatos (clave, valor) VALUES (?, ?) "
+	"ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor"
+)
+
+
+def _convertir_a_columna(valor: Any) -> Any:
+	"""Adapta un valor del modelo a un tipo que SQLite puede guardar.
+
+	Los valores no escalares se guardan como texto, igual que los convierte
+	`Tarea.desde_diccionario()` al recargar.
+	"""
+	if valor is None or isinstance(valor, (str, int, float)):
+		return valor
+	return str(valor)
+
+
+def _convertir_tarea_a_fila(tarea: Tarea) -> list[Any]:
+	"""Valores de la tarea en el orden de `COLUMNAS_TAREA`."""
+	diccionario_tarea = tarea.a_diccionario()
+	return [_convertir_a_columna(diccionario_tarea[columna]) for columna in COLUMNAS_TAREA]
+
+
+class AlmacenamientoSqlite(AlmacenamientoTareas):
+	"""Persistencia en SQLite con escrituras por fila.
+
+	Usa una única conexión compartida entre hilos (`check_same_thread=False`).
+	Cada método la usa con `_cerrojo_conexion` adquirido, así que la transacción
+	de un hilo nunca se mezcla con la de otro. `GestorTareas` persiste sin retener
+	su cerrojo de caché y, mientras un hilo escribe, los demás leen de la caché
+	sin tocar la base. Este cerrojo no depende de ese protocolo.
+	"""
+
+	def __init__(self, ruta_base_datos: Path, ruta_json_migracion: Path | None = None) -> None:
+		self.ruta_base_datos = ruta_base_datos
+		self.ruta_json_migracion = ruta_json_migracion
+		self._conexion: sqlite3.Connection | None = None
+		# Una sola conexión para todos los hilos: cada uso la toma con este cerrojo.
+		self._cerrojo_conexion = threading.RLock()
+
+	def _obtener_conexion(self) -> sqlite3.Connection:
+		"""Abre la conexión, crea el esquema y migra desde JSON la primera vez."""
+		with self._cerrojo_conexion:
+			if self._conexion is not None:
+				return self._conexion
+
+			self.ruta_base_datos.parent.mkdir(parents=True, exist_ok=True)
+			# isolation_level=None: las transacciones se abren explícitamente con BEGIN.
+			conexion = sqlite3.connect(
+				str(self.ruta_base_datos), check_same_thread=False, isolation_level=None
+			)
+			conexion.execute("PRAGMA journal_mode=WAL")
+			# FULL: en WAL, NORMAL puede perder los últimos commits ante un corte de
+			# energía; aquí cada escritura confirmada debe ser duradera (como el fsync
+			# del almacenamiento JSON y la escritura agrupada).
+			conexion.execute("PRAGMA synchronous=FULL")
+			for sentencia in SENTENCIAS_ESQUEMA:
+				conexion.execute(sentencia)
+
+			self._conexion = conexion
+			self._migrar_desde_json_si_corresponde()
+			return conexion
+
+	def cerrar(self) -> None:
+		"""Cierra la conexión (se reabre automáticamente en el siguiente uso)."""
+		with self._cerrojo_conexion:
+			if self._conexion is not None:
+				self._conexion.close()
+				self._conexion = None
+
+	@staticmethod
+	def _leer_metadato(conexion: sqlite3.Connection, clave: str) -> int | None:
+		fila = conexion.execute("SELECT valor FROM metadatos WHERE clave = ?", (clave,)).fetchone()
+		return int(fila[0]) if fila is not None else None
+
+	@staticmethod
+	def _guardar_metadatos(conexion: sqlite3.Connection, estado: EstadoTareas) -> None:
+		conexion.executemany(
+			SENTENCIA_GUARDAR_METADATO,
+			[
+				("secuencia", estado.secuencia),
+				("ultimo_identificador", estado.ultimo_identificador),
+			],
+		)
+
+	def _migrar_desde_json_si_corresponde(self) -> None:
+		"""Importa una única vez las tareas del JSON configurado.
+
+		La comprobación se repite dentro de la transacción para que, con varios
+		procesos arrancando a la vez, solo uno migre.
+		"""
+		conexion = self._obtener_conexion()
+		if self._leer_metadato(conexion, "migrado_desde_json") is not None:
+			return
+
+		estado_json: EstadoTareas | None = None
+		ruta_json = self.ruta_json_migracion
+		if ruta_json is not None and ruta_json.exists():
+			almacenamiento_json = AlmacenamientoJson(
+				ruta_json,
+				modo_bitacora=ruta_json.with_name(ruta_json.name + ".bitacora").exists(),
+			)
+			estado_json = almacenamiento_json.cargar()
+
+		conexion.execute("BEGIN IMMEDIATE")
+		try:
+			if self._leer_metadato(conexion, "migrado_desde_json") is None:
+				hay_tareas = conexion.execute("SELECT 1 FROM tareas LIMIT 1").fetchone()
+				if estado_json is not None and hay_tareas is None:
+					conexion.executemany(
+						SENTENCIA_UPSERT_TAREA,
+						[_convertir_tarea_a_fila(tarea) for tarea in estado_json.tareas.values()],
+					)
+					self._guardar_metadatos(conexion, estado_json)
+				conexion.execute(SENTENCIA_GUARDAR_METADATO, ("migrado_desde_json", 1))
+			conexion.execute("COMMIT")
+		except BaseException:
+			conexion.execute("ROLLBACK")
+			raise
+
+	def obtener_firma(self) -> Hashable:
+		"""La secuencia persistida; cambia con cada escritura de cualquier proceso."""
+		with self._cerrojo_conexion:
+			conexion = self._obtener_conexion()
+			return (self._leer_metadato(conexion, "secuencia") or 0,)
+
+	def cargar(self) -> EstadoTareas:
+		"""Lee todas las filas en orden de creación dentro de una transacción de lectura."""
+		with self._cerrojo_conexion:
+			conexion = self._obtener_conexion()
+			conexion.execute("BEGIN")
+			try:
+				secuencia = self._leer_metadato(conexion, "secuencia") or 0
+				ultimo_identificador = self._leer_metadato(conexion, "ultimo_identificador") or 0
+				filas = conexion.execute(
+					"SELECT " + ", ".join(COLUMNAS_TAREA) + " FROM tareas ORDER BY posicion"
+				).fetchall()
+			finally:
+				conexion.execute("COMMIT")
+
+		# Igual que en JSON: las filas incompletas se ignoran.
+		lista_tareas = Tarea.desde_lista(
+			(
+				{
+					columna: valor
+					for columna, valor in zip(COLUMNAS_TAREA, fila)
+					if valor is not None
+				}
+				for fila in filas
+			),
+			omitir_invalidas=True,
+		)
+
+		estado = EstadoTareas(
+			indexar_tareas(lista_tareas),
+			secuencia=secuencia,
+			ultimo_identificador=max(
+				[ultimo_identificador]
+				+ [obtener_identificador_numerico(tarea.identificador) for tarea in lista_tareas]
+			),
+		)
+		estado.firma = (secuencia,)
+		return estado
+
+	def persistir_mutaciones(self, estado: EstadoTareas, mutaciones: list[Mutacion]) -> None:
+		"""Upserts o deletes por fila y actualización de metadatos en una transacción."""
+		with self._cerrojo_conexion:
+			conexion = self._obtener_conexion()
+			conexion.execute("BEGIN IMMEDIATE")
+			try:
+				secuencia_persistida = self._leer_metadato(conexion, "secuencia") or 0
+				if secuencia_persistida != mutaciones[0].secuencia - 1:
+					raise ConflictoEscrituraConcurrente("La base cambió desde la última lectura")
+
+				for mutacion in mutaciones:
+					if isinstance(mutacion.objetivo, Tarea):
+						conexion.execute(SENTENCIA_UPSERT_TAREA, _convertir_tarea_a_fila(mutacion.objetivo))
+					else:
+						conexion.execute(
+							"DELETE FROM tareas WHERE identificador = ?", (mutacion.objetivo,)
+						)
+				self._guardar_metadatos(conexion, estado)
+				conexion.execute("COMMIT")
+			except BaseException:
+				conexion.execute("ROLLBACK")
+				raise
+			estado.firma = (estado.secuencia,)
+
+	def persistir_todo(self, estado: EstadoTareas) -> None:
+		"""Reemplaza todas las filas por las del estado en una transacción."""
+		with self._cerrojo_conexion:
+			conexion = self._obtener_conexion()
+			conexion.execute("BEGIN IMMEDIATE")
+			try:
+				# La secuencia nunca retrocede, aunque otro proceso haya escrito antes. Las
+				# versiones de las tareas (ETag) siguen a la secuencia definitiva.
+				secuencia_persistida = self._leer_metadato(conexion, "secuencia") or 0
+				estado.fijar_secuencia_completa(max(estado.secuencia, secuencia_persistida + 1))
+
+				conexion.execute("DELETE FROM tareas")
+				conexion.executemany(
+					SENTENCIA_UPSERT_TAREA,
+					[_convertir_tarea_a_fila(tarea) for tarea in estado.tareas.values()],
+				)
+				self._guardar_metadatos(conexion, estado)
+				conexion.execute("COMMIT")
+			except BaseException:
+				conexion.execute("ROLLBACK")
+				raise
+			estado.firma = (estado.secuencia,)
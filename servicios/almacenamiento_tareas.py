@@ -0,0 +1,428 @@
+"""Servicio: interfaz de almacenamiento de tareas.
+
+`GestorTareas` conserva las tareas en una caché en memoria y delega la
+persistencia en un almacenamiento intercambiable:
+
+- `AlmacenamientoJson` (servicios/almacenamiento_json.py): archivo JSON, con
+	modo bitácora opcional.
+- `AlmacenamientoSqlite` (servicios/almacenamiento_sqlite.py): base de datos SQLite.
+
+Contrato de un almacenamiento:
+- `obtener_firma()`: valor barato de calcular que cambia cuando cambian los datos
+	persistidos (también si los cambia otro proceso).
+- `cargar()`: lectura completa; devuelve un `EstadoTareas`.
+- `refrescar(estado, firma_actual)`: intento opcional de ponerse al día sin lectura completa.
+- `persistir_mutaciones(estado, mutaciones)`: guarda una o varias mutaciones ya
+	aplicadas sobre `estado`, en una sola escritura. `estado` es el borrador del
+	lote (`BorradorEstado`): el estado en caché recién cambia tras persistir.
+- `persistir_todo(estado)`: reemplaza todo lo persistido por `estado`.
+- `leer_mutaciones_desde(desde, hasta)` (opcional): mutaciones ya persistidas,
+	para el registro de cambios (GET /tareas/cambios).
+
+- `bloquear_lectura()` / `bloquear_escritura()`: cerrojos entre procesos. Las
+	lecturas se hacen con el compartido; cada lectura-modificación-escritura
+	completa, con el exclusivo.
+
+Fragmentos JSON:
+- `EstadoTareas` guarda, por tarea, su JSON ya codificado (bytes) en cada
+	formato pedido. Un fragmento solo se invalida cuando esa tarea cambia, así que
+	el listado (GET /tareas), la bitácora y los snapshots se arman concatenando
+	fragmentos en lugar de volver a codificar todas las tareas.
+
+Tras escribir, el almacenamiento actualiza `estado.firma` para que la propia
+escritura no invalide la caché. Si aun así detecta que otro proceso escribió
+después de cargar `estado` (por ejemplo, alguien que no respeta el cerrojo),
+lanza `ConflictoEscrituraConcurrente` sin persistir nada y `GestorTareas`
+recarga y reintenta la operación.
+
+Variables de entorno:
+- TAREAS_ALMACENAMIENTO (opcional): "json" (por defecto) o "sqlite".
+- TAREAS_SQLITE_PATH (opcional): ruta de la base SQLite. Por defecto se usa la
+	ruta del JSON con extensión `.sqlite3` (por ejemplo datos/tareas.sqlite3).
+"""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Hashable, Iterator, Mapping
+
+from modelos.tarea import Tarea
+from servicios.busqueda_tareas import IndiceBusqueda
+from servicios.codificador_json import obtener_codificador_json
+from servicios.estadisticas_tareas import EstadisticasTareas
+from servicios.estimador_horas import EstimadorHoras
+from servicios.indices_tareas import IndicesTareas
+
+
+ALMACENAMIENTO_JSON = "json"
+ALMACENAMIENTO_SQLITE = "sqlite"
+
+# Formato de fragmento compartido por la API y la bitácora: JSON compacto UTF-8
+# del codificador configurado (ver servicios/codificador_json.py).
+FORMATO_COMPACTO = "compacto"
+
+
+def codificar_tarea_compacta(tarea: Tarea) -> bytes:
+	"""JSON compacto (UTF-8) de la tarea, con los campos en el orden del modelo."""
+	return obtener_codificador_json().codificar(tarea.a_diccionario())
+
+
+class ConflictoEscrituraConcurrente(RuntimeError):
+	"""El estado en memoria quedó desactualizado frente a otra escritura."""
+
+
+class EstadoTareas:
+	"""Estado completo de las tareas en memoria.
+
+	- `tareas` conserva el orden de inserción y está indexado por identificador.
+	- `secuencia` es el número de la última mutación persistida. Crece con cada
+	  escritura, así que sirve como versión del conjunto de tareas.
+	- `ultimo_identificador` es el contador monótono usado por `GestorTareas.crear()`.
+	- `firma` es la firma del almacenamiento con la que coincide este estado.
+
+	Las tareas se modifican con `guardar_tarea()` y `quitar_tarea()` para que los
+	índices secundarios y de búsqueda, las estadísticas (si ya se construyeron) y
+	los fragmentos JSON
+	(`obtener_fragmento_json()`) se mantengan al día.
+	"""
+
+	def __init__(
+		self,
+		tareas: dict[str, Tarea],
+		secuencia: int = 0,
+		ultimo_identificador: int = 0,
+	) -> None:
+		self.tareas = tareas
+		self.secuencia = secuencia
+		self.ultimo_identificador = ultimo_identificador
+		self.firma: Hashable | None = None
+		self._indices: IndicesTareas | None = None
+		self._indice_busqueda: IndiceBusqueda | None = None
+		self._estadisticas: EstadisticasTareas | None = None
+		self._estimador_horas: EstimadorHoras | None = None
+		# Versión de cada tarea: secuencia de la última mutación que la tocó. Las
+		# tareas leídas en una carga completa tienen la versión de esa carga.
+		self.version_base = secuencia
+		self._versiones_tareas: dict[str, int] = {}
+		# formato -> identificador -> (tarea codificada, fragmento). Se guarda la
+		# tarea para validar por identidad: un fragmento calculado fuera del
+		# cerrojo nunca se sirve para una versión posterior de la tarea.
+		self._fragmentos: dict[str, dict[str, tuple[Tarea, bytes]]] = {}
+
+	@property
+	def indices(self) -> IndicesTareas:
+		"""Índices secundarios; se construyen en la primera consulta que los usa."""
+		if self._indices is None:
+			self._indices = IndicesTareas(self.tareas)
+		return self._indices
+
+	@property
+	def indice_busqueda(self) -> IndiceBusqueda:
+		"""Índice de texto completo; se construye en la primera búsqueda."""
+		if self._indice_busqueda is None:
+			self._indice_busqueda = IndiceBusqueda(self.tareas)
+		return self._indice_busqueda
+
+	@property
+	def estadisticas(self) -> EstadisticasTareas:
+		"""Contadores agregados; se calculan en la primera consulta."""
+		if self._estadisticas is None:
+			self._estadisticas = EstadisticasTareas(self.tareas)
+		return self._estadisticas
+
+	@property
+	def estimador_horas(self) -> EstimadorHoras:
+		"""Histórico de horas por vecinos más cercanos; se construye en la primera estimación."""
+		if self._estimador_horas is None:
+			self._estimador_horas = EstimadorHoras(self.tareas)
+		return self._estimador_horas
+
+	def _obtener_estructuras_derivadas(
+		self,
+	) -> list[IndicesTareas | IndiceBusqueda | EstadisticasTareas | EstimadorHoras]:
+		"""Índices y contadores ya construidos (los que hay que mantener al día)."""
+		return [
+			estructura
+			for estructura in (
+				self._indices,
+				self._indice_busqueda,
+				self._estadisticas,
+				self._estimador_horas,
+			)
+			if estructura is not None
+		]
+
+	def fijar_secuencia_completa(self, secuencia: int) -> None:
+		"""Fija `secuencia` como versión del estado y de todas sus tareas.
+
+		Para reemplazos completos cuya secuencia definitiva se conoce recién al
+		persistir (otro proceso pudo escribir antes).
+		"""
+		self.secuencia = secuencia
+		self.version_base = secuencia
+		self._versiones_tareas.clear()
+
+	def obtener_version_tarea(self, identificador: str) -> int | None:
+		"""Versión actual de la tarea, o None si no existe."""
+		if identificador not in self.tareas:
+			return None
+		return self._versiones_tareas.get(identificador, self.version_base)
+
+	def obtener_fragmento_json(
+		self,
+		tarea: Tarea,
+		formato: str | None = None,
+		codificar: Callable[[Tarea], bytes] = codificar_tarea_compacta,
+	) -> bytes:
+		"""JSON de `tarea` en `formato`, codificándolo solo si no está en caché.
+
+		- Sin `formato` se usa el compacto del codificador configurado (cada
+		  codificador tiene su propia entrada en la caché).
+		- `tarea` debe ser el objeto del estado (no una copia): las mutaciones lo
+		  reemplazan, nunca lo modifican, así que identifica la versión codificada.
+		- `codificar` solo se usa la primera vez que se pide ese formato para esa
+		  versión de la tarea.
+		"""
+		if formato is None:
+			formato = f"{FORMATO_COMPACTO}:{obtener_codificador_json().nombre}"
+		fragmentos = self._fragmentos.get(formato)
+		if fragmentos is None:
+			fragmentos = self._fragmentos.setdefault(formato, {})
+		entrada = fragmentos.get(tarea.identificador)
+		if entrada is not None and entrada[0] is tarea:
+			return entrada[1]
+		fragmento = codificar(tarea)
+		fragmentos[tarea.identificador] = (tarea, fragmento)
+		return fragmento
+
+	def _invalidar_fragmentos(self, identificador: str, vigente: Tarea | None = None) -> None:
+		# Copia de los formatos: un lector fuera del cerrojo puede agregar uno nuevo
+		# mientras tanto (p. ej. la primera compactación pide el formato legible).
+		# Los fragmentos ya calculados para `vigente` (al persistir un borrador) se
+		# conservan.
+		for fragmentos in tuple(self._fragmentos.values()):
+			entrada = fragmentos.get(identificador)
+			if entrada is not None and entrada[0] is not vigente:
+				fragmentos.pop(identificador, None)
+
+	def guardar_tarea(self, tarea: Tarea, version: int | None = None) -> None:
+		"""Agrega o reemplaza una tarea manteniendo los índices al día.
+
+		`version` es la secuencia de la mutación (por defecto, `version_base`).
+		"""
+		tarea_anterior = self.tareas.get(tarea.identificador)
+		self.tareas[tarea.identificador] = tarea
+		if version is not None:
+			self._versiones_tareas[tarea.identificador] = version
+		else:
+			self._versiones_tareas.pop(tarea.identificador, None)
+		self._invalidar_fragmentos(tarea.identificador, vigente=tarea)
+		for estructura in self._obtener_estructuras_derivadas():
+			if tarea_anterior is not None:
+				estructura.quitar(tarea_anterior)
+			estructura.agregar(tarea)
+
+	def quitar_tarea(self, identificador: str) -> Tarea | None:
+		"""Quita una tarea manteniendo los índices al día; devuelve la quitada."""
+		tarea_anterior = self.tareas.pop(identificador, None)
+		self._versiones_tareas.pop(identificador, None)
+		self._invalidar_fragmentos(identificador)
+		if tarea_anterior is not None:
+			for estructura in self._obtener_estructuras_derivadas():
+				estructura.quitar(tarea_anterior)
+		return tarea_anterior
+
+
+class _TareasBorrador(Mapping[str, Tarea]):
+	"""Tareas de un estado con los cambios de un borrador superpuestos.
+
+	Se recorren en el mismo orden que tendría el diccionario del estado tras
+	aplicar los cambios: las reemplazadas en su lugar y las nuevas al final.
+	"""
+
+	def __init__(self, base: dict[str, Tarea]) -> None:
+		self._base = base
+		self._reemplazadas: dict[str, Tarea] = {}
+		self._quitadas: set[str] = set()
+		self._agregadas: dict[str, Tarea] = {}
+
+	def __getitem__(self, identificador: str) -> Tarea:
+		if identificador in self._agregadas:
+			return self._agregadas[identificador]
+		if identificador in self._quitadas:
+			raise KeyError(identificador)
+		if identificador in self._reemplazadas:
+			return self._reemplazadas[identificador]
+		return self._base[identificador]
+
+	def __iter__(self) -> Iterator[str]:
+		for identificador in self._base:
+			if identificador not in self._quitadas:
+				yield identificador
+		yield from self._agregadas
+
+	def __len__(self) -> int:
+		return len(self._base) - len(self._quitadas) + len(self._agregadas)
+
+	def guardar(self, tarea: Tarea) -> None:
+		identificador = tarea.identificador
+		if identificador in self._agregadas:
+			self._agregadas[identificador] = tarea
+		elif identificador in self._base and identificador not in self._quitadas:
+			self._reemplazadas[identificador] = tarea
+		else:
+			self._agregadas[identificador] = tarea
+
+	def quitar(self, identificador: str) -> Tarea | None:
+		if identificador in self._agregadas:
+			return self._agregadas.pop(identificador)
+		if identificador not in self._base or identificador in self._quitadas:
+			return None
+		self._quitadas.add(identificador)
+		tarea_anterior = self._reemplazadas.pop(identificador, None)
+		return tarea_anterior if tarea_anterior is not None else self._base[identificador]
+
+
+class BorradorEstado(EstadoTareas):
+	"""Mutaciones de un lote sobre un `EstadoTareas`, sin tocarlo hasta publicarlas.
+
+	El escritor aplica y persiste el lote sobre el borrador sin retener el cerrojo
+	de la caché: mientras tanto las lecturas siguen viendo `estado`, el último
+	confirmado. `publicar()` aplica las mutaciones a `estado` solo en memoria.
+
+	Los fragmentos JSON se piden a `estado` (se validan por identidad), así que
+	los que se codifican al persistir se reutilizan después de publicar.
+	"""
+
+	def __init__(self, estado: EstadoTareas) -> None:
+		super().__init__({}, estado.secuencia, estado.ultimo_identificador)
+		self.estado = estado
+		self._tareas_borrador = _TareasBorrador(estado.tareas)
+		self.tareas = self._tareas_borrador
+		self.firma = estado.firma
+
+	def obtener_version_tarea(self, identificador: str) -> int | None:
+		if identificador in self._versiones_tareas and identificador in self.tareas:
+			return self._versiones_tareas[identificador]
+		return self.estado.obtener_version_tarea(identificador)
+
+	def obtener_fragmento_json(
+		self,
+		tarea: Tarea,
+		formato: str | None = None,
+		codificar: Callable[[Tarea], bytes] = codificar_tarea_compacta,
+	) -> bytes:
+		return self.estado.obtener_fragmento_json(tarea, formato, codificar)
+
+	def guardar_tarea(self, tarea: Tarea, version: int | None = None) -> None:
+		self._tareas_borrador.guardar(tarea)
+		if version is not None:
+			self._versiones_tareas[tarea.identificador] = version
+
+	def quitar_tarea(self, identificador: str) -> Tarea | None:
+		self._versiones_tareas.pop(identificador, None)
+		return self._tareas_borrador.quitar(identificador)
+
+	def publicar(self, mutaciones: list[Mutacion]) -> None:
+		"""Aplica a `estado` las mutaciones ya persistidas (y la firma resultante)."""
+		for mutacion in mutaciones:
+			if isinstance(mutacion.objetivo, Tarea):
+				self.estado.guardar_tarea(mutacion.objetivo, version=mutacion.secuencia)
+			else:
+				self.estado.quitar_tarea(mutacion.objetivo)
+		self.estado.secuencia = self.secuencia
+		self.estado.ultimo_identificador = self.ultimo_identificador
+		self.estado.firma = self.firma
+
+
+class Mutacion:
+	"""Una mutación aplicada al estado y pendiente de persistir.
+
+	- `secuencia`: número de la mutación (consecutivo dentro del estado).
+	- `operacion`: "crear", "actualizar" o "eliminar".
+	- `objetivo`: la tarea o, al eliminar, su identificador.
+	"""
+
+	def __init__(self, secuencia: int, operacion: str, objetivo: Tarea | str) -> None:
+		self.secuencia = secuencia
+		self.operacion = operacion
+		self.objetivo = objetivo
+
+
+def obtener_identificador_numerico(identificador: Any) -> int:
+	"""Valor numérico del identificador, o 0 si no es numérico."""
+	try:
+		return int(str(identificador))
+	except (TypeError, ValueError):
+		return 0
+
+
+def indexar_tareas(lista_tareas: list[Tarea]) -> dict[str, Tarea]:
+	"""Indexa por identificador; ante duplicados se conserva la primera aparición."""
+	tareas_por_identificador: dict[str, Tarea] = {}
+	for tarea in lista_tareas:
+		tareas_por_identificador.setdefault(tarea.identificador, tarea)
+	return tareas_por_identificador
+
+
+class AlmacenamientoTareas:
+	"""Interfaz base de los almacenamientos de tareas."""
+
+	def obtener_firma(self) -> Hashable:
+		"""Firma actual de los datos persistidos."""
+		raise NotImplementedError
+
+	def cargar(self) -> EstadoTareas:
+		"""Lee todo el almacenamiento y devuelve el estado resultante."""
+		raise NotImplementedError
+
+	def refrescar(self, estado: EstadoTareas, firma_actual: Hashable) -> bool:
+		"""Pone al día `estado` sin lectura completa, si es posible.
+
+		Devuelve False cuando hace falta llamar a `cargar()`.
+		"""
+		return False
+
+	def persistir_mutaciones(self, estado: EstadoTareas, mutaciones: list[Mutacion]) -> None:
+		"""Persiste mutaciones ya aplicadas a `estado`, en una sola escritura.
+
+		`mutaciones` está en orden y su última secuencia es `estado.secuencia`.
+		"""
+		raise NotImplementedError
+
+	def persistir_todo(self, estado: EstadoTareas) -> None:
+		"""Reemplaza todo el contenido persistido por `estado`."""
+		raise NotImplementedError
+
+	def leer_mutaciones_desde(self, desde: int, hasta: int) -> list[Mutacion] | None:
+		"""Mutaciones persistidas con secuencia en (desde, hasta], si se conservan.
+
+		Por defecto no se conservan (None); lo usa el registro de cambios cuando
+		ya no tiene esas mutaciones en memoria.
+		"""
+		return None
+
+	def bloquear_lectura(self) -> ContextManager[Any]:
+		"""Cerrojo compartido entre procesos (por defecto, ninguno)."""
+		return nullcontext()
+
+	def bloquear_escritura(self) -> ContextManager[Any]:
+		"""Cerrojo exclusivo entre procesos (por defecto, ninguno)."""
+		return nullcontext()
+
+	def cerrar(self) -> None:
+		"""Libera recursos abiertos (conexiones, descriptores)."""
+
+	def requiere_compactacion(self) -> bool:
+		"""Indica si conviene lanzar una compactación en segundo plano."""
+		return False
+
+	def preparar_compactacion(self, estado: EstadoTareas) -> Any:
+		"""Captura lo necesario para compactar (se llama con el cerrojo adquirido)."""
+		return None
+
+	def escribir_compactacion(self, captura: Any) -> None:
+		"""Parte costosa de la compactación (se llama SIN el cerrojo)."""
+
+	def finalizar_compactacion(self, estado: EstadoTareas, captura: Any) -> None:
+		"""Publica la compactación (se llama con el cerrojo adquirido)."""
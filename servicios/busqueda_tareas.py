@@ -0,0 +1,147 @@
+"""Servicio: búsqueda de texto completo sobre `titulo` y `descripcion`.
+
+Índice invertido en memoria (término -> identificadores con su peso) que
+responde GET /tareas/buscar?q=... sin recorrer todas las tareas.
+
+Normalización:
+- Los textos y la consulta se pasan a minúsculas y sin acentos, igual que
+	`_normalizar_categoria` trata "Documentación" y "documentacion" como la misma
+	palabra. Los términos son las secuencias de letras y dígitos.
+
+Relevancia:
+- Solo se devuelven las tareas que contienen todos los términos de la consulta.
+- Cada término suma (apariciones en el título x `PESO_TITULO` + apariciones en
+	la descripción) x idf, donde idf = log(1 + total de tareas / tareas con el
+	término): las palabras raras pesan más que las frecuentes.
+- A igual puntuación se ordena por identificador.
+
+Comportamiento:
+- `EstadoTareas` construye el índice la primera vez que se busca y desde
+	entonces lo actualiza en cada alta, modificación o baja (como los índices
+	secundarios de servicios/indices_tareas.py).
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Any
+
+from modelos.tarea import Tarea
+from servicios.indices_tareas import clave_identificador, es_clave_identificador_valida
+
+
+PESO_TITULO = 3
+
+# Letras y dígitos (de cualquier alfabeto); el guion bajo separa términos.
+_PATRON_TERMINO = re.compile(r"[^\W_]+")
+
+
+def normalizar_texto_busqueda(texto: Any) -> str:
+	"""Texto en minúsculas y sin acentos ("Documentación" -> "documentacion")."""
+	descompuesto = unicodedata.normalize("NFKD", str(texto).casefold())
+	return "".join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+
+
+def extraer_terminos(texto: Any) -> list[str]:
+	"""Términos normalizados del texto, en orden y con repeticiones."""
+	if texto is None:
+		return []
+	return _PATRON_TERMINO.findall(normalizar_texto_busqueda(texto))
+
+
+def _pesos_tarea(tarea: Tarea) -> Counter[str]:
+	"""Peso de cada término en la tarea (el título cuenta `PESO_TITULO` veces)."""
+	pesos: Counter[str] = Counter(extraer_terminos(tarea.descripcion))
+	for termino in extraer_terminos(tarea.titulo):
+		pesos[termino] += PESO_TITULO
+	return pesos
+
+
+def calcular_clave_relevancia(puntuacion: float, identificador: str) -> tuple[Any, ...]:
+	"""Clave de orden de un resultado: mayor puntuación primero, luego identificador."""
+	return (-puntuacion, clave_identificador(identificador))
+
+
+def es_clave_relevancia_valida(clave: Any) -> bool:
+	"""`clave` tiene la forma de `calcular_clave_relevancia()` (p. ej. la de un cursor)."""
+	return (
+		isinstance(clave, tuple)
+		and len(clave) == 2
+		and isinstance(clave[0], (int, float))
+		and not isinstance(clave[0], bool)
+		and es_clave_identificador_valida(clave[1])
+	)
+
+
+class IndiceBusqueda:
+	"""Índice invertido de términos sobre un diccionario de tareas."""
+
+	def __init__(self, tareas: dict[str, Tarea]) -> None:
+		self._tareas = tareas
+		self._pesos_por_termino: dict[str, dict[str, int]] = {}
+		for tarea in tareas.values():
+			self.agregar(tarea)
+
+	def agregar(self, tarea: Tarea) -> None:
+		"""Incorpora una tarea nueva (o la versión nueva de una modificada)."""
+		for termino, peso in _pesos_tarea(tarea).items():
+			self._pesos_por_termino.setdefault(termino, {})[tarea.identificador] = peso
+
+	def quitar(self, tarea: Tarea) -> None:
+		"""Retira una tarea (la versión que estaba indexada)."""
+		for termino in _pesos_tarea(tarea):
+			pesos = self._pesos_por_termino.get(termino)
+			if pesos is None:
+				continue
+			pesos.pop(tarea.identificador, None)
+			if not pesos:
+				del self._pesos_por_termino[termino]
+
+	def buscar(
+		self,
+		consulta: str,
+		despues_de: tuple[Any, ...] | None = None,
+		limite: int | None = None,
+	) -> tuple[list[tuple[str, float]], int]:
+		"""Resultados ordenados por relevancia y total de coincidencias.
+
+		- Devuelve ([(identificador, puntuación), ...], total).
+		- `despues_de`: clave de relevancia (ver `calcular_clave_relevancia`) a
+		  partir de la cual continuar, sin incluirla. Las puntuaciones dependen
+		  del conjunto de tareas (idf): solo sirve para el mismo conjunto.
+		- `limite`: máximo de resultados a devolver.
+
+		Lanza `ValueError` si la consulta no tiene ningún término.
+		"""
+		terminos = set(extraer_terminos(consulta))
+		if not terminos:
+			raise ValueError("La búsqueda debe contener al menos una palabra")
+
+		listas_pesos = [self._pesos_por_termino.get(termino, {}) for termino in terminos]
+		# Se intersecta empezando por el término menos frecuente.
+		listas_pesos.sort(key=len)
+		candidatos = set(listas_pesos[0])
+		for pesos in listas_pesos[1:]:
+			candidatos.intersection_update(pesos)
+			if not candidatos:
+				break
+
+		total_tareas = len(self._tareas)
+		idf = [math.log(1 + total_tareas / len(pesos)) if pesos else 0.0 for pesos in listas_pesos]
+		claves = [
+			calcular_clave_relevancia(
+				round(sum(pesos[identificador] * peso_idf for pesos, peso_idf in zip(listas_pesos, idf)), 6),
+				identificador,
+			)
+			for identificador in candidatos
+		]
+		total = len(claves)
+		if despues_de is not None:
+			claves = [clave for clave in claves if clave > despues_de]
+		# Con límite solo se ordena la página pedida, no todas las coincidencias.
+		pagina = sorted(claves) if limite is None else heapq.nsmallest(limite, claves)
+		return [(clave[1][2], -clave[0]) for clave in pagina], total
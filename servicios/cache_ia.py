@@ -0,0 +1,286 @@
+"""Servicio: caché de respuestas del proveedor de IA.
+
+Las mismas tareas se envían una y otra vez a /ai/tareas/categorize o
+/ai/tareas/estimate, y cada consulta a OpenAI cuesta dinero y cientos de
+milisegundos. Esta caché guarda cada respuesta bajo un hash de lo que determina
+la consulta (modelo, texto de sistema, texto de usuario y temperatura).
+
+Niveles:
+- Memoria: LRU acotado (OPENAI_CACHE_CAPACIDAD entradas) propio de cada proceso.
+- SQLite (opcional, OPENAI_CACHE_SQLITE_PATH): persistente y compartido entre
+	procesos (varios workers); lo que se encuentra ahí se copia a memoria.
+
+Comportamiento:
+- Cada entrada vence a los OPENAI_CACHE_TTL_SEGUNDOS de guardarse (en ambos
+	niveles). Con TTL 0 la caché queda desactivada.
+- Solo se guardan respuestas correctas: ni los errores del proveedor ni las
+	respuestas vacías o que el llamador rechaza al validarlas (horas que no son un
+	número, categorías fuera de la lista; ver `_consultar_openai`).
+- Una solicitud puede saltarse la lectura con `Cache-Control: no-cache` (ver
+	rutas/rutas_ai.py y `omitir_cache_ia()`): consulta al proveedor y guarda la
+	respuesta nueva.
+- `obtener_metricas()` cuenta aciertos (por nivel), fallos y omisiones.
+- Un error del nivel SQLite (base bloqueada, disco lleno, ruta inválida) nunca
+	hace fallar la consulta: una lectura fallida cuenta como fallo, una escritura
+	fallida se omite, y ambas suman `errores_sqlite`.
+
+Variables de entorno:
+- OPENAI_CACHE_CAPACIDAD (opcional): entradas en memoria (por defecto 1000).
+- OPENAI_CACHE_TTL_SEGUNDOS (opcional): vigencia de cada entrada (por defecto 86400).
+- OPENAI_CACHE_SQLITE_PATH (opcional): base SQLite del nivel persistente.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+
+CAPACIDAD_POR_DEFECTO = 1000
+TTL_POR_DEFECTO_SEGUNDOS = 24 * 60 * 60
+
+# Cada cuántas escrituras se borran del nivel SQLite las entradas vencidas.
+ESCRITURAS_POR_LIMPIEZA = 100
+
+SENTENCIAS_ESQUEMA = [
+	"""
+	CREATE TABLE IF NOT EXISTS respuestas_ia (
+		clave TEXT PRIMARY KEY,
+		respuesta TEXT NOT NULL,
+		expira REAL NOT NULL
+	)
+	""",
+	"CREATE INDEX IF NOT EXISTS indice_respuestas_ia_expira ON respuestas_ia (expira)",
+]
+
+
+def calcular_clave_cache(
+	nombre_modelo: str,
+	texto_sistema: str,
+	texto_usuario: str,
+	temperatura: float,
+	formato: str | None = None,
+) -> str:
+	"""Hash SHA-256 (hexadecimal) de lo que determina la respuesta del modelo.
+
+	`formato` (p. ej. "json") solo entra en la clave si se indica, así las claves
+	de las consultas de texto plano no cambian.
+	"""
+	partes: list[Any] = [nombre_modelo, texto_sistema, texto_usuario, temperatura]
+	if formato is not None:
+		partes.append(formato)
+	contenido = json.dumps(
+		partes,
+		ensure_ascii=False,
+		separators=(",", ":"),
+	)
+	return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+class CacheRespuestasIA:
+	"""LRU en memoria con vencimiento y, opcionalmente, un nivel SQLite."""
+
+	def __init__(
+		self,
+		capacidad: int,
+		ttl_segundos: float,
+		ruta_sqlite: Path | None = None,
+		reloj: Callable[[], float] = time.time,
+	) -> None:
+		self.capacidad = capacidad
+		self.ttl_segundos = ttl_segundos
+		self.ruta_sqlite = ruta_sqlite
+		self._reloj = reloj
+		# clave -> (respuesta, instante de vencimiento); el final es lo más reciente.
+		self._entradas: OrderedDict[str, tuple[str, float]] = OrderedDict()
+		self._cerrojo = threading.Lock()
+		self._conexion: sqlite3.Connection | None = None
+		self._escrituras_desde_limpieza = 0
+		self._metricas = {
+			"aciertos_memoria": 0,
+			"aciertos_sqlite": 0,
+			"fallos": 0,
+			"omisiones": 0,
+			"guardadas": 0,
+			"errores_sqlite": 0,
+		}
+
+	@property
+	def activa(self) -> bool:
+		return self.ttl_segundos > 0 and (self.capacidad > 0 or self.ruta_sqlite is not None)
+
+	def _obtener_conexion(self) -> sqlite3.Connection:
+		"""Abre la base SQLite y crea el esquema la primera vez (con el cerrojo tomado)."""
+		if self._conexion is not None:
+			return self._conexion
+
+		self.ruta_sqlite.parent.mkdir(parents=True, exist_ok=True)
+		# timeout: otro worker puede estar escribiendo; se espera en lugar de fallar.
+		conexion = sqlite3.connect(
+			str(self.ruta_sqlite), check_same_thread=False, isolation_level=None, timeout=5
+		)
+		conexion.execute("PRAGMA journal_mode=WAL")
+		conexion.execute("PRAGMA synchronous=NORMAL")
+		for sentencia in SENTENCIAS_ESQUEMA:
+			conexion.execute(sentencia)
+		self._conexion = conexion
+		return conexion
+
+	def _guardar_en_memoria(self, clave: str, respuesta: str, expira: float) -> None:
+		if self.capacidad <= 0:
+			return
+		self._entradas[clave] = (respuesta, expira)
+		self._entradas.move_to_end(clave)
+		while len(self._entradas) > self.capacidad:
+			self._entradas.popitem(last=False)
+
+	def obtener(self, clave: str) -> str | None:
+		"""Respuesta vigente guardada bajo `clave`, o None (y cuenta un fallo)."""
+		if not self.activa:
+			return None
+		ahora = self._reloj()
+		with self._cerrojo:
+			entrada = self._entradas.get(clave)
+			if entrada is not None:
+				if entrada[1] > ahora:
+					self._entradas.move_to_end(clave)
+					self._metricas["aciertos_memoria"] += 1
+					return entrada[0]
+				del self._entradas[clave]
+
+			if self.ruta_sqlite is not None:
+				try:
+					fila = self._obtener_conexion().execute(
+						"SELECT respuesta, expira FROM respuestas_ia WHERE clave = ? AND expira > ?",
+						(clave, ahora),
+					).fetchone()
+				except (sqlite3.Error, OSError):
+					# Base bloqueada, disco lleno, ruta inválida...: cuenta como fallo.
+					self._metricas["errores_sqlite"] += 1
+					fila = None
+				if fila is not None:
+					self._guardar_en_memoria(clave, fila[0], fila[1])
+					self._metricas["aciertos_sqlite"] += 1
+					return fila[0]
+
+			self._metricas["fallos"] += 1
+			return None
+
+	def guardar(self, clave: str, respuesta: str) -> None:
+		"""Guarda `respuesta` en todos los niveles, con vencimiento a `ttl_segundos`."""
+		if not self.activa:
+			return
+		expira = self._reloj() + self.ttl_segundos
+		with self._cerrojo:
+			self._guardar_en_memoria(clave, respuesta, expira)
+			if self.ruta_sqlite is not None:
+				try:
+					self._guardar_en_sqlite(clave, respuesta, expira)
+				except (sqlite3.Error, OSError):
+					# La respuesta ya está en memoria; el nivel persistente se omite.
+					self._metricas["errores_sqlite"] += 1
+			self._metricas["guardadas"] += 1
+
+	def _guardar_en_sqlite(self, clave: str, respuesta: str, expira: float) -> None:
+		conexion = self._obtener_conexion()
+		conexion.execute(
+			"INSERT OR REPLACE INTO respuestas_ia (clave, respuesta, expira) VALUES (?, ?, ?)",
+			(clave, respuesta, expira),
+		)
+		self._escrituras_desde_limpieza += 1
+		if self._escrituras_desde_limpieza >= ESCRITURAS_POR_LIMPIEZA:
+			conexion.execute("DELETE FROM respuestas_ia WHERE expira <= ?", (self._reloj(),))
+			self._escrituras_desde_limpieza = 0
+
+	def registrar_omision(self) -> None:
+		"""Cuenta una consulta que se saltó la caché a pedido de la solicitud."""
+		with self._cerrojo:
+			self._metricas["omisiones"] += 1
+
+	def obtener_metricas(self) -> dict[str, Any]:
+		"""Contadores y configuración actuales (copia)."""
+		with self._cerrojo:
+			metricas: dict[str, Any] = dict(self._metricas)
+			entradas_memoria = len(self._entradas)
+		consultas = metricas["aciertos_memoria"] + metricas["aciertos_sqlite"] + metricas["fallos"]
+		aciertos = metricas["aciertos_memoria"] + metricas["aciertos_sqlite"]
+		metricas.update(
+			{
+				"tasa_aciertos": round(aciertos / consultas, 4) if consultas else 0.0,
+				"entradas_memoria": entradas_memoria,
+				"capacidad": self.capacidad,
+				"ttl_segundos": self.ttl_segundos,
+				"sqlite": self.ruta_sqlite is not None,
+				"activa": self.activa,
+			}
+		)
+		return metricas
+
+	def cerrar(self) -> None:
+		with self._cerrojo:
+			if self._conexion is not None:
+				self._conexion.close()
+				self._conexion = None
+
+
+def _leer_numero_entorno(nombre: str, valor_por_defecto: float, tipo: type = float) -> Any:
+	try:
+		valor = tipo(os.getenv(nombre, ""))
+	except ValueError:
+		return valor_por_defecto
+	return max(0, valor)
+
+
+_cache_ia: CacheRespuestasIA | None = None
+_cerrojo_cache_ia = threading.Lock()
+
+# Si la solicitud en curso pidió no leer de la caché (Cache-Control: no-cache).
+_omitir_cache: contextvars.ContextVar[bool] = contextvars.ContextVar("omitir_cache_ia", default=False)
+
+
+def obtener_cache_ia() -> CacheRespuestasIA:
+	"""Caché del proceso; se crea con las variables de entorno la primera vez."""
+	global _cache_ia
+	if _cache_ia is None:
+		with _cerrojo_cache_ia:
+			if _cache_ia is None:
+				ruta_sqlite = os.getenv("OPENAI_CACHE_SQLITE_PATH")
+				_cache_ia = CacheRespuestasIA(
+					capacidad=_leer_numero_entorno("OPENAI_CACHE_CAPACIDAD", CAPACIDAD_POR_DEFECTO, int),
+					ttl_segundos=_leer_numero_entorno("OPENAI_CACHE_TTL_SEGUNDOS", TTL_POR_DEFECTO_SEGUNDOS),
+					ruta_sqlite=Path(ruta_sqlite) if ruta_sqlite else None,
+				)
+	return _cache_ia
+
+
+def reiniciar_cache_ia() -> None:
+	"""Descarta la caché del proceso (se recrea al volver a usarla). Útil en tests."""
+	global _cache_ia
+	with _cerrojo_cache_ia:
+		if _cache_ia is not None:
+			_cache_ia.cerrar()
+		_cache_ia = None
+
+
+def omitir_cache_ia(omitir: bool) -> contextvars.Token:
+	"""Indica si las consultas del contexto actual deben saltarse la lectura de la caché.
+
+	Devuelve el token para restaurar el valor anterior con `restaurar_cache_ia()`.
+	"""
+	return _omitir_cache.set(omitir)
+
+
+def restaurar_cache_ia(token: contextvars.Token) -> None:
+	_omitir_cache.reset(token)
+
+
+def se_omite_cache_ia() -> bool:
+	return _omitir_cache.get()
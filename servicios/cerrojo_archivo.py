@@ -0,0 +1,182 @@
+"""Servicio: cerrojo lector/escritor entre procesos.
+
+Permite que varios procesos (por ejemplo, varios workers de Flask) compartan el
+mismo `tareas.json` sin pisarse:
+
+- `compartido()`: varios lectores a la vez; excluye a los escritores.
+- `exclusivo()`: un único escritor; excluye a lectores y a otros escritores.
+
+El cerrojo se toma sobre un archivo auxiliar (`<archivo>.lock`), nunca sobre los
+datos, porque estos se reemplazan con `os.replace` y cambian de inodo.
+
+Comportamiento:
+- En POSIX se usa `fcntl.flock` (LOCK_SH / LOCK_EX). El sistema operativo libera
+	el cerrojo si el proceso muere, así que no quedan cerrojos huérfanos.
+- En Windows no hay cerrojos compartidos en la biblioteca estándar: se usa
+	`msvcrt.locking` y ambos modos son exclusivos (correcto, aunque sin lecturas
+	concurrentes entre procesos).
+- Dentro del proceso los hilos siguen la misma regla: varios hilos pueden leer a
+	la vez (comparten un único cerrojo de archivo, que suelta el último lector) y
+	un escritor espera a que terminen. Los escritores en espera tienen prioridad
+	sobre los lectores nuevos.
+- Es reentrante por hilo: una lectura anidada dentro de una escritura del mismo
+	hilo reutiliza el cerrojo exclusivo ya tomado. Pasar de compartido a exclusivo
+	no está permitido (sería propenso a interbloqueos).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+	import fcntl
+except ImportError:  # pragma: no cover - solo en Windows
+	fcntl = None
+	import msvcrt
+
+
+def _bloquear(descriptor: int, exclusivo: bool) -> None:
+	"""Bloquea el descriptor esperando lo necesario."""
+	if fcntl is not None:
+		fcntl.flock(descriptor, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+		return
+	# `LK_LOCK` reintenta durante ~10 s y luego falla: se reintenta indefinidamente.
+	while True:  # pragma: no cover - solo en Windows
+		try:
+			msvcrt.locking(descriptor, msvcrt.LK_LOCK, 1)
+			return
+		except OSError:
+			continue
+
+
+def _desbloquear(descriptor: int) -> None:
+	"""Libera el cerrojo del descriptor."""
+	if fcntl is not None:
+		fcntl.flock(descriptor, fcntl.LOCK_UN)
+		return
+	os.lseek(descriptor, 0, os.SEEK_SET)  # pragma: no cover - solo en Windows
+	msvcrt.locking(descriptor, msvcrt.LK_UNLCK, 1)  # pragma: no cover
+
+
+class CerrojoArchivo:
+	"""Cerrojo lector/escritor entre procesos sobre `ruta_cerrojo`."""
+
+	def __init__(self, ruta_cerrojo: Path) -> None:
+		self.ruta_cerrojo = ruta_cerrojo
+		# Estado del proceso, protegido por `_condicion` (nunca retenida durante `yield`).
+		self._condicion = threading.Condition(threading.Lock())
+		self._lectores = 0
+		self._escritor: int | None = None
+		self._escritores_esperando = 0
+		self._descriptor_lectura: int | None = None
+		self._descriptor_escritura: int | None = None
+		# Profundidad y modo de cada hilo, para la reentrada.
+		self._hilo = threading.local()
+
+	def compartido(self):
+		"""Context manager de lectura (varios hilos y procesos a la vez)."""
+		return self._adquirir(exclusivo=False)
+
+	def exclusivo(self):
+		"""Context manager de escritura (un único hilo de un único proceso)."""
+		return self._adquirir(exclusivo=True)
+
+	@contextmanager
+	def _adquirir(self, exclusivo: bool) -> Iterator[None]:
+		profundidad = getattr(self._hilo, "profundidad", 0)
+		if profundidad > 0:
+			if exclusivo and not self._hilo.es_exclusivo:
+				raise RuntimeError("No se puede pasar de cerrojo compartido a exclusivo")
+			self._hilo.profundidad = profundidad + 1
+			try:
+				yield
+			finally:
+				self._hilo.profundidad = profundidad
+			return
+
+		entrar = self._entrar_escritor if exclusivo else self._entrar_lector
+		salir = self._salir_escritor if exclusivo else self._salir_lector
+		entrar()
+		self._hilo.profundidad = 1
+		self._hilo.es_exclusivo = exclusivo
+		try:
+			yield
+		finally:
+			self._hilo.profundidad = 0
+			salir()
+
+	def _abrir_descriptor(self) -> int:
+		self.ruta_cerrojo.parent.mkdir(parents=True, exist_ok=True)
+		return os.open(self.ruta_cerrojo, os.O_RDWR | os.O_CREAT, 0o644)
+
+	def _entrar_lector(self) -> None:
+		"""Registra un lector; el primero del proceso toma el cerrojo compartido."""
+		with self._condicion:
+			# Los escritores en espera tienen prioridad para no quedar postergados.
+			while self._escritor is not None or self._escritores_esperando:
+				self._condicion.wait()
+			if self._lectores == 0:
+				# Se bloquea con `_condicion` tomada: los demás lectores esperan
+				# de todos modos al mismo cerrojo de archivo.
+				descriptor = self._abrir_descriptor()
+				try:
+					_bloquear(descriptor, exclusivo=False)
+				except BaseException:
+					os.close(descriptor)
+					raise
+				self._descriptor_lectura = descriptor
+			self._lectores += 1
+
+	def _salir_lector(self) -> None:
+		"""Da de baja un lector; el último del proceso suelta el cerrojo de archivo."""
+		with self._condicion:
+			self._lectores -= 1
+			if self._lectores == 0:
+				descriptor = self._descriptor_lectura
+				self._descriptor_lectura = None
+				try:
+					_desbloquear(descriptor)
+				finally:
+					os.close(descriptor)
+				self._condicion.notify_all()
+
+	def _entrar_escritor(self) -> None:
+		"""Espera a que no haya lectores ni escritor en el proceso y bloquea el archivo."""
+		with self._condicion:
+			self._escritores_esperando += 1
+			try:
+				while self._escritor is not None or self._lectores:
+					self._condicion.wait()
+			finally:
+				self._escritores_esperando -= 1
+			self._escritor = threading.get_ident()
+		try:
+			descriptor = self._abrir_descriptor()
+			try:
+				_bloquear(descriptor, exclusivo=True)
+			except BaseException:
+				os.close(descriptor)
+				raise
+		except BaseException:
+			self._liberar_escritor()
+			raise
+		self._descriptor_escritura = descriptor
+
+	def _salir_escritor(self) -> None:
+		"""Suelta el cerrojo exclusivo de archivo y despierta a los hilos en espera."""
+		descriptor = self._descriptor_escritura
+		self._descriptor_escritura = None
+		try:
+			_desbloquear(descriptor)
+		finally:
+			os.close(descriptor)
+			self._liberar_escritor()
+
+	def _liberar_escritor(self) -> None:
+		with self._condicion:
+			self._escritor = None
+			self._condicion.notify_all()
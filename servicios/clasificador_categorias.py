@@ -0,0 +1,349 @@
+"""Servicio: clasificador local de categorías (sin llamar al proveedor de IA).
+
+Resuelve en microsegundos las tareas cuya categoría es evidente ("Configurar
+pipeline CI", "Escribir tests unitarios"); /ai/tareas/categorize solo consulta a
+OpenAI cuando este clasificador no está seguro.
+
+Dos clasificadores, en orden:
+1) Reglas: palabras clave por categoría (`REGLAS_CATEGORIAS`). La confianza es
+	la exclusividad (fracción de coincidencias que apunta a la mejor categoría)
+	por la fuerza de la evidencia (palabras clave distintas de esa categoría sobre
+	`PALABRAS_CLAVE_SUFICIENTES`): una sola palabra clave ("red", "datos",
+	"vista") no alcanza el umbral por defecto aunque sea exclusiva.
+2) Modelo local: naive Bayes multinomial entrenado con las tareas guardadas que
+	ya tienen `categoria`. Los términos se extraen como en la búsqueda de texto
+	(sin acentos ni mayúsculas) y los del título pesan `PESO_TITULO`. La
+	confianza es la probabilidad de la categoría elegida.
+
+Se usa la primera respuesta con confianza >= umbral (TAREAS_CLASIFICADOR_UMBRAL,
+por defecto 0.8); si ninguna lo alcanza, el llamador consulta al proveedor.
+
+Entrenamiento:
+- `reentrenar()` entrena con las tareas guardadas y guarda el modelo en JSON
+	(comando `flask --app app reentrenar-clasificador`).
+- Si el archivo existe se usa el modelo guardado y se recarga cuando cambia, así
+	un reentrenamiento llega a todos los procesos sin reiniciarlos. Si no existe,
+	el modelo se entrena en memoria la primera vez que se necesita.
+- Cuando las tareas cambian (versión del conjunto de tareas), el modelo en
+	memoria se vuelve a entrenar en segundo plano, con un solo entrenamiento a la
+	vez: mientras tanto se sigue respondiendo con el anterior, así una escritura
+	no convierte la siguiente clasificación en un recorrido de todas las tareas.
+- Con menos de `MINIMO_EJEMPLOS_ENTRENAMIENTO` tareas categorizadas (o una sola
+	categoría) no hay modelo: solo se aplican las reglas.
+
+Variables de entorno:
+- TAREAS_CLASIFICADOR_UMBRAL (opcional): confianza mínima para no consultar al proveedor.
+- TAREAS_CLASIFICADOR_PATH (opcional): archivo del modelo entrenado.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from servicios.busqueda_tareas import PESO_TITULO, extraer_terminos
+from servicios.escritura_atomica import reemplazar_archivo
+
+
+ORIGEN_REGLAS = "reglas"
+ORIGEN_MODELO_LOCAL = "modelo_local"
+ORIGEN_OPENAI = "openai"
+
+UMBRAL_CONFIANZA_POR_DEFECTO = 0.8
+# Palabras clave distintas de una categoría para que las reglas tengan fuerza plena.
+PALABRAS_CLAVE_SUFICIENTES = 2
+MINIMO_EJEMPLOS_ENTRENAMIENTO = 20
+
+# Palabras clave (ya normalizadas: minúsculas y sin acentos) de cada categoría.
+REGLAS_CATEGORIAS: dict[str, frozenset[str]] = {
+	"Frontend": frozenset(
+		{"frontend", "ui", "ux", "css", "html", "react", "angular", "vue", "interfaz", "pantalla",
+		 "boton", "formulario", "vista", "maquetar", "maquetacion", "responsive", "estilos"}
+	),
+	"Backend": frozenset(
+		{"backend", "api", "endpoint", "endpoints", "flask", "django", "servidor", "microservicio",
+		 "rest", "graphql", "orm", "controlador"}
+	),
+	"Testing": frozenset(
+		{"test", "tests", "testing", "prueba", "pruebas", "unitario", "unitarios", "unitaria",
+		 "unitarias", "pytest", "qa", "e2e", "cobertura", "regresion"}
+	),
+	"Infra": frozenset(
+		{"infra", "infraestructura", "kubernetes", "k8s", "terraform", "aws", "azure", "gcp", "red",
+		 "dns", "balanceador", "vm", "nube", "cluster", "almacenamiento"}
+	),
+	"DevOps": frozenset(
+		{"devops", "pipeline", "ci", "cd", "despliegue", "desplegar", "deploy", "jenkins", "docker",
+		 "contenedor", "contenedores", "monitoreo", "release", "actions"}
+	),
+	"Documentación": frozenset(
+		{"documentacion", "documentar", "readme", "manual", "guia", "wiki", "docs", "diagrama",
+		 "changelog"}
+	),
+	"Seguridad": frozenset(
+		{"seguridad", "vulnerabilidad", "vulnerabilidades", "autenticacion", "autorizacion", "oauth",
+		 "jwt", "cifrado", "cifrar", "permisos", "xss", "csrf", "owasp", "auditoria", "secretos"}
+	),
+	"Datos": frozenset(
+		{"datos", "etl", "sql", "reporte", "reportes", "dashboard", "analitica", "metricas",
+		 "dataset", "esquema", "migracion"}
+	),
+}
+
+
+def extraer_pesos_terminos(titulo: Any, descripcion: Any = None) -> Counter[str]:
+	"""Peso de cada término de la tarea (el título cuenta `PESO_TITULO` veces)."""
+	pesos: Counter[str] = Counter(extraer_terminos(descripcion))
+	for termino in extraer_terminos(titulo):
+		pesos[termino] += PESO_TITULO
+	return pesos
+
+
+def clasificar_por_reglas(pesos: Counter[str]) -> tuple[str, float] | None:
+	"""(categoría, confianza) según las palabras clave, o None si no hay ninguna.
+
+	confianza = exclusividad x min(1, palabras clave distintas / PALABRAS_CLAVE_SUFICIENTES).
+	"""
+	coincidencias = {
+		categoria: [(termino, peso) for termino, peso in pesos.items() if termino in palabras]
+		for categoria, palabras in REGLAS_CATEGORIAS.items()
+	}
+	pesos_por_categoria = {
+		categoria: sum(peso for _, peso in terminos) for categoria, terminos in coincidencias.items()
+	}
+	total = sum(pesos_por_categoria.values())
+	if total == 0:
+		return None
+	categoria, mejor = max(pesos_por_categoria.items(), key=lambda par: par[1])
+	fuerza = min(1.0, len(coincidencias[categoria]) / PALABRAS_CLAVE_SUFICIENTES)
+	return categoria, mejor / total * fuerza
+
+
+class ModeloCategorias:
+	"""Naive Bayes multinomial sobre términos ponderados, con suavizado de Laplace."""
+
+	def __init__(
+		self,
+		documentos_por_categoria: dict[str, int],
+		terminos_por_categoria: dict[str, dict[str, int]],
+	) -> None:
+		self.documentos_por_categoria = documentos_por_categoria
+		self.terminos_por_categoria = terminos_por_categoria
+		self.cantidad_ejemplos = sum(documentos_por_categoria.values())
+		vocabulario = set()
+		for terminos in terminos_por_categoria.values():
+			vocabulario.update(terminos)
+		self._vocabulario = vocabulario
+		self._totales = {
+			categoria: sum(terminos.values()) for categoria, terminos in terminos_por_categoria.items()
+		}
+
+	@classmethod
+	def entrenar(cls, ejemplos: Iterable[tuple[Any, Any, str]]) -> ModeloCategorias | None:
+		"""Entrena con (título, descripción, categoría); None si no hay datos suficientes."""
+		documentos_por_categoria: Counter[str] = Counter()
+		terminos_por_categoria: dict[str, Counter[str]] = {}
+		for titulo, descripcion, categoria in ejemplos:
+			pesos = extraer_pesos_terminos(titulo, descripcion)
+			if not pesos:
+				continue
+			documentos_por_categoria[categoria] += 1
+			terminos_por_categoria.setdefault(categoria, Counter()).update(pesos)
+
+		cantidad_ejemplos = sum(documentos_por_categoria.values())
+		if cantidad_ejemplos < MINIMO_EJEMPLOS_ENTRENAMIENTO or len(documentos_por_categoria) < 2:
+			return None
+		return cls(
+			dict(documentos_por_categoria),
+			{categoria: dict(terminos) for categoria, terminos in terminos_por_categoria.items()},
+		)
+
+	def predecir(self, pesos: Counter[str]) -> tuple[str, float] | None:
+		"""(categoría, probabilidad), o None si ningún término es conocido."""
+		conocidos = [(termino, peso) for termino, peso in pesos.items() if termino in self._vocabulario]
+		if not conocidos:
+			return None
+
+		tamano_vocabulario = len(self._vocabulario)
+		logaritmos: dict[str, float] = {}
+		for categoria, documentos in self.documentos_por_categoria.items():
+			terminos = self.terminos_por_categoria[categoria]
+			denominador = self._totales[categoria] + tamano_vocabulario
+			logaritmo = math.log(documentos / self.cantidad_ejemplos)
+			for termino, peso in conocidos:
+				logaritmo += peso * math.log((terminos.get(termino, 0) + 1) / denominador)
+			logaritmos[categoria] = logaritmo
+
+		# Probabilidades normalizadas (softmax estable de los logaritmos).
+		maximo = max(logaritmos.values())
+		exponenciales = {categoria: math.exp(valor - maximo) for categoria, valor in logaritmos.items()}
+		categoria = max(exponenciales, key=exponenciales.__getitem__)
+		return categoria, exponenciales[categoria] / sum(exponenciales.values())
+
+	def a_diccionario(self) -> dict[str, Any]:
+		return {
+			"documentos_por_categoria": self.documentos_por_categoria,
+			"terminos_por_categoria": self.terminos_por_categoria,
+		}
+
+	@classmethod
+	def desde_diccionario(cls, datos: dict[str, Any]) -> ModeloCategorias:
+		return cls(datos["documentos_por_categoria"], datos["terminos_por_categoria"])
+
+
+def obtener_umbral_confianza() -> float:
+	"""Confianza mínima de una clasificación local (TAREAS_CLASIFICADOR_UMBRAL)."""
+	try:
+		umbral = float(os.getenv("TAREAS_CLASIFICADOR_UMBRAL", ""))
+	except ValueError:
+		return UMBRAL_CONFIANZA_POR_DEFECTO
+	return min(max(umbral, 0.0), 1.0)
+
+
+_modelos: dict[Path, tuple[Any, ModeloCategorias | None]] = {}
+# Entrenamientos en segundo plano por ruta (a lo sumo uno); protegidos por el cerrojo.
+_entrenamientos_en_curso: dict[Path, threading.Thread] = {}
+_cerrojo_modelos = threading.Lock()
+
+
+def _leer_firma_archivo(ruta: Path) -> tuple[int, int] | None:
+	try:
+		estadisticas = ruta.stat()
+	except FileNotFoundError:
+		return None
+	return estadisticas.st_mtime_ns, estadisticas.st_size
+
+
+def obtener_modelo(
+	ruta_modelo: Path,
+	obtener_ejemplos: Callable[[], Iterable[tuple[Any, Any, str]]],
+	obtener_version: Callable[[], int] | None = None,
+) -> ModeloCategorias | None:
+	"""Modelo vigente: el guardado en `ruta_modelo` o, si no existe, uno entrenado en memoria.
+
+	El modelo en memoria se asocia a `obtener_version()` (versión de los datos de
+	entrenamiento). Si la versión cambia, se devuelve el modelo anterior y se
+	reentrena en segundo plano (ver `esperar_entrenamientos()`).
+	"""
+	firma_archivo = _leer_firma_archivo(ruta_modelo)
+	if firma_archivo is not None:
+		firma: Any = ("archivo", firma_archivo)
+	else:
+		firma = ("memoria", obtener_version() if obtener_version is not None else None)
+	vigente = _modelos.get(ruta_modelo)
+	if vigente is not None and vigente[0] == firma:
+		return vigente[1]
+	if vigente is not None and firma_archivo is None and vigente[0][0] == "memoria":
+		_programar_entrenamiento(ruta_modelo, obtener_ejemplos, obtener_version)
+		return vigente[1]
+
+	with _cerrojo_modelos:
+		vigente = _modelos.get(ruta_modelo)
+		if vigente is not None and vigente[0] == firma:
+			return vigente[1]
+		if firma_archivo is None:
+			modelo = ModeloCategorias.entrenar(obtener_ejemplos())
+		else:
+			datos = json.loads(ruta_modelo.read_text(encoding="utf-8"))
+			modelo = ModeloCategorias.desde_diccionario(datos) if datos else None
+		_modelos[ruta_modelo] = (firma, modelo)
+		return modelo
+
+
+def _programar_entrenamiento(
+	ruta_modelo: Path,
+	obtener_ejemplos: Callable[[], Iterable[tuple[Any, Any, str]]],
+	obtener_version: Callable[[], int] | None,
+) -> None:
+	"""Lanza el reentrenamiento en memoria en segundo plano, si no hay otro en curso."""
+	with _cerrojo_modelos:
+		if ruta_modelo in _entrenamientos_en_curso:
+			return
+		hilo_entrenamiento = threading.Thread(
+			target=_entrenar_en_segundo_plano,
+			args=(ruta_modelo, obtener_ejemplos, obtener_version),
+			daemon=True,
+		)
+		_entrenamientos_en_curso[ruta_modelo] = hilo_entrenamiento
+	hilo_entrenamiento.start()
+
+
+def _entrenar_en_segundo_plano(
+	ruta_modelo: Path,
+	obtener_ejemplos: Callable[[], Iterable[tuple[Any, Any, str]]],
+	obtener_version: Callable[[], int] | None,
+) -> None:
+	"""Punto de entrada del hilo de entrenamiento."""
+	try:
+		# La versión se lee antes que los ejemplos: si cambian en medio, el modelo
+		# queda asociado a la anterior y se vuelve a entrenar (nunca al revés).
+		firma = ("memoria", obtener_version() if obtener_version is not None else None)
+		modelo = ModeloCategorias.entrenar(obtener_ejemplos())
+		with _cerrojo_modelos:
+			vigente = _modelos.get(ruta_modelo)
+			# Un reentrenamiento guardado u `olvidar_modelos()` tienen prioridad.
+			if vigente is not None and vigente[0][0] == "memoria":
+				_modelos[ruta_modelo] = (firma, modelo)
+	except Exception:
+		# Sin modelo nuevo se sigue usando el anterior; se reintenta en el próximo uso.
+		pass
+	finally:
+		with _cerrojo_modelos:
+			_entrenamientos_en_curso.pop(ruta_modelo, None)
+
+
+def esperar_entrenamientos(espera_segundos: float | None = None) -> None:
+	"""Espera a que terminen los entrenamientos en segundo plano (útil en tests)."""
+	with _cerrojo_modelos:
+		hilos_entrenamiento = list(_entrenamientos_en_curso.values())
+	for hilo_entrenamiento in hilos_entrenamiento:
+		hilo_entrenamiento.join(espera_segundos)
+
+
+def reentrenar(
+	ruta_modelo: Path, ejemplos: Iterable[tuple[Any, Any, str]]
+) -> ModeloCategorias | None:
+	"""Entrena con `ejemplos` y guarda el modelo en `ruta_modelo` (reemplazo atómico).
+
+	Sin datos suficientes se guarda un modelo vacío: los procesos dejan de usar el
+	anterior y se quedan solo con las reglas. El archivo se escribe en un temporal
+	único con fsync, como el snapshot de tareas: dos reentrenamientos simultáneos
+	no se pisan el temporal.
+	"""
+	modelo = ModeloCategorias.entrenar(ejemplos)
+	contenido = json.dumps(modelo.a_diccionario() if modelo is not None else {}, ensure_ascii=False)
+	reemplazar_archivo(ruta_modelo, lambda archivo: archivo.write(contenido.encode("utf-8")))
+	with _cerrojo_modelos:
+		_modelos.pop(ruta_modelo, None)
+	return modelo
+
+
+def olvidar_modelos() -> None:
+	"""Descarta los modelos en memoria (se vuelven a cargar o entrenar al usarlos)."""
+	with _cerrojo_modelos:
+		_modelos.clear()
+
+
+def clasificar(
+	titulo: Any,
+	descripcion: Any,
+	modelo: ModeloCategorias | None,
+	umbral: float,
+) -> tuple[str, float, str] | None:
+	"""(categoría, confianza, origen) si las reglas o el modelo superan el umbral; si no, None."""
+	pesos = extraer_pesos_terminos(titulo, descripcion)
+	if not pesos:
+		return None
+	resultado_reglas = clasificar_por_reglas(pesos)
+	if resultado_reglas is not None and resultado_reglas[1] >= umbral:
+		return resultado_reglas[0], resultado_reglas[1], ORIGEN_REGLAS
+	if modelo is not None:
+		resultado_modelo = modelo.predecir(pesos)
+		if resultado_modelo is not None and resultado_modelo[1] >= umbral:
+			return resultado_modelo[0], resultado_modelo[1], ORIGEN_MODELO_LOCAL
+	return None
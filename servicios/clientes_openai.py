@@ -0,0 +1,140 @@
+"""Servicio: registro de clientes OpenAI compartidos.
+
+Un cliente `OpenAI` mantiene su propio pool de conexiones HTTP (keep-alive):
+crear uno por consulta obliga a abrir una conexión y negociar TLS cada vez. Este
+registro crea un cliente por configuración (clave de API, URL base, timeout y
+límites de conexiones) y lo reutiliza en todas las consultas y hilos.
+
+Comportamiento:
+- `obtener_cliente_openai()` devuelve el `ClienteOpenAI` de la configuración
+	vigente; el primero que lo pide lo crea (bajo cerrojo) y el resto lo reutiliza.
+- Al crear el cliente se comprueba una sola vez qué API expone el SDK
+	(`responses` o `chat.completions`), en lugar de hacerlo en cada consulta.
+- Si cambia la configuración (p. ej. otra OPENAI_API_KEY), se crea otro cliente;
+	los anteriores siguen disponibles hasta `cerrar_clientes_openai()`.
+
+Variables de entorno:
+- OPENAI_BASE_URL (opcional): URL base de la API (por defecto, la de OpenAI).
+- OPENAI_TIMEOUT_SEGUNDOS (opcional): timeout de cada consulta (por defecto 60).
+- OPENAI_CONEXIONES_MAXIMAS (opcional): conexiones simultáneas por cliente
+	(por defecto 20).
+- OPENAI_CONEXIONES_INACTIVAS_MAXIMAS (opcional): conexiones keep-alive que se
+	conservan abiertas sin uso (por defecto 10).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any
+
+try:
+	import openai
+	from openai import OpenAI
+except Exception:  # pragma: no cover
+	openai = None  # type: ignore[assignment]
+	OpenAI = None  # type: ignore[assignment]
+
+
+TIMEOUT_POR_DEFECTO_SEGUNDOS = 60.0
+CONEXIONES_MAXIMAS_POR_DEFECTO = 20
+CONEXIONES_INACTIVAS_MAXIMAS_POR_DEFECTO = 10
+
+API_RESPONSES = "responses"
+API_CHAT = "chat"
+
+
+def _leer_numero_entorno(nombre: str, valor_por_defecto: float, tipo: type = float) -> Any:
+	try:
+		valor = tipo(os.getenv(nombre, ""))
+	except ValueError:
+		return valor_por_defecto
+	return valor if valor > 0 else valor_por_defecto
+
+
+def _detectar_apis(cliente: Any) -> tuple[str, ...]:
+	"""APIs de texto que expone el SDK, en orden de preferencia."""
+	apis: list[str] = []
+	if hasattr(cliente, "responses"):
+		apis.append(API_RESPONSES)
+	if hasattr(cliente, "chat") and hasattr(cliente.chat, "completions"):
+		apis.append(API_CHAT)
+	return tuple(apis)
+
+
+def _crear_cliente_http(conexiones_maximas: int, conexiones_inactivas_maximas: int) -> Any:
+	"""Cliente HTTP del SDK con los límites del pool, o None si el SDK no lo permite."""
+	cliente_http_por_defecto = getattr(openai, "DefaultHttpxClient", None)
+	limites_por_defecto = getattr(openai, "DEFAULT_CONNECTION_LIMITS", None)
+	if cliente_http_por_defecto is None or limites_por_defecto is None:
+		return None
+	# Se usa la clase de límites del propio SDK: según la versión es la de
+	# `httpx` o la de `httpx2`, y no se pueden mezclar.
+	limites = type(limites_por_defecto)(
+		max_connections=conexiones_maximas,
+		max_keepalive_connections=conexiones_inactivas_maximas,
+	)
+	return cliente_http_por_defecto(limits=limites)
+
+
+class ClienteOpenAI:
+	"""Cliente del SDK ya creado, con las APIs que expone."""
+
+	def __init__(self, cliente: Any) -> None:
+		self.cliente = cliente
+		self.apis = _detectar_apis(cliente)
+
+	def cerrar(self) -> None:
+		cerrar = getattr(self.cliente, "close", None)
+		if callable(cerrar):
+			cerrar()
+
+
+_clientes: dict[tuple[Any, ...], ClienteOpenAI] = {}
+_cerrojo_clientes = threading.Lock()
+
+
+def _obtener_clave_configuracion(api_key: str) -> tuple[Any, ...]:
+	return (
+		api_key,
+		os.getenv("OPENAI_BASE_URL") or None,
+		_leer_numero_entorno("OPENAI_TIMEOUT_SEGUNDOS", TIMEOUT_POR_DEFECTO_SEGUNDOS),
+		_leer_numero_entorno("OPENAI_CONEXIONES_MAXIMAS", CONEXIONES_MAXIMAS_POR_DEFECTO, int),
+		_leer_numero_entorno(
+			"OPENAI_CONEXIONES_INACTIVAS_MAXIMAS", CONEXIONES_INACTIVAS_MAXIMAS_POR_DEFECTO, int
+		),
+	)
+
+
+def obtener_cliente_openai(api_key: str) -> ClienteOpenAI:
+	"""Cliente compartido para `api_key` y la configuración de conexión vigente."""
+	if OpenAI is None:
+		raise RuntimeError("Falta instalar la dependencia 'openai'")
+
+	clave = _obtener_clave_configuracion(api_key)
+	cliente = _clientes.get(clave)
+	if cliente is not None:
+		return cliente
+
+	with _cerrojo_clientes:
+		cliente = _clientes.get(clave)
+		if cliente is None:
+			_api_key, url_base, timeout, conexiones_maximas, conexiones_inactivas_maximas = clave
+			argumentos: dict[str, Any] = {"api_key": api_key, "timeout": timeout}
+			if url_base is not None:
+				argumentos["base_url"] = url_base
+			cliente_http = _crear_cliente_http(conexiones_maximas, conexiones_inactivas_maximas)
+			if cliente_http is not None:
+				argumentos["http_client"] = cliente_http
+			cliente = ClienteOpenAI(OpenAI(**argumentos))
+			_clientes[clave] = cliente
+		return cliente
+
+
+def cerrar_clientes_openai() -> None:
+	"""Cierra los pools de conexiones y vacía el registro (apagado y tests)."""
+	with _cerrojo_clientes:
+		clientes = list(_clientes.values())
+		_clientes.clear()
+	for cliente in clientes:
+		cliente.cerrar()
@@ -0,0 +1,162 @@
+"""Servicio: codificador JSON intercambiable.
+
+Un único punto para codificar y decodificar JSON. El almacenamiento (bitácora,
+metadatos y fragmentos de tareas) usa el codificador del proceso
+(`obtener_codificador_json()`); cada aplicación Flask tiene el suyo en su
+proveedor JSON (`aplicacion.json.codificador`, ver app.py).
+
+Implementaciones:
+- "orjson": acelerada (extensión en Rust). Solo disponible si `orjson` está
+	instalado; es opcional y no figura en requirements.txt.
+- "estandar": módulo `json` de la biblioteca estándar (siempre disponible).
+- "auto" (por defecto): "orjson" si está instalado; si no, "estandar".
+
+Ambas producen el mismo formato: JSON compacto, UTF-8 (sin escapar caracteres
+no ASCII) y con las claves en el orden de inserción.
+
+Variables de entorno:
+- TAREAS_PROVEEDOR_JSON (opcional): "auto", "orjson" o "estandar".
+
+Notas:
+- El snapshot legible (indentado a 4 espacios) y su lectura en streaming siguen
+	usando `json` de la biblioteca estándar: orjson no indenta a 4 espacios ni
+	decodifica por bloques.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Callable
+
+try:
+	import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+	orjson = None
+
+
+PROVEEDOR_AUTO = "auto"
+PROVEEDOR_ORJSON = "orjson"
+PROVEEDOR_ESTANDAR = "estandar"
+
+
+class CodificadorJson:
+	"""Interfaz: JSON compacto en UTF-8 (bytes) en ambos sentidos."""
+
+	nombre = ""
+
+	def codificar(
+		self,
+		valor: Any,
+		ordenar_claves: bool = False,
+		por_defecto: Callable[[Any], Any] | None = None,
+	) -> bytes:
+		"""Codifica `valor` como JSON compacto en UTF-8.
+
+		- `ordenar_claves`: claves de los diccionarios en orden alfabético.
+		- `por_defecto`: convierte los valores que no son JSON (como `default` de
+		  `json.dumps`); se usa también para fechas y dataclasses.
+		"""
+		raise NotImplementedError
+
+	def decodificar(self, datos: bytes | str) -> Any:
+		"""Decodifica JSON; lanza `ValueError` (json.JSONDecodeError) si es inválido."""
+		raise NotImplementedError
+
+
+class CodificadorJsonEstandar(CodificadorJson):
+	"""Implementación con el módulo `json` de la biblioteca estándar."""
+
+	nombre = PROVEEDOR_ESTANDAR
+
+	def __init__(self) -> None:
+		# Codificadores reutilizados: crear uno por llamada domina el costo.
+		self._codificador = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+		self._codificadores: dict[tuple[bool, Callable[[Any], Any] | None], json.JSONEncoder] = {
+			(False, None): self._codificador
+		}
+		self._decodificador = json.JSONDecoder()
+
+	def codificar(
+		self,
+		valor: Any,
+		ordenar_claves: bool = False,
+		por_defecto: Callable[[Any], Any] | None = None,
+	) -> bytes:
+		codificador = self._codificadores.get((ordenar_claves, por_defecto))
+		if codificador is None:
+			codificador = json.JSONEncoder(
+				ensure_ascii=False,
+				separators=(",", ":"),
+				sort_keys=ordenar_claves,
+				default=por_defecto,
+			)
+			self._codificadores[(ordenar_claves, por_defecto)] = codificador
+		return codificador.encode(valor).encode("utf-8")
+
+	def decodificar(self, datos: bytes | str) -> Any:
+		if isinstance(datos, (bytes, bytearray)):
+			# Igual que `json.loads`: el texto inválido en UTF-8 es un error de JSON.
+			datos = datos.decode("utf-8")
+		return self._decodificador.decode(datos)
+
+
+class CodificadorJsonOrjson(CodificadorJson):
+	"""Implementación con `orjson`."""
+
+	nombre = PROVEEDOR_ORJSON
+
+	def codificar(
+		self,
+		valor: Any,
+		ordenar_claves: bool = False,
+		por_defecto: Callable[[Any], Any] | None = None,
+	) -> bytes:
+		# Claves no textuales (p. ej. enteros) como en `json`, en lugar de error.
+		opciones = orjson.OPT_NON_STR_KEYS
+		if ordenar_claves:
+			opciones |= orjson.OPT_SORT_KEYS
+		if por_defecto is not None:
+			# Fechas y dataclasses pasan por `por_defecto`, como con `json`.
+			opciones |= orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+		return orjson.dumps(valor, default=por_defecto, option=opciones)
+
+	def decodificar(self, datos: bytes | str) -> Any:
+		# `orjson.JSONDecodeError` hereda de `json.JSONDecodeError`.
+		return orjson.loads(datos)
+
+
+_codificador_activo: CodificadorJson | None = None
+
+
+def crear_codificador_json(proveedor: str | None = None) -> CodificadorJson:
+	"""Crea el codificador de `proveedor` (por defecto, TAREAS_PROVEEDOR_JSON o "auto").
+
+	Lanza `ValueError` si el proveedor no existe o si se pide "orjson" sin tenerlo
+	instalado.
+	"""
+	proveedor = (proveedor or os.getenv("TAREAS_PROVEEDOR_JSON") or PROVEEDOR_AUTO).strip().lower()
+	if proveedor == PROVEEDOR_AUTO:
+		proveedor = PROVEEDOR_ORJSON if orjson is not None else PROVEEDOR_ESTANDAR
+
+	if proveedor == PROVEEDOR_ESTANDAR:
+		return CodificadorJsonEstandar()
+	if proveedor == PROVEEDOR_ORJSON:
+		if orjson is None:
+			raise ValueError("El proveedor JSON 'orjson' no está instalado")
+		return CodificadorJsonOrjson()
+	raise ValueError(f"Proveedor JSON desconocido: {proveedor}")
+
+
+def configurar_codificador_json(proveedor: str | None = None) -> CodificadorJson:
+	"""Fija el codificador del proceso (lo usa el almacenamiento) y lo devuelve."""
+	global _codificador_activo
+	_codificador_activo = crear_codificador_json(proveedor)
+	return _codificador_activo
+
+
+def obtener_codificador_json() -> CodificadorJson:
+	"""Codificador del proceso; si no se configuró, se crea con los valores por defecto."""
+	if _codificador_activo is None:
+		return configurar_codificador_json()
+	return _codificador_activo
@@ -0,0 +1,52 @@
+"""Servicio: reemplazo atómico y duradero de archivos.
+
+Lo usan el almacenamiento JSON (snapshot, metadatos y bitácora) y el
+clasificador de categorías (modelo entrenado).
+
+Comportamiento:
+- Se escribe en un temporal único del mismo directorio (mismo sistema de
+	archivos, requisito de `os.replace`): dos escritores simultáneos no se pisan
+	el temporal.
+- El temporal se sincroniza (`fsync`) antes de reemplazar y el directorio
+	después: tras un corte se ve el archivo anterior o el nuevo completo, nunca
+	uno a medio escribir.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+
+def sincronizar_directorio(ruta_directorio: Path) -> None:
+	"""Hace duradero un `os.replace` sincronizando el directorio (solo POSIX)."""
+	if os.name != "posix":
+		return
+	descriptor = os.open(ruta_directorio, os.O_RDONLY)
+	try:
+		os.fsync(descriptor)
+	finally:
+		os.close(descriptor)
+
+
+def reemplazar_archivo(ruta_archivo: Path, escribir: Callable[[BinaryIO], object]) -> None:
+	"""Escribe con `escribir(archivo)` en un temporal y lo publica de forma atómica.
+
+	Si algo falla, el temporal se borra y `ruta_archivo` no cambia.
+	"""
+	ruta_archivo.parent.mkdir(parents=True, exist_ok=True)
+	descriptor, nombre_temporal = tempfile.mkstemp(
+		dir=ruta_archivo.parent, prefix=ruta_archivo.name + ".", suffix=".tmp"
+	)
+	try:
+		with open(descriptor, "wb") as archivo:
+			escribir(archivo)
+			archivo.flush()
+			os.fsync(archivo.fileno())
+		os.replace(nombre_temporal, ruta_archivo)
+	except BaseException:
+		Path(nombre_temporal).unlink(missing_ok=True)
+		raise
+	sincronizar_directorio(ruta_archivo.parent)
@@ -0,0 +1,94 @@
+"""Servicio: estadísticas agregadas de las tareas, mantenidas con contadores.
+
+Responde GET /tareas/estadisticas sin recorrer las tareas: cada alta,
+modificación o baja ajusta los contadores (ver `EstadoTareas.guardar_tarea()`
+y `quitar_tarea()`), y la consulta solo recorre los grupos.
+
+Agregados:
+- Total de tareas.
+- Suma de `horas_estimadas` (las horas no numéricas no suman).
+- Número de tareas por valor de `CAMPOS_AGRUPABLES`. Los valores se agrupan
+	igual que en los filtros de GET /tareas (sin distinguir mayúsculas ni espacios
+	en los extremos); los vacíos o ausentes van en `CLAVE_SIN_VALOR`.
+
+Notas:
+- Las horas se guardan como contador de valores (horas -> tareas), no como una
+	suma corrida: sumar y restar flotantes acumula error, y así el total se
+	calcula con `math.fsum` en O(valores distintos).
+"""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+from typing import Any
+
+from modelos.tarea import Tarea
+from servicios.indices_tareas import CAMPOS_FILTRABLES, normalizar_valor_filtro
+
+
+CAMPOS_AGRUPABLES = CAMPOS_FILTRABLES
+CLAVE_SIN_VALOR = ""
+
+
+def _obtener_horas(tarea: Tarea) -> float | None:
+	"""Horas numéricas de la tarea, o None si no lo son."""
+	try:
+		horas = float(tarea.horas_estimadas)
+	except (TypeError, ValueError):
+		return None
+	if math.isnan(horas) or math.isinf(horas):
+		return None
+	return horas
+
+
+def _clave_grupo(valor: Any) -> str:
+	if valor is None:
+		return CLAVE_SIN_VALOR
+	return normalizar_valor_filtro(valor)
+
+
+class EstadisticasTareas:
+	"""Contadores agregados sobre un diccionario de tareas."""
+
+	def __init__(self, tareas: dict[str, Tarea]) -> None:
+		self._total_tareas = 0
+		self._tareas_por_horas: Counter[float] = Counter()
+		self._tareas_por_grupo: dict[str, Counter[str]] = {
+			campo: Counter() for campo in CAMPOS_AGRUPABLES
+		}
+		for tarea in tareas.values():
+			self.agregar(tarea)
+
+	def _ajustar(self, tarea: Tarea, incremento: int) -> None:
+		self._total_tareas += incremento
+		horas = _obtener_horas(tarea)
+		if horas is not None:
+			self._tareas_por_horas[horas] += incremento
+			if self._tareas_por_horas[horas] == 0:
+				del self._tareas_por_horas[horas]
+		for campo, contador in self._tareas_por_grupo.items():
+			clave = _clave_grupo(getattr(tarea, campo, None))
+			contador[clave] += incremento
+			if contador[clave] == 0:
+				del contador[clave]
+
+	def agregar(self, tarea: Tarea) -> None:
+		"""Suma una tarea nueva (o la versión nueva de una modificada)."""
+		self._ajustar(tarea, 1)
+
+	def quitar(self, tarea: Tarea) -> None:
+		"""Resta una tarea (la versión que estaba contada)."""
+		self._ajustar(tarea, -1)
+
+	def obtener_resumen(self) -> dict[str, Any]:
+		"""Agregados actuales (copias: el llamador puede modificarlos)."""
+		resumen: dict[str, Any] = {
+			"total_tareas": self._total_tareas,
+			"horas_estimadas_total": math.fsum(
+				horas * cantidad for horas, cantidad in self._tareas_por_horas.items()
+			),
+		}
+		for campo, contador in self._tareas_por_grupo.items():
+			resumen[f"por_{campo}"] = dict(sorted(contador.items()))
+		return resumen
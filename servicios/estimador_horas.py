@@ -0,0 +1,232 @@
+"""Servicio: estimación local de `horas_estimadas` a partir de tareas guardadas.
+
+Las tareas ya guardadas con horas son un histórico: una tarea nueva parecida a
+varias de ellas (mismo tipo de trabajo, misma prioridad y categoría) suele
+llevar un tiempo parecido. /ai/tareas/estimate responde con este estimador y
+solo consulta al modelo cuando la confianza no alcanza el umbral.
+
+Método (vecinos más cercanos):
+- Cada tarea con horas numéricas positivas se representa con los términos de
+	su título (peso `PESO_TITULO`) y su descripción, normalizados como en la
+	búsqueda de texto y sin palabras vacías ("de", "la", ...).
+- La similitud es el coseno entre esos vectores; los candidatos salen de un
+	índice invertido (solo se comparan las tareas que comparten algún término).
+- Los vecinos se buscan primero entre las tareas con la misma prioridad y
+	categoría, luego con la misma prioridad y por último entre todas. Se usa el
+	primer nivel con al menos `VECINOS_MINIMOS` vecinos de similitud suficiente.
+- La estimación es la media de las horas de hasta `VECINOS_MAXIMOS` vecinos,
+	ponderada por similitud y redondeada a media hora.
+
+Confianza (entre 0 y 1): similitud media de los vecinos x concordancia de sus
+horas (1 / (1 + coeficiente de variación)) x un factor que baja al ampliar el
+nivel de agrupación.
+
+Se usa la estimación local si su confianza alcanza TAREAS_ESTIMADOR_UMBRAL (por
+defecto 0.6); si no, el llamador consulta al modelo.
+
+Comportamiento:
+- `EstadoTareas` construye el estimador la primera vez que se usa y lo mantiene
+	al día en cada alta, modificación o baja (como los índices de búsqueda).
+
+Variables de entorno:
+- TAREAS_ESTIMADOR_UMBRAL (opcional): confianza mínima para no consultar al modelo.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from collections import Counter
+from typing import Any
+
+from modelos.tarea import Tarea
+from servicios.busqueda_tareas import PESO_TITULO, extraer_terminos
+from servicios.indices_tareas import clave_identificador, normalizar_valor_filtro
+
+
+ORIGEN_HISTORICO = "historico"
+
+UMBRAL_CONFIANZA_POR_DEFECTO = 0.6
+
+VECINOS_MAXIMOS = 5
+VECINOS_MINIMOS = 3
+SIMILITUD_MINIMA = 0.3
+
+# Niveles de agrupación, del más específico al más general, con su factor de confianza.
+AGRUPACION_PRIORIDAD_Y_CATEGORIA = "prioridad_y_categoria"
+AGRUPACION_PRIORIDAD = "prioridad"
+AGRUPACION_TODAS = "todas"
+FACTORES_AGRUPACION = {
+	AGRUPACION_PRIORIDAD_Y_CATEGORIA: 1.0,
+	AGRUPACION_PRIORIDAD: 0.9,
+	AGRUPACION_TODAS: 0.8,
+}
+
+# Palabras frecuentes que no distinguen una tarea de otra (ya normalizadas).
+PALABRAS_VACIAS = frozenset(
+	{
+		"a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los", "o", "para",
+		"por", "que", "se", "sin", "su", "sus", "un", "una", "unos", "unas", "y",
+	}
+)
+
+
+def obtener_umbral_confianza() -> float:
+	"""Confianza mínima de una estimación local (TAREAS_ESTIMADOR_UMBRAL)."""
+	try:
+		umbral = float(os.getenv("TAREAS_ESTIMADOR_UMBRAL", ""))
+	except ValueError:
+		return UMBRAL_CONFIANZA_POR_DEFECTO
+	return min(max(umbral, 0.0), 1.0)
+
+
+def _obtener_horas(tarea: Tarea) -> float | None:
+	"""Horas positivas y finitas de la tarea, o None si no sirven de referencia."""
+	try:
+		horas = float(tarea.horas_estimadas)
+	except (TypeError, ValueError):
+		return None
+	if math.isnan(horas) or math.isinf(horas) or horas <= 0:
+		return None
+	return horas
+
+
+def _clave_grupo(valor: Any) -> str:
+	return "" if valor is None else normalizar_valor_filtro(valor)
+
+
+def extraer_vector(titulo: Any, descripcion: Any = None) -> dict[str, int]:
+	"""Peso de cada término significativo (el título cuenta `PESO_TITULO` veces)."""
+	pesos: Counter[str] = Counter(
+		termino for termino in extraer_terminos(descripcion) if termino not in PALABRAS_VACIAS
+	)
+	for termino in extraer_terminos(titulo):
+		if termino not in PALABRAS_VACIAS:
+			pesos[termino] += PESO_TITULO
+	return dict(pesos)
+
+
+def _calcular_norma(vector: dict[str, int]) -> float:
+	return math.sqrt(sum(peso * peso for peso in vector.values()))
+
+
+class EstimadorHoras:
+	"""Índice de tareas con horas para estimar por vecinos más cercanos."""
+
+	def __init__(self, tareas: dict[str, Tarea]) -> None:
+		# identificador -> (norma del vector, horas, prioridad, categoría)
+		self._referencias: dict[str, tuple[float, float, str, str]] = {}
+		# término -> identificador -> peso
+		self._pesos_por_termino: dict[str, dict[str, int]] = {}
+		for tarea in tareas.values():
+			self.agregar(tarea)
+
+	@property
+	def cantidad_referencias(self) -> int:
+		return len(self._referencias)
+
+	def agregar(self, tarea: Tarea) -> None:
+		"""Incorpora una tarea nueva (o la versión nueva de una modificada)."""
+		horas = _obtener_horas(tarea)
+		if horas is None:
+			return
+		vector = extraer_vector(tarea.titulo, tarea.descripcion)
+		if not vector:
+			return
+		self._referencias[tarea.identificador] = (
+			_calcular_norma(vector),
+			horas,
+			_clave_grupo(tarea.prioridad),
+			_clave_grupo(tarea.categoria),
+		)
+		for termino, peso in vector.items():
+			self._pesos_por_termino.setdefault(termino, {})[tarea.identificador] = peso
+
+	def quitar(self, tarea: Tarea) -> None:
+		"""Retira una tarea (la versión que estaba indexada)."""
+		if self._referencias.pop(tarea.identificador, None) is None:
+			return
+		for termino in extraer_vector(tarea.titulo, tarea.descripcion):
+			pesos = self._pesos_por_termino.get(termino)
+			if pesos is None:
+				continue
+			pesos.pop(tarea.identificador, None)
+			if not pesos:
+				del self._pesos_por_termino[termino]
+
+	def _calcular_similitudes(self, vector: dict[str, int]) -> dict[str, float]:
+		"""Coseno entre `vector` y cada tarea que comparte algún término con él."""
+		productos: dict[str, float] = {}
+		for termino, peso_consulta in vector.items():
+			for identificador, peso in self._pesos_por_termino.get(termino, {}).items():
+				productos[identificador] = productos.get(identificador, 0.0) + peso_consulta * peso
+		norma_consulta = _calcular_norma(vector)
+		return {
+			identificador: producto / (norma_consulta * self._referencias[identificador][0])
+			for identificador, producto in productos.items()
+		}
+
+	def estimar(
+		self,
+		titulo: Any,
+		descripcion: Any = None,
+		prioridad: Any = None,
+		categoria: Any = None,
+	) -> dict[str, Any] | None:
+		"""Estimación a partir de las tareas más parecidas, o None si no hay suficientes.
+
+		Devuelve {"horas", "confianza", "agrupacion", "vecinos": [identificadores]}.
+		"""
+		vector = extraer_vector(titulo, descripcion)
+		if not vector:
+			return None
+		similitudes = [
+			(similitud, identificador)
+			for identificador, similitud in self._calcular_similitudes(vector).items()
+			if similitud >= SIMILITUD_MINIMA
+		]
+		if len(similitudes) < VECINOS_MINIMOS:
+			return None
+
+		clave_prioridad = _clave_grupo(prioridad)
+		clave_categoria = _clave_grupo(categoria)
+		niveles = []
+		if clave_prioridad != "" and clave_categoria != "":
+			niveles.append(AGRUPACION_PRIORIDAD_Y_CATEGORIA)
+		if clave_prioridad != "":
+			niveles.append(AGRUPACION_PRIORIDAD)
+		niveles.append(AGRUPACION_TODAS)
+
+		for nivel in niveles:
+			vecinos = [
+				(similitud, identificador)
+				for similitud, identificador in similitudes
+				if nivel == AGRUPACION_TODAS
+				or (
+					self._referencias[identificador][2] == clave_prioridad
+					and (nivel == AGRUPACION_PRIORIDAD or self._referencias[identificador][3] == clave_categoria)
+				)
+			]
+			if len(vecinos) >= VECINOS_MINIMOS:
+				break
+		else:
+			return None
+
+		vecinos.sort(key=lambda par: (-par[0], clave_identificador(par[1])))
+		vecinos = vecinos[:VECINOS_MAXIMOS]
+		suma_similitudes = math.fsum(similitud for similitud, _ in vecinos)
+		horas = [self._referencias[identificador][1] for _, identificador in vecinos]
+		media = math.fsum(
+			similitud * horas_vecino for (similitud, _), horas_vecino in zip(vecinos, horas)
+		) / suma_similitudes
+		varianza = math.fsum(
+			similitud * (horas_vecino - media) ** 2 for (similitud, _), horas_vecino in zip(vecinos, horas)
+		) / suma_similitudes
+		concordancia = 1 / (1 + math.sqrt(varianza) / media)
+		confianza = suma_similitudes / len(vecinos) * concordancia * FACTORES_AGRUPACION[nivel]
+		return {
+			"horas": max(0.5, round(media * 2) / 2),
+			"confianza": round(confianza, 4),
+			"agrupacion": nivel,
+			"vecinos": [identificador for _, identificador in vecinos],
+		}
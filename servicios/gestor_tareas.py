@@ -1,45 +1,178 @@
 """Servicio: Gestor de tareas.
 
-Este módulo implementa persistencia de tareas usando un archivo JSON.
+Este módulo implementa la persistencia de tareas. Por defecto usa un archivo JSON;
+el almacenamiento concreto es intercambiable (ver servicios/almacenamiento_tareas.py).
 
 Reglas de este paso (según agents.md):
 - No usar Flask.
 - No crear endpoints.
-- No usar base de datos.
 
 Responsabilidades:
-1) cargar_tareas():
+1) cargar_tareas() / iterar_tareas():
    - Leer desde datos/tareas.json
    - Si el archivo no existe: crearlo con una lista vacía []
    - Convertir cada diccionario a objeto Tarea usando Tarea.desde_diccionario()
-   - Regresar una lista de objetos Tarea
+   - Regresar una lista de objetos Tarea (o recorrerlos uno a uno sin crear la lista)
 
 2) guardar_tareas(lista_tareas):
    - Recibir lista de objetos Tarea
    - Convertir cada Tarea a diccionario con a_diccionario()
    - Guardar en datos/tareas.json (formato legible con indentación)
 
+3) consultar_tareas(filtros, rangos de horas, orden):
+   - Filtrar y ordenar con índices secundarios mantenidos en cada mutación.
+   - buscar_tareas(consulta): texto completo sobre titulo/descripcion con un
+     índice invertido, también mantenido en cada mutación.
+   - obtener_estadisticas(): agregados con contadores ajustados en cada mutación.
+   - estimar_horas(): horas de una tarea nueva a partir de las tareas parecidas
+     ya guardadas (vecinos más cercanos, también mantenido en cada mutación).
+   - obtener_cambios() / esperar_cambios(): cambios desde una secuencia, con
+     espera opcional (long-poll), a partir del registro de cambios.
+
+4) obtener_por_id(), crear(), actualizar(), eliminar() y sus variantes por lote
+   (crear_varias(), actualizar_varias(), eliminar_varias()):
+   - Operar sobre UNA tarea usando el índice por identificador (sin recorrer la lista).
+   - Persistir solo esa mutación; el llamador no reenvía la lista completa.
+   - `crear()` asigna el identificador con un contador monótono persistido: un
+     identificador eliminado no se vuelve a asignar.
+   - Las variantes por lote aplican todos los elementos sobre el mismo estado y
+     persisten una sola vez.
+   - importar_varias(): como crear_varias(), pero conservando el identificador
+     de cada tarea (importación de una exportación NDJSON).
+
 Notas:
 - Se usan rutas relativas robustas basadas en la ubicación del archivo (pathlib).
 - Si el JSON está vacío o es inválido, se devuelve una lista vacía sin romper la app.
 
+Varios procesos:
+- Las lecturas toman el cerrojo compartido del almacenamiento y cada
+	lectura-modificación-escritura el exclusivo (ver servicios/cerrojo_archivo.py),
+	así que varios workers pueden servir lecturas en paralelo sin perder escrituras.
+- Dentro del proceso, cada lote se aplica a un borrador (`BorradorEstado`) y se
+	persiste sin retener el cerrojo de la caché: las lecturas de otros hilos no
+	esperan el `fsync` y ven el estado anterior hasta que el lote se publica.
+
+Commit agrupado (opcional, TAREAS_COMMIT_AGRUPADO_MS > 0):
+- Las mutaciones de solicitudes concurrentes se encolan y un hilo de vaciado las
+	persiste juntas tras esperar la ventana configurada (por ejemplo, 5 ms): una
+	sola reescritura del snapshot, un solo `fsync` de la bitácora o una sola
+	transacción SQLite por lote.
+- Cada solicitud vuelve solo cuando su lote ya es duradero: la garantía es la
+	misma que sin agrupar, a cambio de hasta una ventana de latencia extra.
+
+Caché en memoria:
+- Las tareas decodificadas se conservan en una caché compartida por el proceso.
+- La caché se invalida cuando cambia la firma del almacenamiento (en JSON: mtime,
+	tamaño o inodo de los archivos), de modo que las escrituras de otros procesos
+	se detectan en la siguiente lectura.
+- `guardar_tareas()` y las mutaciones actualizan la caché directamente (write-through).
+- Se llevan contadores de aciertos y fallos consultables con `obtener_metricas_cache()`.
+
 Variables de entorno:
 - TAREAS_JSON_PATH (opcional): ruta a un JSON alternativo para persistencia.
 	Útil para tests (evita tocar datos/tareas.json) o para ejecutar en modo aislado.
+- TAREAS_ALMACENAMIENTO (opcional): "json" (por defecto) o "sqlite".
+- TAREAS_SQLITE_PATH (opcional): ruta de la base SQLite (por defecto, la del JSON
+	con extensión `.sqlite3`).
+- TAREAS_MODO_ESCRITURA (opcional, solo JSON): "completo" (por defecto) o "bitacora".
+- TAREAS_BITACORA_LIMITE_BYTES (opcional, solo JSON): tamaño de bitácora que dispara
+	la compactación (por defecto 1 MiB).
+- TAREAS_COMMIT_AGRUPADO_MS (opcional): ventana del commit agrupado en milisegundos.
+	Vacío o 0 lo desactiva (por defecto).
 """
 
 from __future__ import annotations
 
-import json
+import copy
 import os
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
+
+from modelos.tarea import Tarea, internar_campo
+from servicios.almacenamiento_json import (
+	LIMITE_BITACORA_BYTES_POR_DEFECTO,
+	MODO_ESCRITURA_BITACORA,
+	MODO_ESCRITURA_COMPLETO,
+	AlmacenamientoJson,
+)
+from servicios.almacenamiento_sqlite import AlmacenamientoSqlite
+from servicios.registro_cambios import (
+	RegistroCambios,
+	convertir_mutacion_a_diccionario,
+	obtener_limite_cambios,
+)
+from servicios.almacenamiento_tareas import (
+	ALMACENAMIENTO_JSON,
+	ALMACENAMIENTO_SQLITE,
+	FORMATO_COMPACTO,
+	AlmacenamientoTareas,
+	BorradorEstado,
+	ConflictoEscrituraConcurrente,
+	EstadoTareas,
+	Mutacion,
+	codificar_tarea_compacta,
+	indexar_tareas,
+	obtener_identificador_numerico,
+)
+from servicios.codificador_json import CodificadorJson
+
+
+# Reintentos ante escrituras concurrentes de otros procesos.
+MAXIMO_INTENTOS_ESCRITURA = 5
+
+# Cada cuánto se revisa el almacenamiento mientras se esperan cambios: los de
+# este proceso despiertan al instante; los de otros procesos, en este intervalo.
+INTERVALO_SONDEO_CAMBIOS_SEGUNDOS = 0.5
+
+# Operación de escritura: modifica el borrador del lote con `_aplicar_mutacion` y
+# devuelve el resultado para el llamador.
+OperacionEscritura = Callable[[BorradorEstado, list[Mutacion]], Any]
+
+
+# Caché compartida por todo el proceso, indexada por almacenamiento configurado.
+_cerrojo_cache = threading.RLock()
+_almacenamientos: dict[tuple[Any, ...], AlmacenamientoTareas] = {}
+_cache_tareas: dict[tuple[Any, ...], EstadoTareas] = {}
+_metricas_cache: dict[str, int] = {"aciertos": 0, "fallos": 0, "lecturas_incrementales": 0}
+_compactaciones_en_curso: set[tuple[Any, ...]] = set()
+# Registro de cambios (change feed) por almacenamiento; protegido por `_cerrojo_cache`.
+_registros_cambios: dict[tuple[Any, ...], RegistroCambios] = {}
+
+# Escrituras del proceso: se serializan con `_cerrojo_escritura` y persisten sin
+# retener `_cerrojo_cache` (ver `_bloquear_escritura`). Hilo escritor en curso por
+# almacenamiento y condición para esperarlo; protegidos por `_cerrojo_cache`.
+_cerrojo_escritura = threading.RLock()
+_escritores_en_curso: dict[tuple[Any, ...], int] = {}
+_condicion_escrituras = threading.Condition(_cerrojo_cache)
 
-from modelos.tarea import Tarea
+
+# Commit agrupado: solicitudes pendientes por almacenamiento y sus hilos de vaciado.
+_cerrojo_commit_agrupado = threading.Lock()
+_solicitudes_pendientes: dict[tuple[Any, ...], list[_SolicitudEscritura]] = {}
+_vaciados_en_curso: set[tuple[Any, ...]] = set()
+_metricas_commit_agrupado: dict[str, int] = {"lotes": 0, "escrituras": 0}
+
+
+class _SolicitudEscritura:
+	"""Operación encolada y el resultado que espera su solicitante."""
+
+	def __init__(self, operacion: OperacionEscritura) -> None:
+		self.operacion = operacion
+		self.completada = threading.Event()
+		self.resultado: Any = None
+		self.excepcion: BaseException | None = None
+
+
+def _copiar_tareas(lista_tareas: Any) -> list[Tarea]:
+	"""Copia superficial de cada tarea para aislar la caché de los llamadores."""
+	return [copy.copy(tarea) for tarea in lista_tareas]
 
 
 class GestorTareas:
-	"""Gestiona la carga y el guardado de tareas en un archivo JSON."""
+	"""Gestiona la carga y el guardado de tareas en el almacenamiento configurado."""
 
 	@staticmethod
 	def _obtener_ruta_archivo_tareas() -> Path:
@@ -57,73 +190,911 @@ class GestorTareas:
 		ruta_raiz_proyecto = Path(__file__).resolve().parent.parent
 		return ruta_raiz_proyecto / "datos" / "tareas.json"
 
+	@staticmethod
+	def _obtener_ruta_base_datos() -> Path:
+		"""Ruta de la base SQLite (TAREAS_SQLITE_PATH o la del JSON con `.sqlite3`)."""
+		ruta_override = os.getenv("TAREAS_SQLITE_PATH")
+		if isinstance(ruta_override, str) and ruta_override.strip() != "":
+			return Path(ruta_override).expanduser().resolve()
+		return GestorTareas._obtener_ruta_archivo_tareas().with_suffix(".sqlite3")
+
+	@staticmethod
+	def _obtener_clave_almacenamiento() -> tuple[Any, ...]:
+		"""Identifica el almacenamiento configurado por las variables de entorno."""
+		tipo_almacenamiento = os.getenv("TAREAS_ALMACENAMIENTO", ALMACENAMIENTO_JSON)
+		tipo_almacenamiento = tipo_almacenamiento.strip().lower()
+		if tipo_almacenamiento == ALMACENAMIENTO_SQLITE:
+			return (
+				ALMACENAMIENTO_SQLITE,
+				GestorTareas._obtener_ruta_base_datos(),
+				GestorTareas._obtener_ruta_archivo_tareas(),
+			)
+
+		modo_escritura = os.getenv("TAREAS_MODO_ESCRITURA", MODO_ESCRITURA_COMPLETO)
+		limite_texto = os.getenv("TAREAS_BITACORA_LIMITE_BYTES", "")
+		try:
+			limite_bitacora_bytes = max(0, int(limite_texto))
+		except ValueError:
+			limite_bitacora_bytes = LIMITE_BITACORA_BYTES_POR_DEFECTO
+		return (
+			ALMACENAMIENTO_JSON,
+			GestorTareas._obtener_ruta_archivo_tareas(),
+			modo_escritura.strip().lower() == MODO_ESCRITURA_BITACORA,
+			limite_bitacora_bytes,
+		)
+
+	@staticmethod
+	def _obtener_almacenamiento(clave_almacenamiento: tuple[Any, ...]) -> AlmacenamientoTareas:
+		"""Devuelve (creándola si hace falta) la instancia de almacenamiento.
+
+		Debe llamarse con `_cerrojo_cache` adquirido.
+		"""
+		almacenamiento = _almacenamientos.get(clave_almacenamiento)
+		if almacenamiento is not None:
+			return almacenamiento
+
+		if clave_almacenamiento[0] == ALMACENAMIENTO_SQLITE:
+			_tipo, ruta_base_datos, ruta_json = clave_almacenamiento
+			almacenamiento = AlmacenamientoSqlite(ruta_base_datos, ruta_json_migracion=ruta_json)
+		else:
+			_tipo, ruta_json, modo_bitacora, limite_bitacora_bytes = clave_almacenamiento
+			almacenamiento = AlmacenamientoJson(
+				ruta_json,
+				modo_bitacora=modo_bitacora,
+				limite_bitacora_bytes=limite_bitacora_bytes,
+			)
+		_almacenamientos[clave_almacenamiento] = almacenamiento
+		return almacenamiento
+
+	@staticmethod
+	def _obtener_estado_vigente(clave_almacenamiento: tuple[Any, ...]) -> EstadoTareas:
+		"""Devuelve el estado en caché al día con el almacenamiento.
+
+		- Si la firma no cambió: acierto, sin leer nada.
+		- Si el almacenamiento puede ponerse al día parcialmente: lectura incremental.
+		- Si no: lectura completa (fallo).
+		- Si otro hilo está escribiendo: acierto con el último estado confirmado, sin
+		  esperar su E/S (tiene el cerrojo exclusivo del almacenamiento).
+
+		Debe llamarse con `_cerrojo_cache` adquirido.
+		"""
+		if GestorTareas._hay_escritura_ajena(clave_almacenamiento):
+			estado = _cache_tareas.get(clave_almacenamiento)
+			if estado is not None:
+				_metricas_cache["aciertos"] += 1
+				return estado
+			GestorTareas._esperar_escrituras_ajenas(clave_almacenamiento)
+
+		almacenamiento = GestorTareas._obtener_almacenamiento(clave_almacenamiento)
+		# Cerrojo compartido: ningún otro proceso escribe mientras se consulta la
+		# firma o se lee (dentro de una escritura se reutiliza el exclusivo).
+		with almacenamiento.bloquear_lectura():
+			firma_actual = almacenamiento.obtener_firma()
+
+			estado = _cache_tareas.get(clave_almacenamiento)
+			if estado is not None and estado.firma is not None:
+				if estado.firma == firma_actual:
+					_metricas_cache["aciertos"] += 1
+					return estado
+				if almacenamiento.refrescar(estado, firma_actual):
+					_metricas_cache["lecturas_incrementales"] += 1
+					return estado
+
+			_metricas_cache["fallos"] += 1
+			estado = almacenamiento.cargar()
+			_cache_tareas[clave_almacenamiento] = estado
+			return estado
+
+	@staticmethod
+	def _hay_escritura_ajena(clave_almacenamiento: tuple[Any, ...]) -> bool:
+		"""Otro hilo tiene una escritura en curso sobre el almacenamiento.
+
+		Debe llamarse con `_cerrojo_cache` adquirido.
+		"""
+		escritor = _escritores_en_curso.get(clave_almacenamiento)
+		return escritor is not None and escritor != threading.get_ident()
+
+	@staticmethod
+	def _esperar_escrituras_ajenas(clave_almacenamiento: tuple[Any, ...]) -> None:
+		"""Espera a que termine la escritura de otro hilo antes de leer el almacenamiento.
+
+		Debe llamarse con `_cerrojo_cache` adquirido (se libera mientras se espera).
+		"""
+		while GestorTareas._hay_escritura_ajena(clave_almacenamiento):
+			_condicion_escrituras.wait()
+
+	@staticmethod
+	@contextmanager
+	def _bloquear_escritura(
+		clave_almacenamiento: tuple[Any, ...], almacenamiento: AlmacenamientoTareas
+	) -> Iterator[None]:
+		"""Cerrojos de una escritura, sin retener `_cerrojo_cache` durante la E/S.
+
+		- `_cerrojo_escritura` serializa a los escritores del proceso.
+		- El almacenamiento se marca en escritura antes de tomar su cerrojo
+		  exclusivo: desde entonces las lecturas de otros hilos se sirven del estado
+		  en caché, que solo cambia al publicar lo ya persistido.
+		"""
+		with _cerrojo_escritura:
+			with _cerrojo_cache:
+				escritor_anterior = _escritores_en_curso.get(clave_almacenamiento)
+				_escritores_en_curso[clave_almacenamiento] = threading.get_ident()
+			try:
+				with almacenamiento.bloquear_escritura():
+					yield
+			finally:
+				with _cerrojo_cache:
+					if escritor_anterior is None:
+						del _escritores_en_curso[clave_almacenamiento]
+					else:
+						_escritores_en_curso[clave_almacenamiento] = escritor_anterior
+					_condicion_escrituras.notify_all()
+
+	@staticmethod
+	def _obtener_ventana_commit_agrupado() -> float:
+		"""Ventana del commit agrupado en segundos (0 = desactivado)."""
+		ventana_texto = os.getenv("TAREAS_COMMIT_AGRUPADO_MS", "")
+		try:
+			return max(0.0, float(ventana_texto)) / 1000
+		except ValueError:
+			return 0.0
+
+	@staticmethod
+	def _ejecutar_escritura(operacion: OperacionEscritura) -> Any:
+		"""Ejecuta `operacion` y persiste sus mutaciones.
+
+		Sin commit agrupado se ejecuta como un lote de una sola operación. Con
+		commit agrupado (TAREAS_COMMIT_AGRUPADO_MS > 0) se encola y se espera a que
+		el hilo de vaciado persista el lote que la incluye.
+		"""
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		ventana_segundos = GestorTareas._obtener_ventana_commit_agrupado()
+		if ventana_segundos > 0:
+			return GestorTareas._encolar_escritura(
+				clave_almacenamiento, operacion, ventana_segundos
+			)
+
+		[(resultado, excepcion)] = GestorTareas._ejecutar_lote(clave_almacenamiento, [operacion])
+		if excepcion is not None:
+			raise excepcion
+		return resultado
+
+	@staticmethod
+	def _ejecutar_lote(
+		clave_almacenamiento: tuple[Any, ...], operaciones: list[OperacionEscritura]
+	) -> list[tuple[Any, BaseException | None]]:
+		"""Aplica las operaciones en orden y persiste todas sus mutaciones juntas.
+
+		Devuelve, por operación, (resultado, excepción). Si una operación falla, el
+		resto del lote sigue adelante.
+
+		La lectura-modificación-escritura completa ocurre con el cerrojo exclusivo
+		del almacenamiento: otro proceso no puede escribir entre la lectura del
+		estado y la escritura (por ejemplo, asignar el mismo identificador).
+
+		Las operaciones se aplican a un borrador que se persiste sin retener
+		`_cerrojo_cache`: las lecturas del proceso no esperan el `fsync` y siguen
+		viendo el estado anterior hasta que el lote se publica, ya persistido.
+
+		Si aun así el almacenamiento detecta otra escritura intermedia, lanza
+		`ConflictoEscrituraConcurrente`: se descarta el estado en caché, se recarga
+		y se vuelve a ejecutar el lote completo.
+		"""
+		for numero_intento in range(MAXIMO_INTENTOS_ESCRITURA):
+			with _cerrojo_cache:
+				almacenamiento = GestorTareas._obtener_almacenamiento(clave_almacenamiento)
+			try:
+				with GestorTareas._bloquear_escritura(clave_almacenamiento, almacenamiento):
+					with _cerrojo_cache:
+						estado = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+					borrador = BorradorEstado(estado)
+					mutaciones: list[Mutacion] = []
+					resultados: list[tuple[Any, BaseException | None]] = []
+					for operacion in operaciones:
+						try:
+							resultados.append((operacion(borrador, mutaciones), None))
+						except Exception as error:
+							resultados.append((None, error))
+					if mutaciones:
+						almacenamiento.persistir_mutaciones(borrador, mutaciones)
+
+					with _cerrojo_cache:
+						if mutaciones:
+							borrador.publicar(mutaciones)
+							GestorTareas._obtener_registro_cambios(clave_almacenamiento).registrar(
+								mutaciones
+							)
+						GestorTareas._programar_compactacion(clave_almacenamiento, almacenamiento)
+			except ConflictoEscrituraConcurrente:
+				with _cerrojo_cache:
+					_cache_tareas.pop(clave_almacenamiento, None)
+				if numero_intento == MAXIMO_INTENTOS_ESCRITURA - 1:
+					raise
+				continue
+			except BaseException:
+				# El almacenamiento pudo quedar a medio escribir: se vuelve a leer.
+				with _cerrojo_cache:
+					_cache_tareas.pop(clave_almacenamiento, None)
+				raise
+			return resultados
+		raise AssertionError("inalcanzable")
+
+	@staticmethod
+	def _encolar_escritura(
+		clave_almacenamiento: tuple[Any, ...],
+		operacion: OperacionEscritura,
+		ventana_segundos: float,
+	) -> Any:
+		"""Encola la operación para el próximo lote y espera a que sea duradera."""
+		solicitud = _SolicitudEscritura(operacion)
+		with _cerrojo_commit_agrupado:
+			_solicitudes_pendientes.setdefault(clave_almacenamiento, []).append(solicitud)
+			if clave_almacenamiento not in _vaciados_en_curso:
+				_vaciados_en_curso.add(clave_almacenamiento)
+				hilo_vaciado = threading.Thread(
+					target=GestorTareas._vaciar_solicitudes,
+					args=(clave_almacenamiento, ventana_segundos),
+					daemon=True,
+				)
+				hilo_vaciado.start()
+
+		solicitud.completada.wait()
+		if solicitud.excepcion is not None:
+			raise solicitud.excepcion
+		return solicitud.resultado
+
+	@staticmethod
+	def _vaciar_solicitudes(clave_almacenamiento: tuple[Any, ...], ventana_segundos: float) -> None:
+		"""Hilo de vaciado: persiste las solicitudes pendientes en lotes.
+
+		- Espera la ventana para que se acumulen las solicitudes de la ráfaga.
+		- Persiste todo lo pendiente con una única escritura y despierta a cada
+		  solicitante con su resultado.
+		- Lo que llegó mientras tanto ya esperó una escritura completa: se persiste
+		  enseguida, sin una nueva ventana. Sin pendientes, el hilo termina.
+		"""
+		time.sleep(ventana_segundos)
+		while True:
+			with _cerrojo_commit_agrupado:
+				lote = _solicitudes_pendientes.pop(clave_almacenamiento, [])
+				if not lote:
+					_vaciados_en_curso.discard(clave_almacenamiento)
+					return
+
+			try:
+				resultados = GestorTareas._ejecutar_lote(
+					clave_almacenamiento, [solicitud.operacion for solicitud in lote]
+				)
+			except BaseException as error:
+				# Falló la escritura del lote: ninguna solicitud quedó persistida.
+				resultados = [(None, error)] * len(lote)
+
+			with _cerrojo_commit_agrupado:
+				_metricas_commit_agrupado["lotes"] += 1
+				_metricas_commit_agrupado["escrituras"] += len(lote)
+			for solicitud, (resultado, excepcion) in zip(lote, resultados):
+				solicitud.resultado = resultado
+				solicitud.excepcion = excepcion
+				solicitud.completada.set()
+
 	@staticmethod
 	def cargar_tareas() -> list[Tarea]:
-		"""Carga tareas desde datos/tareas.json.
+		"""Carga tareas desde datos/tareas.json (o el almacenamiento configurado).
 
 		Comportamiento:
 		- Si el archivo no existe, lo crea con contenido [] y devuelve lista vacía.
 		- Si el contenido está vacío o el JSON es inválido, devuelve lista vacía.
 		- Si el contenido es una lista de diccionarios, convierte cada uno a `Tarea`.
+		- Si la firma del almacenamiento no cambió desde la última lectura, se sirve
+		  desde la caché.
+
+		Se devuelven copias: modificar las tareas no altera la caché hasta guardarlas.
 		"""
-		ruta_archivo_tareas = GestorTareas._obtener_ruta_archivo_tareas()
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		with _cerrojo_cache:
+			estado = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+			return _copiar_tareas(estado.tareas.values())
 
-		# Si el archivo no existe, se crea con una lista vacía.
-		if not ruta_archivo_tareas.exists():
-			ruta_archivo_tareas.parent.mkdir(parents=True, exist_ok=True)
-			ruta_archivo_tareas.write_text("[]", encoding="utf-8")
-			return []
+	@staticmethod
+	def consultar_tareas(
+		filtros: dict[str, list[Any]] | None = None,
+		horas_minimas: float | None = None,
+		horas_maximas: float | None = None,
+		ordenar_por: str | None = None,
+		descendente: bool = False,
+		despues_de: tuple[Any, ...] | None = None,
+		limite: int | None = None,
+	) -> list[Tarea]:
+		"""Devuelve copias de las tareas que cumplen los filtros, en el orden pedido.
 
-		# Leemos el contenido como texto. Si está vacío, devolvemos lista vacía.
-		contenido_texto = ruta_archivo_tareas.read_text(encoding="utf-8").strip()
-		if contenido_texto == "":
-			return []
+		- `filtros`: campo de `CAMPOS_FILTRABLES` -> valores aceptados.
+		- `horas_minimas` / `horas_maximas`: rango inclusivo de `horas_estimadas`.
+		- `ordenar_por`: campo de `CAMPOS_ORDENABLES`. Sin orden, filtros ni
+		  paginación se conserva el orden de almacenamiento; si no, el de identificador.
+		- `despues_de` / `limite`: paginación por clave de orden (ver
+		  `IndicesTareas.ordenar()`).
 
-		# Interpretamos el contenido como JSON, tolerando contenido inválido.
-		try:
-			contenido_decodificado: Any = json.loads(contenido_texto)
-		except json.JSONDecodeError:
-			return []
-
-		# El archivo debe contener una lista; si no, se considera vacío.
-		if not isinstance(contenido_decodificado, list):
-			return []
-
-		lista_tareas: list[Tarea] = []
-		for elemento in contenido_decodificado:
-			# Cada elemento debe ser un diccionario con los campos de la tarea.
-			if not isinstance(elemento, dict):
-				continue
-			try:
-				tarea = Tarea.desde_diccionario(elemento)
-			except (KeyError, TypeError, ValueError):
-				# Si algún elemento está mal formado, se ignora sin romper el proceso.
-				continue
-			lista_tareas.append(tarea)
+		Se resuelve con los índices secundarios del estado en caché (ver
+		servicios/indices_tareas.py), sin recorrer todas las tareas.
+		Lanza `ValueError` si un campo no es filtrable u ordenable.
+		"""
+		return list(
+			GestorTareas.iterar_tareas(
+				filtros, horas_minimas, horas_maximas, ordenar_por, descendente, despues_de, limite
+			)
+		)
+
+	@staticmethod
+	def iterar_tareas(
+		filtros: dict[str, list[Any]] | None = None,
+		horas_minimas: float | None = None,
+		horas_maximas: float | None = None,
+		ordenar_por: str | None = None,
+		descendente: bool = False,
+		despues_de: tuple[Any, ...] | None = None,
+		limite: int | None = None,
+	) -> Iterator[Tarea]:
+		"""Como `consultar_tareas()`, pero entregando las tareas una a una.
 
-		return lista_tareas
+		- La consulta se resuelve al crear el iterador (los errores de parámetros se
+		  lanzan enseguida); las copias se crean a medida que se recorre.
+		- Se recorre el estado vigente en ese momento; las escrituras posteriores no
+		  afectan a un recorrido ya iniciado.
+		"""
+		_, tareas_vigentes = GestorTareas._resolver_consulta(
+			filtros, horas_minimas, horas_maximas, ordenar_por, descendente, despues_de, limite
+		)
+		return (copy.copy(tarea) for tarea in tareas_vigentes)
+
+	@staticmethod
+	def iterar_tareas_json(
+		filtros: dict[str, list[Any]] | None = None,
+		horas_minimas: float | None = None,
+		horas_maximas: float | None = None,
+		ordenar_por: str | None = None,
+		descendente: bool = False,
+		despues_de: tuple[Any, ...] | None = None,
+		limite: int | None = None,
+		codificador: CodificadorJson | None = None,
+	) -> Iterator[tuple[Tarea, bytes]]:
+		"""Como `iterar_tareas()`, pero cada copia va con su JSON compacto (bytes).
+
+		El JSON sale de la caché de fragmentos del estado: solo se codifican las
+		tareas creadas o modificadas desde la última vez que se pidieron.
+		`codificador` es el de la aplicación que responde (por defecto, el del
+		proceso); cada codificador tiene sus propios fragmentos.
+		"""
+		estado, tareas_vigentes = GestorTareas._resolver_consulta(
+			filtros, horas_minimas, horas_maximas, ordenar_por, descendente, despues_de, limite
+		)
+		if codificador is None:
+			formato, codificar = None, codificar_tarea_compacta
+		else:
+			formato = f"{FORMATO_COMPACTO}:{codificador.nombre}"
+
+			def codificar(tarea: Tarea) -> bytes:
+				return codificador.codificar(tarea.a_diccionario())
+
+		return (
+			(copy.copy(tarea), estado.obtener_fragmento_json(tarea, formato, codificar))
+			for tarea in tareas_vigentes
+		)
+
+	@staticmethod
+	def buscar_tareas(
+		consulta: str,
+		despues_de: tuple[Any, ...] | None = None,
+		limite: int | None = None,
+	) -> tuple[list[tuple[Tarea, float]], int]:
+		"""Búsqueda de texto completo en `titulo` y `descripcion`.
+
+		- Devuelve ([(copia de la tarea, puntuación), ...], total de coincidencias),
+		  de mayor a menor relevancia (ver servicios/busqueda_tareas.py).
+		- `despues_de` / `limite`: paginación por clave de relevancia
+		  (`calcular_clave_relevancia`).
+
+		Lanza `ValueError` si la consulta no contiene ninguna palabra.
+		"""
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		with _cerrojo_cache:
+			estado = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+			resultados, total = estado.indice_busqueda.buscar(consulta, despues_de, limite)
+			return (
+				[
+					(copy.copy(estado.tareas[identificador]), puntuacion)
+					for identificador, puntuacion in resultados
+				],
+				total,
+			)
+
+	@staticmethod
+	def obtener_estadisticas() -> dict[str, Any]:
+		"""Agregados de las tareas: total, horas y conteos por estado, prioridad, etc.
+
+		Se leen de los contadores del estado (ver servicios/estadisticas_tareas.py),
+		que se ajustan en cada mutación: el costo depende del número de grupos, no
+		del de tareas.
+		"""
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		with _cerrojo_cache:
+			estado = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+			return estado.estadisticas.obtener_resumen()
+
+	@staticmethod
+	def estimar_horas(
+		titulo: Any,
+		descripcion: Any = None,
+		prioridad: Any = None,
+		categoria: Any = None,
+	) -> dict[str, Any] | None:
+		"""Estimación de horas según las tareas guardadas más parecidas.
+
+		Devuelve {"horas", "confianza", "agrupacion", "vecinos"} o None si no hay
+		tareas parecidas suficientes (ver servicios/estimador_horas.py).
+		"""
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		with _cerrojo_cache:
+			estado = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+			return estado.estimador_horas.estimar(titulo, descripcion, prioridad, categoria)
+
+	@staticmethod
+	def _obtener_registro_cambios(clave_almacenamiento: tuple[Any, ...]) -> RegistroCambios:
+		"""Registro de cambios del almacenamiento (se crea al primer uso).
+
+		Debe llamarse con `_cerrojo_cache` adquirido.
+		"""
+		registro = _registros_cambios.get(clave_almacenamiento)
+		if registro is None:
+			registro = RegistroCambios(obtener_limite_cambios())
+			_registros_cambios[clave_almacenamiento] = registro
+		return registro
+
+	@staticmethod
+	def obtener_cambios(
+		desde: int, limite: int | None = None
+	) -> tuple[list[dict[str, Any]] | None, int]:
+		"""Cambios persistidos con secuencia mayor que `desde`.
+
+		- Devuelve (cambios, secuencia actual). Cada cambio es
+		  {"secuencia", "operacion", "identificador", "tarea"} (ver
+		  servicios/registro_cambios.py), en orden de secuencia.
+		- `cambios` es None si ya no se pueden entregar todos (se descartaron, hubo
+		  un reemplazo completo o escrituras de otro proceso fuera de la bitácora):
+		  el llamador debe volver a leer todas las tareas.
+		"""
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		with _cerrojo_cache:
+			estado = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+			registro = GestorTareas._obtener_registro_cambios(clave_almacenamiento)
+			registro.sincronizar(estado.secuencia)
+			mutaciones = registro.obtener_desde(desde, limite)
+			if mutaciones is None and desde < estado.secuencia:
+				GestorTareas._esperar_escrituras_ajenas(clave_almacenamiento)
+				almacenamiento = GestorTareas._obtener_almacenamiento(clave_almacenamiento)
+				with almacenamiento.bloquear_lectura():
+					mutaciones = almacenamiento.leer_mutaciones_desde(desde, estado.secuencia)
+				if mutaciones is not None and limite is not None:
+					mutaciones = mutaciones[:limite]
+			secuencia_actual = estado.secuencia
+
+		if mutaciones is None:
+			return None, secuencia_actual
+		return [convertir_mutacion_a_diccionario(mutacion) for mutacion in mutaciones], secuencia_actual
+
+	@staticmethod
+	def esperar_cambios(
+		desde: int, espera_segundos: float, limite: int | None = None
+	) -> tuple[list[dict[str, Any]] | None, int]:
+		"""Como `obtener_cambios()`, pero si no hay cambios espera hasta que llegue alguno.
+
+		Long-poll: devuelve en cuanto hay cambios (o dejan de estar disponibles) o
+		al cumplirse `espera_segundos`, con la lista vacía.
+		"""
+		instante_limite = time.monotonic() + espera_segundos
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		while True:
+			cambios, secuencia_actual = GestorTareas.obtener_cambios(desde, limite)
+			tiempo_restante = instante_limite - time.monotonic()
+			if cambios is None or cambios or tiempo_restante <= 0:
+				return cambios, secuencia_actual
+
+			with _cerrojo_cache:
+				registro = GestorTareas._obtener_registro_cambios(clave_almacenamiento)
+			with registro.condicion:
+				if registro.ultima_secuencia == secuencia_actual:
+					registro.condicion.wait(min(tiempo_restante, INTERVALO_SONDEO_CAMBIOS_SEGUNDOS))
+
+	@staticmethod
+	def _resolver_consulta(
+		filtros: dict[str, list[Any]] | None,
+		horas_minimas: float | None,
+		horas_maximas: float | None,
+		ordenar_por: str | None,
+		descendente: bool,
+		despues_de: tuple[Any, ...] | None,
+		limite: int | None,
+	) -> tuple[EstadoTareas, list[Tarea]]:
+		"""Estado vigente y referencias (no copias) a las tareas de la consulta."""
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		with _cerrojo_cache:
+			estado = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+			identificadores = estado.indices.filtrar(filtros or {}, horas_minimas, horas_maximas)
+			if (
+				identificadores is None
+				and ordenar_por is None
+				and not descendente
+				and despues_de is None
+				and limite is None
+			):
+				# Las mutaciones reemplazan las tareas del diccionario (no las modifican),
+				# así que basta con fijar las referencias actuales.
+				return estado, list(estado.tareas.values())
+			identificadores_ordenados = estado.indices.ordenar(
+				identificadores, ordenar_por or "identificador", descendente, despues_de, limite
+			)
+			return estado, [estado.tareas[identificador] for identificador in identificadores_ordenados]
 
 	@staticmethod
 	def guardar_tareas(lista_tareas: list[Tarea]) -> None:
 		"""Guarda una lista de objetos `Tarea` en datos/tareas.json.
 
 		- Convierte cada tarea a diccionario con `a_diccionario()`.
-		- Guarda un JSON legible usando indentación.
+		- Guarda un JSON legible usando indentación, escrito en streaming a un
+		  temporal que reemplaza al archivo de forma atómica.
+		- La lista reemplaza todo el estado (en modo bitácora, la bitácora se vacía).
 		"""
 		# Validación mínima del tipo de entrada.
 		if not isinstance(lista_tareas, list):
 			raise TypeError("lista_tareas debe ser una lista")
 
-		lista_diccionarios: list[dict[str, Any]] = []
 		for tarea in lista_tareas:
 			# Se espera recibir instancias de `Tarea`.
 			if not isinstance(tarea, Tarea):
 				raise TypeError("lista_tareas debe contener objetos Tarea")
-			lista_diccionarios.append(tarea.a_diccionario())
 
-		ruta_archivo_tareas = GestorTareas._obtener_ruta_archivo_tareas()
-		ruta_archivo_tareas.parent.mkdir(parents=True, exist_ok=True)
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		with _cerrojo_cache:
+			almacenamiento = GestorTareas._obtener_almacenamiento(clave_almacenamiento)
+		with GestorTareas._bloquear_escritura(clave_almacenamiento, almacenamiento):
+			with _cerrojo_cache:
+				estado_anterior = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+
+			# El contador no retrocede aunque la lista nueva tenga menos tareas.
+			estado = EstadoTareas(
+				indexar_tareas(_copiar_tareas(lista_tareas)),
+				secuencia=estado_anterior.secuencia + 1,
+				ultimo_identificador=max(
+					[estado_anterior.ultimo_identificador]
+					+ [obtener_identificador_numerico(tarea.identificador) for tarea in lista_tareas]
+				),
+			)
+			almacenamiento.persistir_todo(estado)
+
+			with _cerrojo_cache:
+				# Reemplazo completo: no hay cambios individuales que publicar.
+				GestorTareas._obtener_registro_cambios(clave_almacenamiento).sincronizar(
+					estado.secuencia
+				)
+				# Write-through: la caché refleja lo recién escrito sin volver a leer.
+				_cache_tareas[clave_almacenamiento] = estado
 
-		# Guardamos JSON legible (indentación) y con caracteres Unicode intactos.
-		contenido_texto = json.dumps(lista_diccionarios, ensure_ascii=False, indent=4)
-		ruta_archivo_tareas.write_text(contenido_texto, encoding="utf-8")
+	@staticmethod
+	def obtener_por_id(identificador: str) -> Tarea | None:
+		"""Devuelve una copia de la tarea con ese identificador, o None si no existe."""
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		with _cerrojo_cache:
+			estado = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+			tarea = estado.tareas.get(str(identificador))
+			return copy.copy(tarea) if tarea is not None else None
+
+	@staticmethod
+	def obtener_version() -> int:
+		"""Versión del conjunto de tareas: crece con cada escritura.
+
+		Si la caché está vigente solo se comprueba la firma del almacenamiento, sin
+		leer ni decodificar tareas (pensado para peticiones condicionales).
+		"""
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		with _cerrojo_cache:
+			return GestorTareas._obtener_estado_vigente(clave_almacenamiento).secuencia
+
+	@staticmethod
+	def obtener_version_tarea(identificador: str) -> int | None:
+		"""Versión de una tarea (cambia cuando la tarea cambia), o None si no existe."""
+		clave_almacenamiento = GestorTareas._obtener_clave_almacenamiento()
+		with _cerrojo_cache:
+			estado = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+			return estado.obtener_version_tarea(str(identificador))
+
+	@staticmethod
+	def crear(campos_tarea: dict[str, Any]) -> Tarea:
+		"""Crea una tarea con el siguiente identificador del contador y la persiste.
+
+		- `campos_tarea` contiene los argumentos de `Tarea` salvo `identificador`.
+		- La asignación del identificador y la escritura ocurren bajo el mismo cerrojo.
+		"""
+		if not isinstance(campos_tarea, dict):
+			raise TypeError("campos_tarea debe ser un diccionario")
+
+		return GestorTareas._ejecutar_escritura(
+			lambda estado, mutaciones: GestorTareas._crear_en_estado(estado, mutaciones, campos_tarea)
+		)
+
+	@staticmethod
+	def actualizar(identificador: str, campos_actualizados: dict[str, Any]) -> Tarea | None:
+		"""Actualiza parcialmente una tarea y la persiste.
+
+		- Solo se modifican los campos presentes en `campos_actualizados`.
+		- El identificador nunca cambia.
+		- Un campo que no es del modelo lanza `ValueError` (sin modificar nada).
+		- Devuelve la tarea actualizada, o None si no existe.
+		"""
+		if not isinstance(campos_actualizados, dict):
+			raise TypeError("campos_actualizados debe ser un diccionario")
+
+		return GestorTareas._ejecutar_escritura(
+			lambda estado, mutaciones: GestorTareas._actualizar_en_estado(
+				estado, mutaciones, identificador, campos_actualizados
+			)
+		)
+
+	@staticmethod
+	def eliminar(identificador: str) -> bool:
+		"""Elimina la tarea con ese identificador. Devuelve False si no existía."""
+		return GestorTareas._ejecutar_escritura(
+			lambda estado, mutaciones: GestorTareas._eliminar_en_estado(
+				estado, mutaciones, identificador
+			)
+		)
+
+	@staticmethod
+	def crear_varias(lista_campos_tareas: list[dict[str, Any]]) -> list[Tarea | Exception]:
+		"""Crea varias tareas con una sola lectura y una sola escritura.
+
+		Devuelve, en el mismo orden, la tarea creada o la excepción de ese elemento
+		(un elemento inválido no impide crear los demás).
+		"""
+		return GestorTareas._ejecutar_escritura(
+			lambda estado, mutaciones: [
+				GestorTareas._ejecutar_elemento(
+					GestorTareas._crear_en_estado, estado, mutaciones, campos_tarea
+				)
+				for campos_tarea in lista_campos_tareas
+			]
+		)
+
+	@staticmethod
+	def actualizar_varias(
+		actualizaciones: list[tuple[str, dict[str, Any]]],
+	) -> list[Tarea | None | Exception]:
+		"""Aplica varias actualizaciones (identificador, campos) en una sola escritura.
+
+		Devuelve, en orden, la tarea actualizada, None si no existía o la excepción.
+		"""
+		return GestorTareas._ejecutar_escritura(
+			lambda estado, mutaciones: [
+				GestorTareas._ejecutar_elemento(
+					GestorTareas._actualizar_en_estado,
+					estado,
+					mutaciones,
+					identificador,
+					campos_actualizados,
+				)
+				for identificador, campos_actualizados in actualizaciones
+			]
+		)
+
+	@staticmethod
+	def eliminar_varias(identificadores: list[str]) -> list[bool]:
+		"""Elimina varias tareas en una sola escritura. Devuelve, en orden, si existían."""
+		return GestorTareas._ejecutar_escritura(
+			lambda estado, mutaciones: [
+				GestorTareas._eliminar_en_estado(estado, mutaciones, identificador)
+				for identificador in identificadores
+			]
+		)
+
+	@staticmethod
+	def importar_varias(lista_campos_tareas: list[dict[str, Any]]) -> list[tuple[str, Tarea] | Exception]:
+		"""Importa varias tareas conservando su identificador, en una sola escritura.
+
+		- Con `identificador`, la tarea se crea o, si ya existe, se reemplaza (así
+		  una exportación se puede volver a importar sin duplicar nada).
+		- Sin `identificador`, se asigna el siguiente del contador, como en `crear()`.
+		- El contador avanza hasta el mayor identificador numérico importado.
+
+		Devuelve, en orden, ("crear" | "actualizar", tarea) o la excepción del elemento.
+		"""
+		return GestorTareas._ejecutar_escritura(
+			lambda estado, mutaciones: [
+				GestorTareas._ejecutar_elemento(
+					GestorTareas._importar_en_estado, estado, mutaciones, campos_tarea
+				)
+				for campos_tarea in lista_campos_tareas
+			]
+		)
+
+	@staticmethod
+	def _ejecutar_elemento(funcion: Callable[..., Any], *argumentos: Any) -> Any:
+		"""Ejecuta un elemento de un lote devolviendo la excepción en vez de lanzarla."""
+		try:
+			return funcion(*argumentos)
+		except (TypeError, ValueError) as error:
+			return error
+
+	@staticmethod
+	def _crear_en_estado(
+		estado: EstadoTareas, mutaciones: list[Mutacion], campos_tarea: dict[str, Any]
+	) -> Tarea:
+		"""Crea la tarea sobre `estado` con el siguiente identificador del contador."""
+		nueva_tarea = Tarea(identificador=str(estado.ultimo_identificador + 1), **campos_tarea)
+		GestorTareas._aplicar_mutacion(estado, mutaciones, "crear", nueva_tarea)
+		return copy.copy(nueva_tarea)
+
+	@staticmethod
+	def _importar_en_estado(
+		estado: EstadoTareas, mutaciones: list[Mutacion], campos_tarea: dict[str, Any]
+	) -> tuple[str, Tarea]:
+		"""Crea o reemplaza la tarea sobre `estado` conservando su identificador."""
+		campos_tarea = dict(campos_tarea)
+		identificador = campos_tarea.pop("identificador", None)
+		if identificador is None:
+			identificador = estado.ultimo_identificador + 1
+		tarea = Tarea(identificador=str(identificador), **campos_tarea)
+		operacion = "actualizar" if tarea.identificador in estado.tareas else "crear"
+		GestorTareas._aplicar_mutacion(estado, mutaciones, operacion, tarea)
+		return operacion, copy.copy(tarea)
+
+	@staticmethod
+	def _actualizar_en_estado(
+		estado: EstadoTareas,
+		mutaciones: list[Mutacion],
+		identificador: str,
+		campos_actualizados: dict[str, Any],
+	) -> Tarea | None:
+		"""Actualiza la tarea sobre `estado`; None si no existe."""
+		tarea_actual = estado.tareas.get(str(identificador))
+		if tarea_actual is None:
+			return None
+
+		# `Tarea` usa `__slots__`: un campo desconocido se rechaza antes de tocar nada.
+		for campo in campos_actualizados:
+			if campo not in Tarea.__slots__:
+				raise ValueError(f"Campo desconocido: {campo}")
+
+		# Se trabaja sobre una copia: la caché solo cambia vía `_aplicar_mutacion`.
+		tarea_actualizada = copy.copy(tarea_actual)
+		for campo, valor in campos_actualizados.items():
+			if campo != "identificador":
+				setattr(tarea_actualizada, campo, internar_campo(campo, valor))
+
+		GestorTareas._aplicar_mutacion(estado, mutaciones, "actualizar", tarea_actualizada)
+		return copy.copy(tarea_actualizada)
+
+	@staticmethod
+	def _eliminar_en_estado(
+		estado: EstadoTareas, mutaciones: list[Mutacion], identificador: str
+	) -> bool:
+		"""Elimina la tarea de `estado`; False si no existía."""
+		if str(identificador) not in estado.tareas:
+			return False
+		GestorTareas._aplicar_mutacion(estado, mutaciones, "eliminar", str(identificador))
+		return True
+
+	@staticmethod
+	def _aplicar_mutacion(
+		estado: EstadoTareas,
+		mutaciones: list[Mutacion],
+		operacion: str,
+		objetivo: Tarea | str,
+	) -> None:
+		"""Aplica una mutación al borrador del lote y la registra para persistirla.
+
+		`objetivo` es la tarea (crear/actualizar) o el identificador (eliminar).
+		`_ejecutar_lote` persiste todas las mutaciones registradas y recién entonces
+		las publica en el estado en caché.
+		"""
+		estado.secuencia += 1
+		if isinstance(objetivo, Tarea):
+			estado.guardar_tarea(objetivo, version=estado.secuencia)
+			estado.ultimo_identificador = max(
+				estado.ultimo_identificador,
+				obtener_identificador_numerico(objetivo.identificador),
+			)
+		else:
+			estado.quitar_tarea(objetivo)
+		mutaciones.append(Mutacion(estado.secuencia, operacion, objetivo))
+
+	@staticmethod
+	def _programar_compactacion(
+		clave_almacenamiento: tuple[Any, ...], almacenamiento: AlmacenamientoTareas
+	) -> None:
+		"""Lanza un hilo de compactación si el almacenamiento lo pide y no hay otro.
+
+		Debe llamarse con `_cerrojo_cache` adquirido.
+		"""
+		if not almacenamiento.requiere_compactacion():
+			return
+		if clave_almacenamiento in _compactaciones_en_curso:
+			return
+		_compactaciones_en_curso.add(clave_almacenamiento)
+		hilo_compactacion = threading.Thread(
+			target=GestorTareas._compactar_en_segundo_plano,
+			args=(clave_almacenamiento,),
+			daemon=True,
+		)
+		hilo_compactacion.start()
+
+	@staticmethod
+	def _compactar_en_segundo_plano(clave_almacenamiento: tuple[Any, ...]) -> None:
+		"""Punto de entrada del hilo de compactación."""
+		try:
+			GestorTareas._compactar(clave_almacenamiento)
+		except OSError:
+			# Una compactación fallida no pierde datos: la bitácora sigue intacta.
+			pass
+		finally:
+			with _cerrojo_cache:
+				_compactaciones_en_curso.discard(clave_almacenamiento)
+
+	@staticmethod
+	def compactar_bitacora() -> None:
+		"""Incorpora la bitácora al snapshot de forma síncrona (solo JSON en modo bitácora)."""
+		GestorTareas._compactar(GestorTareas._obtener_clave_almacenamiento())
+
+	@staticmethod
+	def _compactar(clave_almacenamiento: tuple[Any, ...]) -> None:
+		"""Compacta en tres fases para no bloquear lecturas ni escrituras.
+
+		La serialización (la parte costosa) se hace sin retener el cerrojo; las
+		mutaciones que llegan mientras tanto se conservan en la cola de la bitácora.
+		La captura y la publicación excluyen a los escritores del proceso, pero no a
+		las lecturas (como en `_ejecutar_lote`).
+		"""
+		# Sin escrituras a medio publicar: la captura y la posición de la bitácora
+		# corresponden a la misma secuencia.
+		with _cerrojo_escritura, _cerrojo_cache:
+			almacenamiento = GestorTareas._obtener_almacenamiento(clave_almacenamiento)
+			estado = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+			captura = almacenamiento.preparar_compactacion(estado)
+
+		almacenamiento.escribir_compactacion(captura)
+
+		with GestorTareas._bloquear_escritura(clave_almacenamiento, almacenamiento):
+			with _cerrojo_cache:
+				estado = GestorTareas._obtener_estado_vigente(clave_almacenamiento)
+			borrador = BorradorEstado(estado)
+			almacenamiento.finalizar_compactacion(borrador, captura)
+			with _cerrojo_cache:
+				borrador.publicar([])
+
+	@staticmethod
+	def obtener_metricas_cache() -> dict[str, int]:
+		"""Devuelve los contadores de aciertos y fallos de la caché de tareas."""
+		with _cerrojo_cache:
+			return dict(_metricas_cache)
+
+	@staticmethod
+	def obtener_metricas_commit_agrupado() -> dict[str, int]:
+		"""Devuelve cuántos lotes se escribieron y cuántas escrituras agruparon."""
+		with _cerrojo_commit_agrupado:
+			return dict(_metricas_commit_agrupado)
+
+	@staticmethod
+	def limpiar_cache() -> None:
+		"""Vacía la caché y reinicia sus contadores (útil en tests).
+
+		También descarta las instancias de almacenamiento (y sus conexiones), como
+		si el proceso arrancara de nuevo.
+		"""
+		with _cerrojo_cache:
+			_cache_tareas.clear()
+			_registros_cambios.clear()
+			for almacenamiento in _almacenamientos.values():
+				almacenamiento.cerrar()
+			_almacenamientos.clear()
+			for nombre_metrica in _metricas_cache:
+				_metricas_cache[nombre_metrica] = 0
+		with _cerrojo_commit_agrupado:
+			for nombre_metrica in _metricas_commit_agrupado:
+				_metricas_commit_agrupado[nombre_metrica] = 0
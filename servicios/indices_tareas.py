@@ -0,0 +1,297 @@
+"""Servicio: índices secundarios de tareas en memoria.
+
+Permiten responder consultas filtradas y ordenadas (GET /tareas?estado=...) sin
+recorrer todas las tareas.
+
+Índices:
+- Invertidos (valor -> conjunto de identificadores) para los campos de
+	`CAMPOS_FILTRABLES`. Los valores se comparan sin distinguir mayúsculas ni
+	espacios en los extremos ("Pendiente" == "pendiente").
+- Ordenados (lista de claves de orden) para los campos de `CAMPOS_ORDENABLES`.
+	Cada uno se construye la primera vez que se usa y desde entonces se mantiene.
+	El de `horas_estimadas` también resuelve los rangos de horas.
+
+Comportamiento:
+- `EstadoTareas` crea los índices al primer uso y los actualiza en cada alta,
+	modificación o baja (ver `EstadoTareas.guardar_tarea()` y `quitar_tarea()`).
+- Mantenerlos cuesta una búsqueda binaria por índice en cada mutación; la
+	inserción en la lista ordenada desplaza memoria, pero no recorre tareas.
+"""
+
+from __future__ import annotations
+
+import bisect
+from typing import Any, Iterable
+
+from modelos.tarea import Tarea
+
+
+CAMPOS_FILTRABLES = ("estado", "prioridad", "asignado_a", "categoria")
+CAMPOS_ORDENABLES = (
+	"identificador",
+	"titulo",
+	"prioridad",
+	"horas_estimadas",
+	"estado",
+	"asignado_a",
+	"categoria",
+)
+
+# Orden natural de las prioridades conocidas; las demás van después, alfabéticamente.
+ORDEN_PRIORIDAD = {"baja": 0, "media": 1, "alta": 2, "urgente": 3}
+
+
+def normalizar_valor_filtro(valor: Any) -> str:
+	"""Forma canónica de un valor de filtro: sin espacios extremos y en minúsculas."""
+	return str(valor).strip().casefold()
+
+
+def clave_identificador(identificador: str) -> tuple[Any, ...]:
+	"""Orden de identificadores: numéricos por valor, el resto después como texto."""
+	try:
+		return (0, int(identificador), identificador)
+	except ValueError:
+		return (1, 0, identificador)
+
+
+def _clave_horas(valor: Any) -> tuple[Any, ...]:
+	"""Las horas numéricas primero (por valor); luego texto y por último vacíos."""
+	if valor is None:
+		return (2, 0.0, "")
+	try:
+		horas = float(valor)
+	except (TypeError, ValueError):
+		return (1, 0.0, str(valor))
+	if horas != horas:
+		# NaN no es comparable: se ordena como texto.
+		return (1, 0.0, str(valor))
+	return (0, horas, "")
+
+
+def _clave_texto(valor: Any) -> tuple[Any, ...]:
+	"""Texto sin distinguir mayúsculas; los vacíos al final."""
+	if valor is None:
+		return (1, "")
+	return (0, normalizar_valor_filtro(valor))
+
+
+def _clave_prioridad(valor: Any) -> tuple[Any, ...]:
+	"""Prioridades conocidas en su orden natural; el resto alfabéticamente."""
+	if valor is None:
+		return (2, 0, "")
+	valor_normalizado = normalizar_valor_filtro(valor)
+	if valor_normalizado in ORDEN_PRIORIDAD:
+		return (0, ORDEN_PRIORIDAD[valor_normalizado], "")
+	return (1, 0, valor_normalizado)
+
+
+def calcular_clave_orden(campo: str, tarea: Tarea) -> tuple[Any, ...]:
+	"""Clave de orden de la tarea para `campo`, desempatando por identificador."""
+	valor = getattr(tarea, campo, None)
+	if campo == "identificador":
+		clave_campo: tuple[Any, ...] = ()
+	elif campo == "horas_estimadas":
+		clave_campo = _clave_horas(valor)
+	elif campo == "prioridad":
+		clave_campo = _clave_prioridad(valor)
+	else:
+		clave_campo = _clave_texto(valor)
+	return (clave_campo, clave_identificador(tarea.identificador))
+
+
+# Tipos de cada posición de la clave de un campo (ver `_clave_horas`, etc.).
+_NUMERO = (int, float)
+_FORMAS_CLAVE_CAMPO: dict[str, tuple[Any, ...]] = {
+	"identificador": (),
+	"horas_estimadas": (int, _NUMERO, str),
+	"prioridad": (int, int, str),
+}
+_FORMA_CLAVE_TEXTO = (int, str)
+_FORMA_CLAVE_IDENTIFICADOR = (int, int, str)
+
+
+def _tiene_forma(valor: Any, tipos: tuple[Any, ...]) -> bool:
+	"""`valor` es una tupla con un elemento de cada tipo (sin booleanos)."""
+	return (
+		isinstance(valor, tuple)
+		and len(valor) == len(tipos)
+		and all(
+			isinstance(elemento, tipo) and not isinstance(elemento, bool)
+			for elemento, tipo in zip(valor, tipos)
+		)
+	)
+
+
+def es_clave_identificador_valida(clave: Any) -> bool:
+	"""`clave` tiene la forma de `clave_identificador()`."""
+	return _tiene_forma(clave, _FORMA_CLAVE_IDENTIFICADOR)
+
+
+def es_clave_orden_valida(campo: str, clave: Any) -> bool:
+	"""`clave` tiene la forma de `calcular_clave_orden(campo, ...)`.
+
+	Las claves que llegan de fuera (cursores) se comprueban antes de compararlas
+	con las del índice: una forma distinta no es comparable.
+	"""
+	if campo not in CAMPOS_ORDENABLES or not isinstance(clave, tuple) or len(clave) != 2:
+		return False
+	clave_campo, clave_tarea = clave
+	forma_campo = _FORMAS_CLAVE_CAMPO.get(campo, _FORMA_CLAVE_TEXTO)
+	return _tiene_forma(clave_campo, forma_campo) and es_clave_identificador_valida(clave_tarea)
+
+
+class IndicesTareas:
+	"""Índices invertidos y ordenados sobre un diccionario de tareas."""
+
+	def __init__(self, tareas: dict[str, Tarea]) -> None:
+		# Referencia (no copia) a las tareas del estado, para construir índices
+		# ordenados bajo demanda.
+		self._tareas = tareas
+		self._identificadores_por_valor: dict[str, dict[str, set[str]]] = {
+			campo: {} for campo in CAMPOS_FILTRABLES
+		}
+		self._claves_ordenadas: dict[str, list[tuple[Any, ...]]] = {}
+		for tarea in tareas.values():
+			self._agregar_a_invertidos(tarea)
+
+	def _agregar_a_invertidos(self, tarea: Tarea) -> None:
+		for campo in CAMPOS_FILTRABLES:
+			valor = getattr(tarea, campo, None)
+			if valor is None:
+				continue
+			identificadores = self._identificadores_por_valor[campo].setdefault(
+				normalizar_valor_filtro(valor), set()
+			)
+			identificadores.add(tarea.identificador)
+
+	def agregar(self, tarea: Tarea) -> None:
+		"""Incorpora una tarea nueva (o la versión nueva de una modificada)."""
+		self._agregar_a_invertidos(tarea)
+		for campo, claves in self._claves_ordenadas.items():
+			bisect.insort(claves, calcular_clave_orden(campo, tarea))
+
+	def quitar(self, tarea: Tarea) -> None:
+		"""Retira una tarea (la versión que estaba indexada)."""
+		for campo in CAMPOS_FILTRABLES:
+			valor = getattr(tarea, campo, None)
+			if valor is None:
+				continue
+			valor_normalizado = normalizar_valor_filtro(valor)
+			identificadores = self._identificadores_por_valor[campo].get(valor_normalizado)
+			if identificadores is None:
+				continue
+			identificadores.discard(tarea.identificador)
+			if not identificadores:
+				del self._identificadores_por_valor[campo][valor_normalizado]
+
+		for campo, claves in self._claves_ordenadas.items():
+			clave = calcular_clave_orden(campo, tarea)
+			posicion = bisect.bisect_left(claves, clave)
+			if posicion < len(claves) and claves[posicion] == clave:
+				del claves[posicion]
+
+	def _obtener_claves_ordenadas(self, campo: str) -> list[tuple[Any, ...]]:
+		"""Índice ordenado de `campo` (se construye la primera vez)."""
+		claves = self._claves_ordenadas.get(campo)
+		if claves is None:
+			claves = sorted(calcular_clave_orden(campo, tarea) for tarea in self._tareas.values())
+			self._claves_ordenadas[campo] = claves
+		return claves
+
+	def filtrar(
+		self,
+		filtros: dict[str, Iterable[Any]],
+		horas_minimas: float | None = None,
+		horas_maximas: float | None = None,
+	) -> set[str] | None:
+		"""Identificadores que cumplen todos los filtros, o None si no hay filtros.
+
+		- `filtros`: campo -> valores aceptados (basta con coincidir con uno).
+		- `horas_minimas` / `horas_maximas`: rango inclusivo sobre `horas_estimadas`
+		  (las horas no numéricas quedan fuera de cualquier rango).
+		"""
+		conjuntos: list[set[str]] = []
+		for campo, valores in filtros.items():
+			if campo not in CAMPOS_FILTRABLES:
+				raise ValueError(f"Campo no filtrable: {campo}")
+			identificadores: set[str] = set()
+			for valor in valores:
+				identificadores |= self._identificadores_por_valor[campo].get(
+					normalizar_valor_filtro(valor), set()
+				)
+			conjuntos.append(identificadores)
+
+		if horas_minimas is not None or horas_maximas is not None:
+			claves = self._obtener_claves_ordenadas("horas_estimadas")
+			# Las claves numéricas son ((0, horas, ""), clave_identificador).
+			inicio = bisect.bisect_left(
+				claves, ((0, horas_minimas if horas_minimas is not None else float("-inf"), ""),)
+			)
+			fin = bisect.bisect_left(
+				claves, ((0, horas_maximas if horas_maximas is not None else float("inf"), "\uffff"),)
+			)
+			conjuntos.append({clave[1][2] for clave in claves[inicio:fin]})
+
+		if not conjuntos:
+			return None
+		# Se intersecta empezando por el conjunto más pequeño.
+		conjuntos.sort(key=len)
+		resultado = set(conjuntos[0])
+		for conjunto in conjuntos[1:]:
+			resultado &= conjunto
+			if not resultado:
+				break
+		return resultado
+
+	def ordenar(
+		self,
+		identificadores: set[str] | None,
+		campo: str,
+		descendente: bool = False,
+		despues_de: tuple[Any, ...] | None = None,
+		limite: int | None = None,
+	) -> list[str]:
+		"""Identificadores en el orden de `campo`.
+
+		- Con `identificadores=None` se devuelven todos.
+		- `despues_de`: clave de orden (ver `calcular_clave_orden`) a partir de la
+		  cual continuar, sin incluirla. Es la base de la paginación por cursor:
+		  una página no se desplaza aunque se creen o borren tareas anteriores.
+		  Si viene de fuera, se valida antes con `es_clave_orden_valida`.
+		- `limite`: máximo de identificadores a devolver.
+
+		Si el subconjunto es pequeño se ordena directamente; si no, se recorre el
+		índice ordenado desde `despues_de` y se para al llegar a `limite`.
+		"""
+		if campo not in CAMPOS_ORDENABLES:
+			raise ValueError(f"Campo no ordenable: {campo}")
+
+		if identificadores is not None and len(identificadores) * 8 < len(self._tareas):
+			claves_subconjunto = sorted(
+				(calcular_clave_orden(campo, self._tareas[identificador]) for identificador in identificadores),
+				reverse=descendente,
+			)
+			if despues_de is not None:
+				claves_subconjunto = [
+					clave
+					for clave in claves_subconjunto
+					if (clave < despues_de if descendente else clave > despues_de)
+				]
+			return [clave[1][2] for clave in claves_subconjunto[:limite]]
+
+		claves = self._obtener_claves_ordenadas(campo)
+		if descendente:
+			fin = len(claves) if despues_de is None else bisect.bisect_left(claves, despues_de)
+			posiciones: Iterable[int] = range(fin - 1, -1, -1)
+		else:
+			inicio = 0 if despues_de is None else bisect.bisect_right(claves, despues_de)
+			posiciones = range(inicio, len(claves))
+
+		resultado: list[str] = []
+		for posicion in posiciones:
+			if limite is not None and len(resultado) >= limite:
+				break
+			identificador = claves[posicion][1][2]
+			if identificadores is None or identificador in identificadores:
+				resultado.append(identificador)
+		return resultado
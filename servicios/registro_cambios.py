@@ -0,0 +1,124 @@
+"""Servicio: registro de cambios (change feed) de las tareas.
+
+Guarda en memoria las últimas mutaciones persistidas, cada una con su número de
+secuencia, para que GET /tareas/cambios?desde=<n> entregue solo lo que cambió
+desde la secuencia `n` en lugar de la lista completa.
+
+Comportamiento:
+- `GestorTareas` registra las mutaciones de cada lote después de persistirlas:
+	un cambio publicado ya es duradero.
+- El registro está acotado (TAREAS_CAMBIOS_LIMITE, por defecto 10000): los
+	cambios más antiguos se descartan.
+- Si la secuencia avanza sin pasar por el registro (otro proceso escribió,
+	`guardar_tareas()` reemplazó todo o se recargó el almacenamiento), el registro
+	se vacía y se reinicia en la secuencia actual: no se pueden inventar los
+	cambios que faltan. Quien pida desde antes recibe "no disponible" y debe
+	volver a leer la lista completa.
+- En modo bitácora, lo que ya no está en memoria se busca en la bitácora en
+	disco (ver `AlmacenamientoTareas.leer_mutaciones_desde()`).
+- `condicion` se notifica con cada registro: las consultas de long-poll y SSE
+	esperan sobre ella en lugar de sondear en bucle.
+
+Variables de entorno:
+- TAREAS_CAMBIOS_LIMITE (opcional): número máximo de cambios en memoria.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import deque
+from typing import Any
+
+from modelos.tarea import Tarea
+from servicios.almacenamiento_tareas import Mutacion
+
+
+LIMITE_CAMBIOS_POR_DEFECTO = 10000
+
+
+def obtener_limite_cambios() -> int:
+	"""Capacidad del registro en memoria (TAREAS_CAMBIOS_LIMITE)."""
+	try:
+		return max(1, int(os.getenv("TAREAS_CAMBIOS_LIMITE", "")))
+	except ValueError:
+		return LIMITE_CAMBIOS_POR_DEFECTO
+
+
+def convertir_mutacion_a_diccionario(mutacion: Mutacion) -> dict[str, Any]:
+	"""Representación de un cambio para la API.
+
+	{"secuencia": 7, "operacion": "actualizar", "identificador": "3", "tarea": {...}}
+	(`tarea` es null al eliminar).
+	"""
+	if isinstance(mutacion.objetivo, Tarea):
+		identificador = mutacion.objetivo.identificador
+		tarea = mutacion.objetivo.a_diccionario()
+	else:
+		identificador = mutacion.objetivo
+		tarea = None
+	return {
+		"secuencia": mutacion.secuencia,
+		"operacion": mutacion.operacion,
+		"identificador": identificador,
+		"tarea": tarea,
+	}
+
+
+class RegistroCambios:
+	"""Cambios recientes de un almacenamiento, en orden de secuencia."""
+
+	def __init__(self, capacidad: int) -> None:
+		self._cambios: deque[Mutacion] = deque(maxlen=capacidad)
+		# Secuencia del último cambio conocido; None hasta la primera sincronización.
+		self._ultima_secuencia: int | None = None
+		self.condicion = threading.Condition()
+
+	@property
+	def ultima_secuencia(self) -> int | None:
+		return self._ultima_secuencia
+
+	def _reiniciar(self, secuencia: int) -> None:
+		self._cambios.clear()
+		self._ultima_secuencia = secuencia
+		self.condicion.notify_all()
+
+	def sincronizar(self, secuencia_actual: int) -> None:
+		"""Ajusta el registro a la secuencia del estado vigente.
+
+		Si no coincide con el último cambio registrado, faltan cambios que no
+		pasaron por este proceso: el registro se reinicia en `secuencia_actual`.
+		"""
+		with self.condicion:
+			if self._ultima_secuencia != secuencia_actual:
+				self._reiniciar(secuencia_actual)
+
+	def registrar(self, mutaciones: list[Mutacion]) -> None:
+		"""Agrega las mutaciones de un lote ya persistido y despierta a los que esperan."""
+		if not mutaciones:
+			return
+		with self.condicion:
+			if (
+				self._ultima_secuencia is not None
+				and mutaciones[0].secuencia != self._ultima_secuencia + 1
+			):
+				# Hubo escrituras intermedias que no se registraron aquí.
+				self._cambios.clear()
+			self._cambios.extend(mutaciones)
+			self._ultima_secuencia = mutaciones[-1].secuencia
+			self.condicion.notify_all()
+
+	def obtener_desde(self, desde: int, limite: int | None = None) -> list[Mutacion] | None:
+		"""Cambios con secuencia mayor que `desde`, o None si no están todos en memoria."""
+		with self.condicion:
+			if self._ultima_secuencia is None or desde > self._ultima_secuencia:
+				return None
+			primera_secuencia = (
+				self._cambios[0].secuencia if self._cambios else self._ultima_secuencia + 1
+			)
+			if desde < primera_secuencia - 1:
+				return None
+			# Las secuencias son consecutivas: la posición se calcula sin buscar.
+			inicio = desde + 1 - primera_secuencia
+			fin = len(self._cambios) if limite is None else min(len(self._cambios), inicio + limite)
+			return [self._cambios[posicion] for posicion in range(inicio, fin)]
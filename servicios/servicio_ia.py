@@ -11,14 +11,22 @@ Reglas obligatorias de este paso:
 
 from __future__ import annotations
 
+import contextvars
+import math
 import os
 import re
-from typing import Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
 
-try:
-	from openai import OpenAI
-except Exception:  # pragma: no cover
-	OpenAI = None  # type: ignore[assignment]
+from servicios.agrupador_consultas import AgrupadorConsultas
+from servicios import clasificador_categorias, estimador_horas
+from servicios.busqueda_tareas import normalizar_texto_busqueda
+from servicios.cache_ia import calcular_clave_cache, obtener_cache_ia, se_omite_cache_ia
+from servicios.clientes_openai import API_CHAT, API_RESPONSES, obtener_cliente_openai
+from servicios.codificador_json import obtener_codificador_json
+from servicios.gestor_tareas import GestorTareas
 
 
 CATEGORIAS_PERMITIDAS = [
@@ -34,7 +42,24 @@ CATEGORIAS_PERMITIDAS = [
 ]
 
 
+# Campos que completa /ai/tareas/enrich, en el orden en que se piden al modelo.
+CAMPOS_ENRIQUECIMIENTO = [
+	"descripcion",
+	"categoria",
+	"horas_estimadas",
+	"analisis_riesgo",
+	"mitigacion_riesgo",
+]
+
+
 NOMBRE_MODELO_POR_DEFECTO = "gpt-4o-mini"
+CONCURRENCIA_LOTE_POR_DEFECTO = 8
+
+_agrupador_consultas = AgrupadorConsultas()
+
+# Pools de hilos para los endpoints por lote, uno por límite de concurrencia.
+_pools_lote: dict[int, ThreadPoolExecutor] = {}
+_cerrojo_pools_lote = threading.Lock()
 
 
 def _obtener_configuracion_openai() -> tuple[str, str]:
@@ -47,24 +72,78 @@ def _obtener_configuracion_openai() -> tuple[str, str]:
 	return api_key, nombre_modelo
 
 
-def _obtener_cliente_openai() -> Any:
-	if OpenAI is None:
-		raise RuntimeError("Falta instalar la dependencia 'openai'")
-
-	api_key, _nombre_modelo = _obtener_configuracion_openai()
-	return OpenAI(api_key=api_key)
-
-
-def _consultar_openai(texto_sistema: str, texto_usuario: str, temperatura: float = 0.2) -> str:
-	"""Consulta OpenAI y devuelve texto plano.
+def _consultar_openai(
+	texto_sistema: str,
+	texto_usuario: str,
+	temperatura: float = 0.2,
+	formato_json: bool = False,
+	es_valida: Callable[[str], bool] | None = None,
+) -> str:
+	"""Consulta OpenAI y devuelve texto plano, pasando por la caché de respuestas.
+
+	- La clave es el hash de (modelo, texto de sistema, texto de usuario,
+	  temperatura y, si se pide, el formato JSON); ver servicios/cache_ia.py.
+	- Con `formato_json` se pide al modelo un objeto JSON (el texto de sistema
+	  debe mencionarlo); el texto devuelto sigue sin validar.
+	- Solo se cachean las respuestas no vacías que `es_valida` acepta (si se
+	  indica): una respuesta que el llamador rechaza (p. ej. horas que no son un
+	  número) no se repite desde la caché en las consultas siguientes. Por lo
+	  mismo, una respuesta guardada que `es_valida` rechaza cuenta como fallo.
+	- Si la solicitud pidió omitir la caché, se consulta al proveedor y la
+	  respuesta nueva reemplaza a la guardada.
+	- Las consultas iguales que coinciden en el tiempo comparten una sola llamada
+	  al proveedor (y su resultado o su error); ver servicios/agrupador_consultas.py.
+	"""
+	api_key, nombre_modelo = _obtener_configuracion_openai()
+	cache = obtener_cache_ia()
+	clave = calcular_clave_cache(
+		nombre_modelo, texto_sistema, texto_usuario, temperatura, "json" if formato_json else None
+	)
+	if se_omite_cache_ia():
+		cache.registrar_omision()
+	else:
+		respuesta = cache.obtener(clave)
+		if respuesta is not None and (es_valida is None or es_valida(respuesta)):
+			return respuesta
+
+	def _consultar_y_guardar() -> str:
+		respuesta = _consultar_proveedor_openai(
+			api_key, nombre_modelo, texto_sistema, texto_usuario, temperatura, formato_json
+		)
+		# Una respuesta vacía o inválida no sirve a ningún endpoint: no se cachea.
+		if respuesta != "" and (es_valida is None or es_valida(respuesta)):
+			cache.guardar(clave, respuesta)
+		return respuesta
+
+	return _agrupador_consultas.ejecutar(clave, _consultar_y_guardar)
+
+
+def obtener_metricas_agrupacion() -> dict[str, int]:
+	"""Consultas al proveedor ejecutadas, agrupadas con otra igual en curso y en curso."""
+	return _agrupador_consultas.obtener_metricas()
+
+
+def _consultar_proveedor_openai(
+	api_key: str,
+	nombre_modelo: str,
+	texto_sistema: str,
+	texto_usuario: str,
+	temperatura: float,
+	formato_json: bool = False,
+) -> str:
+	"""Consulta OpenAI (sin caché) y devuelve texto plano.
 
 	- Usa Responses API si está disponible.
 	- Fallback a Chat Completions en versiones antiguas.
+	- Con `formato_json` activa el modo JSON del proveedor (respuesta con un objeto JSON).
+	- El cliente (y su pool de conexiones) se comparte entre consultas; ver
+	  servicios/clientes_openai.py.
 	"""
-	_cliente = _obtener_cliente_openai()
-	_api_key, nombre_modelo = _obtener_configuracion_openai()
+	cliente_openai = obtener_cliente_openai(api_key)
+	_cliente = cliente_openai.cliente
 	try:
-		if hasattr(_cliente, "responses"):
+		if API_RESPONSES in cliente_openai.apis:
+			argumentos_formato = {"text": {"format": {"type": "json_object"}}} if formato_json else {}
 			respuesta = _cliente.responses.create(
 				model=nombre_modelo,
 				input=[
@@ -72,12 +151,14 @@ def _consultar_openai(texto_sistema: str, texto_usuario: str, temperatura: float
 					{"role": "user", "content": texto_usuario},
 				],
 				temperature=temperatura,
+				**argumentos_formato,
 			)
 			texto = getattr(respuesta, "output_text", None)
 			if isinstance(texto, str) and texto.strip() != "":
 				return texto.strip()
 
-		if hasattr(_cliente, "chat") and hasattr(_cliente.chat, "completions"):
+		if API_CHAT in cliente_openai.apis:
+			argumentos_formato = {"response_format": {"type": "json_object"}} if formato_json else {}
 			respuesta = _cliente.chat.completions.create(
 				model=nombre_modelo,
 				messages=[
@@ -85,6 +166,7 @@ def _consultar_openai(texto_sistema: str, texto_usuario: str, temperatura: float
 					{"role": "user", "content": texto_usuario},
 				],
 				temperature=temperatura,
+				**argumentos_formato,
 			)
 			contenido = respuesta.choices[0].message.content
 			return (contenido or "").strip()
@@ -108,11 +190,59 @@ def _consultar_openai(texto_sistema: str, texto_usuario: str, temperatura: float
 		raise RuntimeError(f"Error al consultar el proveedor de IA{mensaje_extra}") from excepcion
 
 
+def obtener_concurrencia_lote() -> int:
+	"""Consultas simultáneas de los endpoints por lote (OPENAI_CONCURRENCIA_LOTE)."""
+	try:
+		return max(1, int(os.getenv("OPENAI_CONCURRENCIA_LOTE", "")))
+	except ValueError:
+		return CONCURRENCIA_LOTE_POR_DEFECTO
+
+
+def _obtener_pool_lote() -> ThreadPoolExecutor:
+	"""Pool compartido por todas las solicitudes: el límite es del proceso, no de cada lote."""
+	concurrencia = obtener_concurrencia_lote()
+	with _cerrojo_pools_lote:
+		pool = _pools_lote.get(concurrencia)
+		if pool is None:
+			pool = ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix="lote_ia")
+			_pools_lote[concurrencia] = pool
+		return pool
+
+
+def procesar_en_paralelo(funcion: Callable[[Any], Any], elementos: list[Any]) -> list[Any]:
+	"""Aplica `funcion` a cada elemento en el pool de lotes, conservando el orden.
+
+	- Como mucho OPENAI_CONCURRENCIA_LOTE elementos (de todas las solicitudes) se
+	  procesan a la vez; el resto espera su turno en la cola del pool.
+	- Cada elemento se procesa con una copia del contexto de quien llama (p. ej.
+	  `Cache-Control: no-cache` de la solicitud).
+	- Si `funcion` lanza una excepción con un elemento, esa excepción ocupa su
+	  posición en el resultado: un elemento con error no interrumpe a los demás.
+	"""
+	pool = _obtener_pool_lote()
+	futuros = [
+		pool.submit(contextvars.copy_context().run, funcion, elemento) for elemento in elementos
+	]
+	resultados: list[Any] = []
+	for futuro in futuros:
+		try:
+			resultados.append(futuro.result())
+		except Exception as excepcion:
+			resultados.append(excepcion)
+	return resultados
+
+
 def _normalizar_categoria(texto: str, categorias_permitidas: list[str]) -> str:
+	categoria = _buscar_categoria(texto, categorias_permitidas)
+	return categoria if categoria is not None else "Otro"
+
+
+def _buscar_categoria(texto: str, categorias_permitidas: list[str]) -> str | None:
+	"""Categoría permitida reconocida en `texto`, o None si no se reconoce ninguna."""
 	texto_normalizado = (texto or "").strip().strip('"').strip("'").strip()
 	texto_normalizado = texto_normalizado.rstrip(".:")
 	if texto_normalizado == "":
-		return "Otro"
+		return None
 
 	# Coincidencia exacta (ignorando mayúsculas/minúsculas).
 	for categoria in categorias_permitidas:
@@ -125,10 +255,10 @@ def _normalizar_categoria(texto: str, categorias_permitidas: list[str]) -> str:
 			return categoria
 
 	# Permitir variantes sin acentos para "Documentación".
-	if texto_normalizado.casefold() == "documentacion":
+	if texto_normalizado.casefold() == "documentacion" and "Documentación" in categorias_permitidas:
 		return "Documentación"
 
-	return "Otro"
+	return None
 
 
 def generar_respuesta_prueba(texto_entrada: str) -> str:
@@ -180,10 +310,74 @@ def obtener_categoria_simulada(titulo: str, descripcion: str | None = None) -> s
 	if descripcion is not None and descripcion.strip() != "":
 		texto_usuario += "\nDescripción: " + descripcion.strip()
 
-	respuesta = _consultar_openai(texto_sistema=texto_sistema, texto_usuario=texto_usuario)
+	respuesta = _consultar_openai(
+		texto_sistema=texto_sistema,
+		texto_usuario=texto_usuario,
+		es_valida=lambda texto: _buscar_categoria(texto, CATEGORIAS_PERMITIDAS) is not None,
+	)
 	return _normalizar_categoria(respuesta, CATEGORIAS_PERMITIDAS)
 
 
+def _obtener_ruta_clasificador() -> Path:
+	"""Archivo del modelo de categorías (TAREAS_CLASIFICADOR_PATH o junto a las tareas)."""
+	ruta_override = os.getenv("TAREAS_CLASIFICADOR_PATH")
+	if isinstance(ruta_override, str) and ruta_override.strip() != "":
+		return Path(ruta_override).expanduser().resolve()
+	return GestorTareas._obtener_ruta_archivo_tareas().with_name("clasificador_categorias.json")
+
+
+def _obtener_ejemplos_categorias() -> list[tuple[str, str | None, str]]:
+	"""(título, descripción, categoría) de las tareas guardadas que ya tienen categoría."""
+	ejemplos = []
+	for tarea in GestorTareas.cargar_tareas():
+		if tarea.categoria is None or str(tarea.categoria).strip() == "":
+			continue
+		categoria = _normalizar_categoria(str(tarea.categoria), CATEGORIAS_PERMITIDAS)
+		ejemplos.append((tarea.titulo, tarea.descripcion, categoria))
+	return ejemplos
+
+
+def clasificar_categoria_local(
+	titulo: str, descripcion: str | None = None
+) -> tuple[str, float, str] | None:
+	"""Clasifica sin consultar al proveedor (ver servicios/clasificador_categorias.py).
+
+	Retorna:
+	- (categoría, confianza, origen) si las reglas o el modelo local superan el
+	  umbral; `origen` es "reglas" o "modelo_local".
+	- None si no hay confianza suficiente (o el modelo guardado no se puede leer):
+	  corresponde consultar al proveedor.
+	"""
+	if not isinstance(titulo, str):
+		raise TypeError("titulo debe ser una cadena")
+
+	try:
+		modelo = clasificador_categorias.obtener_modelo(
+			_obtener_ruta_clasificador(), _obtener_ejemplos_categorias, GestorTareas.obtener_version
+		)
+	except (OSError, ValueError, KeyError, TypeError):
+		# Un modelo ilegible no debe impedir categorizar: quedan las reglas.
+		modelo = None
+	return clasificador_categorias.clasificar(
+		titulo, descripcion, modelo, clasificador_categorias.obtener_umbral_confianza()
+	)
+
+
+def reentrenar_clasificador_categorias() -> dict[str, Any]:
+	"""Reentrena el modelo local con las tareas guardadas y lo guarda en disco.
+
+	Retorna un resumen: {"ruta", "ejemplos", "por_categoria"}; sin datos
+	suficientes `ejemplos` es 0 y solo se aplican las reglas.
+	"""
+	ruta_modelo = _obtener_ruta_clasificador()
+	modelo = clasificador_categorias.reentrenar(ruta_modelo, _obtener_ejemplos_categorias())
+	return {
+		"ruta": str(ruta_modelo),
+		"ejemplos": modelo.cantidad_ejemplos if modelo is not None else 0,
+		"por_categoria": dict(sorted(modelo.documentos_por_categoria.items())) if modelo is not None else {},
+	}
+
+
 def obtener_estimacion_simulada(titulo: str, descripcion: str | None = None) -> str:
 	"""Devuelve una estimación de horas para una tarea usando IA.
 
@@ -204,7 +398,34 @@ def obtener_estimacion_simulada(titulo: str, descripcion: str | None = None) ->
 	if descripcion is not None and descripcion.strip() != "":
 		texto_usuario += "\nDescripción: " + descripcion.strip()
 
-	return _consultar_openai(texto_sistema=texto_sistema, texto_usuario=texto_usuario)
+	return _consultar_openai(
+		texto_sistema=texto_sistema,
+		texto_usuario=texto_usuario,
+		es_valida=lambda texto: extraer_primer_numero_como_float(texto) is not None,
+	)
+
+
+def estimar_horas_local(
+	titulo: str,
+	descripcion: str | None = None,
+	prioridad: str | None = None,
+	categoria: str | None = None,
+) -> dict[str, Any] | None:
+	"""Estima horas con el histórico de tareas guardadas, sin consultar al modelo.
+
+	Retorna:
+	- {"horas", "confianza", "agrupacion", "vecinos"} si la confianza alcanza el
+	  umbral (ver servicios/estimador_horas.py).
+	- None si no hay tareas parecidas suficientes o la confianza es baja:
+	  corresponde consultar al modelo.
+	"""
+	if not isinstance(titulo, str):
+		raise TypeError("titulo debe ser una cadena")
+
+	estimacion = GestorTareas.estimar_horas(titulo, descripcion, prioridad, categoria)
+	if estimacion is None or estimacion["confianza"] < estimador_horas.obtener_umbral_confianza():
+		return None
+	return estimacion
 
 
 def extraer_primer_numero_como_float(texto: str) -> float | None:
@@ -336,7 +557,11 @@ def generar_categoria_tarea(tarea: dict[str, Any], categorias_permitidas: list[s
 	if descripcion != "":
 		texto_usuario += "\nDescripción: " + descripcion
 
-	respuesta = _consultar_openai(texto_sistema=texto_sistema, texto_usuario=texto_usuario)
+	respuesta = _consultar_openai(
+		texto_sistema=texto_sistema,
+		texto_usuario=texto_usuario,
+		es_valida=lambda texto: _buscar_categoria(texto, categorias_permitidas) is not None,
+	)
 	return _normalizar_categoria(respuesta, categorias_permitidas)
 
 
@@ -360,4 +585,184 @@ def generar_estimacion_horas(tarea: dict[str, Any]) -> str:
 	if prioridad != "":
 		texto_usuario += "\nPrioridad: " + prioridad
 
-	return _consultar_openai(texto_sistema=texto_sistema, texto_usuario=texto_usuario)
+	return _consultar_openai(
+		texto_sistema=texto_sistema,
+		texto_usuario=texto_usuario,
+		es_valida=lambda texto: extraer_primer_numero_como_float(texto) is not None,
+	)
+
+
+# Qué se pide al modelo para cada campo de CAMPOS_ENRIQUECIMIENTO.
+_INSTRUCCIONES_CAMPOS = {
+	"descripcion": "descripción clara de la tarea, en 2 a 5 oraciones",
+	"categoria": "exactamente una de estas categorías: " + ", ".join(CATEGORIAS_PERMITIDAS),
+	"horas_estimadas": "horas de trabajo estimadas, como número JSON (por ejemplo 2.5)",
+	"analisis_riesgo": "análisis de riesgo breve y útil, en 2 a 4 oraciones",
+	"mitigacion_riesgo": (
+		"de 3 a 6 acciones concretas que mitiguen el riesgo analizado, "
+		"en una sola línea separadas por punto y coma"
+	),
+}
+
+# Datos de la tarea que se envían como contexto, con su etiqueta.
+_CONTEXTO_TAREA = [
+	("titulo", "Título"),
+	("descripcion", "Descripción"),
+	("prioridad", "Prioridad"),
+	("estado", "Estado"),
+	("asignado_a", "Asignado a"),
+	("categoria", "Categoría"),
+	("horas_estimadas", "Horas estimadas"),
+	("analisis_riesgo", "Análisis de riesgo"),
+	("mitigacion_riesgo", "Mitigación de riesgo"),
+]
+
+
+def _validar_texto(valor: Any) -> tuple[Any, str | None]:
+	if not isinstance(valor, str) or valor.strip() == "":
+		return None, "debe ser un texto no vacío"
+	return valor.strip(), None
+
+
+def _validar_categoria(valor: Any) -> tuple[Any, str | None]:
+	# A diferencia de `_normalizar_categoria`, no se recurre a "Otro": una categoría
+	# fuera de la lista es un error que se repara.
+	if isinstance(valor, str):
+		texto = normalizar_texto_busqueda(valor.strip().strip('"').strip("'").strip().rstrip(".:"))
+		for categoria in CATEGORIAS_PERMITIDAS:
+			if texto == normalizar_texto_busqueda(categoria):
+				return categoria, None
+	return None, "debe ser una de: " + ", ".join(CATEGORIAS_PERMITIDAS)
+
+
+def _validar_horas(valor: Any) -> tuple[Any, str | None]:
+	horas = None
+	if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+		horas = float(valor)
+	elif isinstance(valor, str):
+		try:
+			horas = float(valor.strip().replace(",", "."))
+		except ValueError:
+			horas = None
+	if horas is None or math.isnan(horas) or math.isinf(horas) or horas <= 0:
+		return None, "debe ser un número de horas mayor que 0"
+	return horas, None
+
+
+_VALIDADORES_CAMPOS: dict[str, Callable[[Any], tuple[Any, str | None]]] = {
+	"descripcion": _validar_texto,
+	"categoria": _validar_categoria,
+	"horas_estimadas": _validar_horas,
+	"analisis_riesgo": _validar_texto,
+	"mitigacion_riesgo": _validar_texto,
+}
+
+
+def _extraer_objeto_json(texto: str) -> dict[str, Any] | None:
+	"""Objeto JSON de la respuesta, tolerando texto o bloques ``` alrededor."""
+	codificador = obtener_codificador_json()
+	candidatos = [texto]
+	inicio, fin = texto.find("{"), texto.rfind("}")
+	if 0 <= inicio < fin:
+		candidatos.append(texto[inicio : fin + 1])
+	for candidato in candidatos:
+		try:
+			objeto = codificador.decodificar(candidato)
+		except ValueError:
+			continue
+		if isinstance(objeto, dict):
+			return objeto
+	return None
+
+
+def _validar_campos(respuesta: str, campos: list[str]) -> tuple[dict[str, Any], dict[str, str]]:
+	"""(valores válidos, motivo de cada campo inválido) de una respuesta del modelo."""
+	objeto = _extraer_objeto_json(respuesta)
+	if objeto is None:
+		return {}, {campo: "la respuesta no es un objeto JSON" for campo in campos}
+
+	valores: dict[str, Any] = {}
+	errores: dict[str, str] = {}
+	for campo in campos:
+		if campo not in objeto:
+			errores[campo] = "falta en la respuesta"
+			continue
+		valor, error = _VALIDADORES_CAMPOS[campo](objeto[campo])
+		if error is None:
+			valores[campo] = valor
+		else:
+			errores[campo] = error
+	return valores, errores
+
+
+def _construir_consulta_campos(tarea: dict[str, Any], campos: list[str]) -> tuple[str, str]:
+	"""(texto de sistema, texto de usuario) que piden `campos` en un objeto JSON."""
+	texto_sistema = (
+		"Eres un asistente de gestión de proyectos. "
+		"Completa los campos faltantes de una tarea, en español y sin markdown. "
+		"Responde SOLO con un objeto JSON con exactamente estas claves:\n"
+		+ "\n".join(f"- {campo}: {_INSTRUCCIONES_CAMPOS[campo]}" for campo in campos)
+	)
+	lineas = []
+	for campo, etiqueta in _CONTEXTO_TAREA:
+		valor = tarea.get(campo)
+		if valor is not None and str(valor).strip() != "":
+			lineas.append(f"{etiqueta}: {str(valor).strip()}")
+	return texto_sistema, "\n".join(lineas)
+
+
+def generar_campos_tarea(
+	tarea: dict[str, Any], campos: list[str]
+) -> tuple[dict[str, Any], dict[str, str]]:
+	"""Genera varios campos de una tarea con una sola consulta (respuesta JSON).
+
+	Intención:
+	- Completar una tarea nueva en una consulta en lugar de una por campo
+	  (describe, categorize, estimate y las dos de audit).
+
+	Comportamiento:
+	- Se pide al modelo un objeto JSON con los `campos` (de CAMPOS_ENRIQUECIMIENTO)
+	  y se valida localmente: `categoria` dentro de CATEGORIAS_PERMITIDAS,
+	  `horas_estimadas` como float positivo y el resto como texto no vacío.
+	- Si algún campo no es válido se hace UNA consulta de reparación que pide solo
+	  esos campos (con los ya válidos como contexto). No hay más reintentos.
+	- Solo se cachean las respuestas que pasan la validación: repetir una tarea
+	  cuya primera respuesta fue inválida vuelve a hacer una sola consulta.
+
+	Retorna:
+	- (valores válidos por campo, motivo por cada campo que sigue sin ser válido).
+	"""
+	if not isinstance(tarea, dict):
+		raise TypeError("tarea debe ser un diccionario")
+	desconocidos = [campo for campo in campos if campo not in _VALIDADORES_CAMPOS]
+	if desconocidos:
+		raise ValueError("Campos no admitidos: " + ", ".join(desconocidos))
+	if not campos:
+		return {}, {}
+
+	texto_sistema, texto_usuario = _construir_consulta_campos(tarea, campos)
+	respuesta = _consultar_openai(
+		texto_sistema,
+		texto_usuario,
+		formato_json=True,
+		es_valida=lambda texto: not _validar_campos(texto, campos)[1],
+	)
+	valores, errores = _validar_campos(respuesta, campos)
+	if not errores:
+		return valores, errores
+
+	# Reparación: solo los campos que fallaron, indicando por qué.
+	campos_invalidos = [campo for campo in campos if campo in errores]
+	texto_sistema, texto_usuario = _construir_consulta_campos({**tarea, **valores}, campos_invalidos)
+	texto_usuario += "\n\nTu respuesta anterior no era válida en estos campos:\n" + "\n".join(
+		f"- {campo}: {errores[campo]}" for campo in campos_invalidos
+	)
+	respuesta = _consultar_openai(
+		texto_sistema,
+		texto_usuario,
+		formato_json=True,
+		es_valida=lambda texto: not _validar_campos(texto, campos_invalidos)[1],
+	)
+	valores_reparados, errores = _validar_campos(respuesta, campos_invalidos)
+	valores.update(valores_reparados)
+	return valores, errores
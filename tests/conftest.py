@@ -18,15 +18,18 @@ if str(RAIZ_PROYECTO) not in sys.path:
 
 
 from app import crear_aplicacion
+from servicios.gestor_tareas import GestorTareas
 
 
 @pytest.fixture()
-def ruta_tareas_temporal(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+def ruta_tareas_temporal(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
 	"""Crea y configura un archivo `tareas.json` temporal para los tests."""
 	ruta = tmp_path / "tareas.json"
 	ruta.write_text("[]", encoding="utf-8")
 	monkeypatch.setenv("TAREAS_JSON_PATH", str(ruta))
-	return ruta
+	yield ruta
+	# Cierra conexiones abiertas (SQLite) antes de que se borre el directorio temporal.
+	GestorTareas.limpiar_cache()
 
 
 @pytest.fixture()
@@ -87,3 +87,222 @@ def test_ai_audit_solo_genera_lo_faltante(cliente, monkeypatch: pytest.MonkeyPat
 	data = resp.get_json()
 	assert data["analisis_riesgo"] == "Riesgo ya definido"
 	assert data["mitigacion_riesgo"] == "Mitigación generada"
+
+
+def test_ai_categorize_resuelve_localmente_los_titulos_evidentes(cliente, monkeypatch: pytest.MonkeyPatch):
+	import rutas.rutas_ai as rutas_ai
+
+	def _no_deberia_llamarse(titulo, descripcion=None):
+		raise AssertionError("No se debía consultar al proveedor")
+
+	monkeypatch.setattr(rutas_ai, "obtener_categoria_simulada", _no_deberia_llamarse)
+
+	resp = cliente.post("/ai/tareas/categorize", json={"titulo": "Configurar pipeline CI", "categoria": ""})
+	assert resp.status_code == 200
+	data = resp.get_json()
+	assert (data["categoria"], data["origen_categoria"], data["confianza_categoria"]) == ("DevOps", "reglas", 1.0)
+
+	resp = cliente.post("/ai/tareas/categorize", json={"titulo": "Escribir tests unitarios"})
+	assert resp.get_json()["categoria"] == "Testing"
+
+
+def test_ai_categorize_usa_el_proveedor_si_no_hay_confianza(cliente, monkeypatch: pytest.MonkeyPatch):
+	import rutas.rutas_ai as rutas_ai
+
+	monkeypatch.setattr(rutas_ai, "obtener_categoria_simulada", lambda titulo, descripcion=None: "Otro")
+
+	resp = cliente.post("/ai/tareas/categorize", json={"titulo": "Reunión con el cliente"})
+	assert resp.status_code == 200
+	data = resp.get_json()
+	assert (data["categoria"], data["origen_categoria"], data["confianza_categoria"]) == ("Otro", "openai", None)
+
+	# Una sola palabra clave genérica ("datos") no basta para decidir sin el proveedor.
+	resp = cliente.post("/ai/tareas/categorize", json={"titulo": "Pedir los datos de contacto del cliente"})
+	data = resp.get_json()
+	assert (data["categoria"], data["origen_categoria"]) == ("Otro", "openai")
+
+
+def test_ai_categorize_aprende_de_las_tareas_guardadas_y_se_reentrena(
+	cliente, monkeypatch: pytest.MonkeyPatch, ruta_tareas_temporal
+):
+	import rutas.rutas_ai as rutas_ai
+	from app import crear_aplicacion
+	from servicios.clasificador_categorias import esperar_entrenamientos, olvidar_modelos
+	from servicios.gestor_tareas import GestorTareas
+
+	monkeypatch.setattr(rutas_ai, "obtener_categoria_simulada", lambda titulo, descripcion=None: "Otro")
+	base = {"descripcion": "", "prioridad": "media", "horas_estimadas": 1, "estado": "pendiente", "asignado_a": "Ana"}
+	GestorTareas.importar_varias(
+		[{**base, "titulo": f"Conciliar facturas del mes {numero}", "categoria": "Datos"} for numero in range(12)]
+		+ [{**base, "titulo": f"Coordinar reunión de planificación {numero}", "categoria": "otro"} for numero in range(12)]
+	)
+	olvidar_modelos()
+	try:
+		resp = cliente.post("/ai/tareas/categorize", json={"titulo": "Conciliar facturas atrasadas"})
+		data = resp.get_json()
+		assert (data["categoria"], data["origen_categoria"]) == ("Datos", "modelo_local")
+		assert data["confianza_categoria"] >= 0.8
+
+		# Sin modelo guardado, el modelo en memoria se reentrena al cambiar las
+		# tareas: en segundo plano, mientras se responde con el anterior.
+		GestorTareas.importar_varias(
+			[{**base, "titulo": f"Renovar contrato de proveedor {numero}", "categoria": "Seguridad"} for numero in range(12)]
+		)
+		resp = cliente.post("/ai/tareas/categorize", json={"titulo": "Renovar contrato anual"})
+		assert resp.get_json()["origen_categoria"] != "modelo_local"
+		esperar_entrenamientos(5)
+		resp = cliente.post("/ai/tareas/categorize", json={"titulo": "Renovar contrato anual"})
+		data = resp.get_json()
+		assert (data["categoria"], data["origen_categoria"]) == ("Seguridad", "modelo_local")
+
+		resultado = crear_aplicacion().test_cli_runner().invoke(args=["reentrenar-clasificador"])
+		assert resultado.exit_code == 0
+		assert "36 tareas" in resultado.output
+		assert ruta_tareas_temporal.with_name("clasificador_categorias.json").exists()
+	finally:
+		olvidar_modelos()
+
+
+def test_ai_estimate_usa_el_historico_de_tareas_parecidas(cliente, monkeypatch: pytest.MonkeyPatch):
+	import rutas.rutas_ai as rutas_ai
+
+	def _no_deberia_llamarse(titulo, descripcion=None):
+		raise AssertionError("No se debía consultar al modelo")
+
+	monkeypatch.setattr(rutas_ai, "obtener_estimacion_simulada", _no_deberia_llamarse)
+	for horas in (3, 3, 4):
+		cliente.post(
+			"/tareas",
+			json={
+				"titulo": "Migrar tabla de usuarios",
+				"descripcion": "Script de migración y verificación",
+				"prioridad": "Alta",
+				"horas_estimadas": horas,
+				"estado": "completada",
+				"asignado_a": "Ana",
+			},
+		)
+
+	resp = cliente.post(
+		"/ai/tareas/estimate",
+		json={"titulo": "Migrar tabla de usuarios antiguos", "descripcion": "Script de migración", "prioridad": "alta"},
+	)
+	assert resp.status_code == 200
+	data = resp.get_json()
+	assert data["horas_estimadas"] == 3.5
+	assert data["origen_horas"] == "historico"
+	assert 0.6 <= data["confianza_horas"] <= 1
+
+	# Sin tareas parecidas se consulta al modelo.
+	monkeypatch.setattr(rutas_ai, "obtener_estimacion_simulada", lambda titulo, descripcion=None: "2")
+	data = cliente.post("/ai/tareas/estimate", json={"titulo": "Preparar presentación"}).get_json()
+	assert (data["horas_estimadas"], data["origen_horas"], data["confianza_horas"]) == (2.0, "openai", None)
+
+
+def test_ai_batch_procesa_en_paralelo_acotado_y_conserva_el_orden(cliente, monkeypatch: pytest.MonkeyPatch):
+	import threading
+	import time
+
+	import rutas.rutas_ai as rutas_ai
+
+	monkeypatch.setenv("OPENAI_CONCURRENCIA_LOTE", "3")
+	en_curso = []
+	maximo_en_curso = []
+	cerrojo = threading.Lock()
+
+	def _estimar(titulo, descripcion=None):
+		with cerrojo:
+			en_curso.append(titulo)
+			maximo_en_curso.append(len(en_curso))
+		time.sleep(0.02)
+		with cerrojo:
+			en_curso.remove(titulo)
+		if titulo == "falla":
+			raise RuntimeError("Error al consultar el proveedor de IA")
+		return "mucho" if titulo == "sin número" else str(len(titulo))
+
+	monkeypatch.setattr(rutas_ai, "obtener_estimacion_simulada", _estimar)
+	tareas = [{"titulo": "x" * numero} for numero in range(1, 9)]
+	tareas[2] = {"titulo": "falla"}
+	tareas[4] = {"titulo": "sin número"}
+	tareas[5] = {"descripcion": "sin título"}
+	tareas[6] = "no es un objeto"
+
+	resp = cliente.post("/ai/tareas/estimate/batch", json=tareas)
+	assert resp.status_code == 200
+	data = resp.get_json()
+	assert [resultado["indice"] for resultado in data["resultados"]] == list(range(8))
+	assert [resultado["estado"] for resultado in data["resultados"]] == [200, 200, 500, 200, 400, 400, 400, 200]
+	assert [data["resultados"][indice]["tarea"]["horas_estimadas"] for indice in (0, 1, 3, 7)] == [1, 2, 4, 8]
+	assert data["resultados"][4]["respuesta_ia"] == "mucho"
+	assert data["resultados"][5]["mensaje"] == "Falta el campo requerido: titulo"
+	assert (data["exitosos"], data["fallidos"]) == (4, 4)
+	assert 1 < max(maximo_en_curso) <= 3
+
+
+def test_ai_batch_valida_operacion_y_body(cliente):
+	assert cliente.post("/ai/tareas/traducir/batch", json=[]).status_code == 404
+	assert cliente.post("/ai/tareas/describe/batch", json={"titulo": "x"}).status_code == 400
+	resp = cliente.post("/ai/tareas/categorize/batch", json=[{"titulo": "Escribir tests unitarios"}])
+	assert resp.get_json()["resultados"][0]["tarea"]["categoria"] == "Testing"
+
+
+def test_ai_enrich_completa_lo_faltante_en_una_consulta(cliente, monkeypatch: pytest.MonkeyPatch):
+	import rutas.rutas_ai as rutas_ai
+
+	pedidos = []
+
+	def _generar_campos(tarea, campos):
+		pedidos.append(list(campos))
+		return {
+			"descripcion": "Desc generada",
+			"horas_estimadas": 4.0,
+			"analisis_riesgo": "Riesgo",
+			"mitigacion_riesgo": "Mitigar",
+		}, {}
+
+	monkeypatch.setattr(rutas_ai, "generar_campos_tarea", _generar_campos)
+
+	resp = cliente.post(
+		"/ai/tareas/enrich",
+		json={"titulo": "Configurar pipeline CI", "descripcion": "", "mitigacion_riesgo": "  "},
+	)
+	assert resp.status_code == 200
+	datos = resp.get_json()
+	# La categoría la resuelven las reglas locales: no se pide al modelo.
+	assert pedidos == [["descripcion", "horas_estimadas", "analisis_riesgo", "mitigacion_riesgo"]]
+	assert datos["categoria"] == "DevOps"
+	assert datos["origen_categoria"] == "reglas"
+	assert datos["descripcion"] == "Desc generada"
+	assert datos["horas_estimadas"] == 4.0
+	assert datos["origen_horas"] == "openai"
+	assert datos["mitigacion_riesgo"] == "Mitigar"
+
+
+def test_ai_enrich_informa_los_campos_que_siguen_invalidos(cliente, monkeypatch: pytest.MonkeyPatch):
+	import rutas.rutas_ai as rutas_ai
+
+	def _no_deberia_llamarse(tarea, campos):
+		raise AssertionError("No faltaba ningún campo")
+
+	monkeypatch.setattr(rutas_ai, "generar_campos_tarea", _no_deberia_llamarse)
+	completa = {
+		"titulo": "Algo",
+		"descripcion": "D",
+		"categoria": "Otro",
+		"horas_estimadas": 1,
+		"analisis_riesgo": "R",
+		"mitigacion_riesgo": "M",
+	}
+	resp = cliente.post("/ai/tareas/enrich", json=completa)
+	assert resp.status_code == 200
+	assert resp.get_json() == completa
+
+	monkeypatch.setattr(
+		rutas_ai,
+		"generar_campos_tarea",
+		lambda tarea, campos: ({}, {"categoria": "debe ser una de: ..."}),
+	)
+	resp = cliente.post("/ai/tareas/enrich", json={"titulo": "Revisar propuesta comercial"})
+	assert resp.status_code == 400
+	assert resp.get_json()["campos_invalidos"] == {"categoria": "debe ser una de: ..."}
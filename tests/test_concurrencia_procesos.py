@@ -0,0 +1,103 @@
+"""Tests de concurrencia entre procesos sobre el mismo almacenamiento."""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from pathlib import Path
+
+import pytest
+
+from servicios.gestor_tareas import GestorTareas
+
+
+PROCESOS_ESCRITORES = 4
+CREACIONES_POR_PROCESO = 25
+
+
+def _crear_tareas(variables_entorno: dict[str, str], cantidad: int, cola_resultados) -> None:
+	"""Proceso escritor: crea `cantidad` tareas y reporta sus identificadores."""
+	os.environ.update(variables_entorno)
+	identificadores = []
+	for numero in range(cantidad):
+		tarea = GestorTareas.crear(
+			{
+				"titulo": f"Tarea {os.getpid()}-{numero}",
+				"descripcion": "Creada en paralelo",
+				"prioridad": "Media",
+				"horas_estimadas": 1.0,
+				"estado": "pendiente",
+				"asignado_a": "Guillermo",
+			}
+		)
+		identificadores.append(tarea.identificador)
+	cola_resultados.put(("escritor", identificadores))
+
+
+def _leer_tareas(variables_entorno: dict[str, str], evento_fin, cola_resultados) -> None:
+	"""Proceso lector: la cantidad de tareas observada nunca debe retroceder."""
+	os.environ.update(variables_entorno)
+	lecturas_inconsistentes = 0
+	cantidad_anterior = 0
+	while not evento_fin.is_set():
+		cantidad_actual = len(GestorTareas.cargar_tareas())
+		if cantidad_actual < cantidad_anterior:
+			lecturas_inconsistentes += 1
+		cantidad_anterior = max(cantidad_anterior, cantidad_actual)
+	cola_resultados.put(("lector", lecturas_inconsistentes))
+
+
+@pytest.mark.parametrize(
+	"variables_modo",
+	[
+		{"TAREAS_ALMACENAMIENTO": "json"},
+		{"TAREAS_ALMACENAMIENTO": "json", "TAREAS_MODO_ESCRITURA": "bitacora"},
+		{"TAREAS_ALMACENAMIENTO": "sqlite"},
+	],
+	ids=["json", "json_bitacora", "sqlite"],
+)
+def test_escrituras_concurrentes_no_pierden_actualizaciones(
+	ruta_tareas_temporal: Path, variables_modo: dict[str, str], monkeypatch: pytest.MonkeyPatch
+):
+	variables_entorno = {"TAREAS_JSON_PATH": str(ruta_tareas_temporal), **variables_modo}
+	contexto = multiprocessing.get_context("spawn")
+	cola_resultados = contexto.Queue()
+	evento_fin = contexto.Event()
+
+	lector = contexto.Process(
+		target=_leer_tareas, args=(variables_entorno, evento_fin, cola_resultados)
+	)
+	escritores = [
+		contexto.Process(
+			target=_crear_tareas,
+			args=(variables_entorno, CREACIONES_POR_PROCESO, cola_resultados),
+		)
+		for _ in range(PROCESOS_ESCRITORES)
+	]
+	lector.start()
+	for escritor in escritores:
+		escritor.start()
+
+	identificadores_creados: list[str] = []
+	for _ in escritores:
+		_tipo, identificadores = cola_resultados.get(timeout=120)
+		identificadores_creados.extend(identificadores)
+	evento_fin.set()
+	_tipo, lecturas_inconsistentes = cola_resultados.get(timeout=120)
+	for proceso in [lector, *escritores]:
+		proceso.join(timeout=30)
+		assert proceso.exitcode == 0
+
+	for nombre_variable, valor in variables_modo.items():
+		monkeypatch.setenv(nombre_variable, valor)
+	GestorTareas.limpiar_cache()
+	identificadores_persistidos = [tarea.identificador for tarea in GestorTareas.cargar_tareas()]
+	total_esperado = PROCESOS_ESCRITORES * CREACIONES_POR_PROCESO
+	actualizaciones_perdidas = total_esperado - len(identificadores_persistidos)
+
+	assert actualizaciones_perdidas == 0
+	assert len(set(identificadores_creados)) == total_esperado
+	assert sorted(identificadores_persistidos, key=int) == [
+		str(numero) for numero in range(1, total_esperado + 1)
+	]
+	assert lecturas_inconsistentes == 0
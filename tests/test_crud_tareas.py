@@ -1,4 +1,31 @@
-"""Tests de CRUD de tareas (persistencia JSON aislada)."""
+"""Tests de CRUD de tareas (persistencia aislada, con cada almacenamiento)."""
+
+import base64
+import json
+import threading
+import time
+
+import pytest
+
+from app import crear_aplicacion
+from servicios.codificador_json import obtener_codificador_json
+from servicios.gestor_tareas import GestorTareas
+
+
+@pytest.fixture(
+	autouse=True,
+	params=[
+		{"TAREAS_ALMACENAMIENTO": "json"},
+		{"TAREAS_ALMACENAMIENTO": "json", "TAREAS_MODO_ESCRITURA": "bitacora"},
+		{"TAREAS_ALMACENAMIENTO": "sqlite"},
+		{"TAREAS_ALMACENAMIENTO": "json", "TAREAS_COMMIT_AGRUPADO_MS": "1"},
+	],
+	ids=["json", "json_bitacora", "sqlite", "json_commit_agrupado"],
+)
+def almacenamiento_configurado(request, monkeypatch: pytest.MonkeyPatch):
+	"""Ejecuta cada test del CRUD contra cada almacenamiento disponible."""
+	for nombre_variable, valor in request.param.items():
+		monkeypatch.setenv(nombre_variable, valor)
 
 
 def _body_tarea_base() -> dict:
@@ -43,3 +70,508 @@ def test_crud_completo(cliente):
 	# Verificar que ya no existe
 	resp = cliente.get("/tareas/1")
 	assert resp.status_code == 404
+
+
+def test_get_tareas_filtra_y_ordena(cliente):
+	tareas = [
+		{"prioridad": "Alta", "horas_estimadas": 5, "estado": "pendiente", "asignado_a": "Ana"},
+		{"prioridad": "baja", "horas_estimadas": 2, "estado": "Pendiente", "asignado_a": "Luis"},
+		{"prioridad": "Media", "horas_estimadas": 8, "estado": "completada", "asignado_a": "Ana"},
+		{"prioridad": "alta", "horas_estimadas": 3, "estado": "pendiente", "asignado_a": "Luis"},
+	]
+	for campos in tareas:
+		assert cliente.post("/tareas", json={**_body_tarea_base(), **campos}).status_code == 201
+	# Una modificación debe reflejarse en los índices.
+	cliente.put("/tareas/4", json={"estado": "en_progreso"})
+
+	resp = cliente.get("/tareas?estado=pendiente")
+	assert [tarea["identificador"] for tarea in resp.get_json()] == ["1", "2"]
+
+	resp = cliente.get("/tareas?asignado_a=ana&horas_estimadas_min=4&horas_estimadas_max=8")
+	assert [tarea["identificador"] for tarea in resp.get_json()] == ["1", "3"]
+
+	resp = cliente.get("/tareas?prioridad=alta&prioridad=media&ordenar_por=horas_estimadas&orden=desc")
+	assert [tarea["identificador"] for tarea in resp.get_json()] == ["3", "1", "4"]
+
+	resp = cliente.get("/tareas?ordenar_por=prioridad")
+	assert [tarea["identificador"] for tarea in resp.get_json()] == ["2", "3", "1", "4"]
+
+	assert cliente.get("/tareas?ordenar_por=desconocido").status_code == 400
+	assert cliente.get("/tareas?horas_estimadas_min=muchas").status_code == 400
+
+
+def test_get_tareas_paginado_con_cursor(cliente):
+	for numero in range(1, 8):
+		cliente.post("/tareas", json={**_body_tarea_base(), "horas_estimadas": numero % 3})
+
+	resp = cliente.get("/tareas?limite=3")
+	pagina = resp.get_json()
+	assert [tarea["identificador"] for tarea in pagina["tareas"]] == ["1", "2", "3"]
+
+	# Altas y bajas entre páginas no desplazan la posición del cursor.
+	cliente.delete("/tareas/2")
+	cliente.post("/tareas", json=_body_tarea_base())
+	resp = cliente.get(f"/tareas?limite=3&cursor={pagina['siguiente_cursor']}")
+	pagina = resp.get_json()
+	assert [tarea["identificador"] for tarea in pagina["tareas"]] == ["4", "5", "6"]
+	resp = cliente.get(f"/tareas?limite=3&cursor={pagina['siguiente_cursor']}")
+	assert resp.get_json()["siguiente_cursor"] is None
+	assert [tarea["identificador"] for tarea in resp.get_json()["tareas"]] == ["7", "8"]
+
+	# Paginación sobre otro orden.
+	identificadores = []
+	cursor = ""
+	while True:
+		resp = cliente.get(f"/tareas?ordenar_por=horas_estimadas&orden=desc&limite=2{cursor}")
+		pagina = resp.get_json()
+		identificadores += [tarea["identificador"] for tarea in pagina["tareas"]]
+		if pagina["siguiente_cursor"] is None:
+			break
+		cursor = f"&cursor={pagina['siguiente_cursor']}"
+	# Empates de horas en orden de identificador (también descendente).
+	assert identificadores == ["5", "8", "7", "4", "1", "6", "3"]
+
+	assert cliente.get(f"/tareas?limite=2{cursor}").status_code == 400
+	assert cliente.get("/tareas?limite=2&cursor=basura").status_code == 400
+	assert cliente.get("/tareas?limite=0").status_code == 400
+
+
+def _cursor_manipulado(contenido: dict) -> str:
+	return base64.urlsafe_b64encode(json.dumps(contenido).encode("utf-8")).decode("ascii")
+
+
+def test_get_tareas_rechaza_cursores_con_clave_de_otra_forma(cliente):
+	for numero in range(1, 4):
+		cliente.post("/tareas", json={**_body_tarea_base(), "horas_estimadas": numero})
+
+	for ordenar_por, clave in [
+		("identificador", 5),
+		("identificador", [[], [0, "1", "1"]]),
+		("horas_estimadas", [["a"], [0, 1, "1"]]),
+		("horas_estimadas", [[0, 1.0, ""], [0, 1]]),
+		("titulo", [[0, 1], [0, 1, "1"]]),
+	]:
+		cursor = _cursor_manipulado({"ordenar_por": ordenar_por, "descendente": False, "clave": clave})
+		resp = cliente.get(f"/tareas?ordenar_por={ordenar_por}&limite=2&cursor={cursor}")
+		assert resp.status_code == 400
+		assert resp.get_json()["mensaje"] == "cursor inválido"
+
+	# Una clave bien formada sigue funcionando aunque no venga del servidor.
+	cursor = _cursor_manipulado(
+		{"ordenar_por": "horas_estimadas", "descendente": False, "clave": [[0, 1.5, ""], [0, 0, ""]]}
+	)
+	resp = cliente.get(f"/tareas?ordenar_por=horas_estimadas&limite=2&cursor={cursor}")
+	assert [tarea["identificador"] for tarea in resp.get_json()["tareas"]] == ["2", "3"]
+
+
+def test_get_tareas_sin_paginar_se_transmite_en_streaming(cliente):
+	for _ in range(3):
+		cliente.post("/tareas", json=_body_tarea_base())
+
+	resp = cliente.get("/tareas")
+
+	assert resp.is_streamed
+	assert resp.mimetype == "application/json"
+	assert [tarea["identificador"] for tarea in resp.get_json()] == ["1", "2", "3"]
+
+
+def test_etag_y_get_condicional(cliente):
+	cliente.post("/tareas", json=_body_tarea_base())
+	cliente.post("/tareas", json=_body_tarea_base())
+
+	resp = cliente.get("/tareas")
+	etag_lista = resp.headers["ETag"]
+	resp = cliente.get("/tareas", headers={"If-None-Match": etag_lista})
+	assert resp.status_code == 304
+	assert resp.data == b""
+	# Otra consulta tiene otro ETag.
+	assert cliente.get("/tareas?estado=pendiente").headers["ETag"] != etag_lista
+
+	resp = cliente.get("/tareas/1")
+	etag_tarea = resp.headers["ETag"]
+	assert cliente.get("/tareas/1", headers={"If-None-Match": etag_tarea}).status_code == 304
+
+	# Cambiar otra tarea invalida la lista, pero no el ETag de la tarea 1.
+	cliente.put("/tareas/2", json={"estado": "completada"})
+	assert cliente.get("/tareas", headers={"If-None-Match": etag_lista}).status_code == 200
+	assert cliente.get("/tareas/1", headers={"If-None-Match": etag_tarea}).status_code == 304
+
+	cliente.put("/tareas/1", json={"estado": "completada"})
+	resp = cliente.get("/tareas/1", headers={"If-None-Match": etag_tarea})
+	assert resp.status_code == 200
+	assert resp.get_json()["estado"] == "completada"
+
+
+def test_endpoints_bulk_con_fallos_parciales(cliente):
+	resp = cliente.post(
+		"/tareas/bulk",
+		json=[_body_tarea_base(), {"titulo": "incompleta"}, "no es objeto", _body_tarea_base()],
+	)
+	cuerpo = resp.get_json()
+	assert resp.status_code == 200
+	assert (cuerpo["exitosos"], cuerpo["fallidos"]) == (2, 2)
+	assert [resultado["estado"] for resultado in cuerpo["resultados"]] == [201, 400, 400, 201]
+	assert cuerpo["resultados"][1]["campos_faltantes"] == [
+		"descripcion", "prioridad", "horas_estimadas", "estado", "asignado_a"
+	]
+	assert [cuerpo["resultados"][indice]["tarea"]["identificador"] for indice in (0, 3)] == ["1", "2"]
+
+	resp = cliente.patch(
+		"/tareas/bulk",
+		json=[
+			{"identificador": "1", "estado": "completada", "identificador_extra": 1},
+			{"identificador": "99", "estado": "completada"},
+			{"estado": "sin identificador"},
+		],
+	)
+	assert [resultado["estado"] for resultado in resp.get_json()["resultados"]] == [200, 404, 400]
+	assert cliente.get("/tareas/1").get_json()["estado"] == "completada"
+
+	resp = cliente.delete("/tareas/bulk", json=["1", {"identificador": 2}, "1", None])
+	assert [resultado["estado"] for resultado in resp.get_json()["resultados"]] == [
+		200, 200, 404, 400
+	]
+	assert cliente.get("/tareas").get_json() == []
+
+	assert cliente.post("/tareas/bulk", json={"no": "lista"}).status_code == 400
+
+
+def test_bulk_persiste_una_sola_vez(cliente, monkeypatch: pytest.MonkeyPatch):
+	from servicios.gestor_tareas import GestorTareas
+
+	ejecutar_lote_original = GestorTareas._ejecutar_lote
+	lotes_ejecutados = []
+
+	def _ejecutar_lote_contando(clave_almacenamiento, operaciones):
+		lotes_ejecutados.append(len(operaciones))
+		return ejecutar_lote_original(clave_almacenamiento, operaciones)
+
+	monkeypatch.setattr(GestorTareas, "_ejecutar_lote", staticmethod(_ejecutar_lote_contando))
+	resp = cliente.post("/tareas/bulk", json=[_body_tarea_base() for _ in range(50)])
+	assert resp.get_json()["exitosos"] == 50
+
+	# Una sola lectura-modificación-escritura para las 50 tareas.
+	assert lotes_ejecutados == [1]
+	GestorTareas.limpiar_cache()
+	assert len(GestorTareas.cargar_tareas()) == 50
+
+
+def test_buscar_tareas_por_texto_con_relevancia_y_paginacion(cliente):
+	textos = [
+		("Redactar documentación", "Guía de instalación"),
+		("Corregir login", "La documentación del login está desactualizada"),
+		("Migrar base de datos", "Sin relación"),
+		("Documentación de la API", "Documentar endpoints de documentación"),
+	]
+	for titulo, descripcion in textos:
+		cliente.post("/tareas", json={**_body_tarea_base(), "titulo": titulo, "descripcion": descripcion})
+
+	# Sin acentos ni mayúsculas; el título pesa más que la descripción.
+	resp = cliente.get("/tareas/buscar?q=DOCUMENTACION")
+	assert resp.status_code == 200
+	cuerpo = resp.get_json()
+	assert [resultado["tarea"]["identificador"] for resultado in cuerpo["resultados"]] == ["4", "1", "2"]
+	assert cuerpo["total"] == 3
+	assert cuerpo["siguiente_cursor"] is None
+
+	# Todas las palabras deben aparecer.
+	resp = cliente.get("/tareas/buscar?q=documentación login")
+	assert [resultado["tarea"]["identificador"] for resultado in resp.get_json()["resultados"]] == ["2"]
+
+	# Paginación por cursor.
+	pagina = cliente.get("/tareas/buscar?q=documentacion&limite=2").get_json()
+	assert [resultado["tarea"]["identificador"] for resultado in pagina["resultados"]] == ["4", "1"]
+	siguiente = cliente.get(
+		f"/tareas/buscar?q=documentacion&limite=2&cursor={pagina['siguiente_cursor']}"
+	).get_json()
+	assert [resultado["tarea"]["identificador"] for resultado in siguiente["resultados"]] == ["2"]
+
+	# El índice se actualiza con cada modificación y baja.
+	cliente.put("/tareas/2", json={"descripcion": "Sesión caducada"})
+	cliente.delete("/tareas/1")
+	resp = cliente.get("/tareas/buscar?q=documentacion")
+	assert [resultado["tarea"]["identificador"] for resultado in resp.get_json()["resultados"]] == ["4"]
+	resp = cliente.get("/tareas/buscar?q=sesion")
+	assert [resultado["tarea"]["identificador"] for resultado in resp.get_json()["resultados"]] == ["2"]
+
+	assert cliente.get("/tareas/buscar").status_code == 400
+	assert cliente.get("/tareas/buscar?q=%20%2C").status_code == 400
+	assert cliente.get("/tareas/buscar?q=api&cursor=x").status_code == 400
+
+
+def test_buscar_tareas_rechaza_cursores_manipulados_o_desactualizados(cliente):
+	for numero in range(3):
+		cliente.post("/tareas", json={**_body_tarea_base(), "titulo": f"Documentación {numero}"})
+
+	for clave in ["x", 5, [1.0], [1.0, [0, 1]], [True, [0, 1, "1"]]]:
+		cursor = _cursor_manipulado({"ordenar_por": "relevancia", "descendente": False, "clave": clave})
+		resp = cliente.get(f"/tareas/buscar?q=documentacion&limite=1&cursor={cursor}")
+		assert resp.status_code == 400
+		assert resp.get_json()["mensaje"] == "cursor inválido"
+
+	pagina = cliente.get("/tareas/buscar?q=documentacion&limite=1").get_json()
+	url_siguiente = f"/tareas/buscar?q=documentacion&limite=1&cursor={pagina['siguiente_cursor']}"
+	assert cliente.get(url_siguiente).status_code == 200
+
+	# Cualquier escritura cambia las puntuaciones (idf): el cursor deja de valer.
+	cliente.post("/tareas", json={**_body_tarea_base(), "titulo": "Otra tarea"})
+	assert cliente.get(url_siguiente).status_code == 409
+
+
+def test_estadisticas_se_mantienen_con_cada_mutacion(cliente):
+	tareas = [
+		{"prioridad": "Alta", "horas_estimadas": 2.5, "estado": "pendiente", "asignado_a": "Ana"},
+		{"prioridad": "alta", "horas_estimadas": 4, "estado": "Pendiente", "asignado_a": "Luis"},
+		{"prioridad": "Baja", "horas_estimadas": 1, "estado": "completada", "asignado_a": "Ana"},
+	]
+	for campos in tareas:
+		cliente.post("/tareas", json={**_body_tarea_base(), **campos})
+
+	resp = cliente.get("/tareas/estadisticas")
+	assert resp.status_code == 200
+	assert resp.get_json() == {
+		"total_tareas": 3,
+		"horas_estimadas_total": 7.5,
+		"por_estado": {"completada": 1, "pendiente": 2},
+		"por_prioridad": {"alta": 2, "baja": 1},
+		"por_asignado_a": {"ana": 2, "luis": 1},
+		"por_categoria": {"": 3},
+	}
+	etag = resp.headers["ETag"]
+	assert cliente.get("/tareas/estadisticas", headers={"If-None-Match": etag}).status_code == 304
+
+	cliente.put("/tareas/1", json={"estado": "completada", "horas_estimadas": 0.5})
+	cliente.delete("/tareas/3")
+	cliente.patch("/tareas/bulk", json=[{"identificador": "2", "asignado_a": "Ana"}])
+	estadisticas = cliente.get("/tareas/estadisticas", headers={"If-None-Match": etag}).get_json()
+	assert estadisticas["total_tareas"] == 2
+	assert estadisticas["horas_estimadas_total"] == 4.5
+	assert estadisticas["por_estado"] == {"completada": 1, "pendiente": 1}
+	assert estadisticas["por_asignado_a"] == {"ana": 2}
+
+
+def test_cambios_desde_una_secuencia(cliente):
+	for titulo in ("Uno", "Dos"):
+		cliente.post("/tareas", json={**_body_tarea_base(), "titulo": titulo})
+
+	resp = cliente.get("/tareas/cambios?desde=0")
+	assert resp.status_code == 200
+	cuerpo = resp.get_json()
+	assert [(cambio["secuencia"], cambio["operacion"]) for cambio in cuerpo["cambios"]] == [
+		(1, "crear"),
+		(2, "crear"),
+	]
+	assert cuerpo["cambios"][1]["tarea"]["titulo"] == "Dos"
+	assert cuerpo["ultima_secuencia"] == cuerpo["secuencia_actual"] == 2
+
+	cliente.put("/tareas/1", json={"estado": "completada"})
+	cliente.delete("/tareas/2")
+	cambios = cliente.get("/tareas/cambios?desde=2").get_json()["cambios"]
+	assert [(cambio["operacion"], cambio["identificador"]) for cambio in cambios] == [
+		("actualizar", "1"),
+		("eliminar", "2"),
+	]
+	assert cambios[0]["tarea"]["estado"] == "completada"
+	assert cambios[1]["tarea"] is None
+
+	pagina = cliente.get("/tareas/cambios?desde=0&limite=3").get_json()
+	assert [cambio["secuencia"] for cambio in pagina["cambios"]] == [1, 2, 3]
+	assert pagina["ultima_secuencia"] == 3
+
+	# Sin cambios nuevos y sin espera: lista vacía.
+	assert cliente.get("/tareas/cambios?desde=4").get_json()["cambios"] == []
+	# Una secuencia que el servidor no conoce obliga a releer la lista.
+	resp = cliente.get("/tareas/cambios?desde=99")
+	assert resp.status_code == 410
+	assert resp.get_json()["secuencia_actual"] == 4
+
+	assert cliente.get("/tareas/cambios").status_code == 400
+	assert cliente.get("/tareas/cambios?desde=0&espera=60").status_code == 400
+
+
+def test_cambios_long_poll_responde_al_llegar_un_cambio(cliente):
+	def crear_mas_tarde():
+		time.sleep(0.2)
+		GestorTareas.crear(_body_tarea_base())
+
+	hilo = threading.Thread(target=crear_mas_tarde)
+	inicio = time.monotonic()
+	hilo.start()
+	resp = cliente.get("/tareas/cambios?desde=0&espera=10")
+	hilo.join()
+	assert time.monotonic() - inicio < 5
+	assert [cambio["operacion"] for cambio in resp.get_json()["cambios"]] == ["crear"]
+
+
+def test_cambios_como_server_sent_events(cliente):
+	cliente.post("/tareas", json=_body_tarea_base())
+	cliente.put("/tareas/1", json={"estado": "completada"})
+
+	resp = cliente.get(
+		"/tareas/cambios",
+		headers={"Accept": "text/event-stream", "Last-Event-ID": "0"},
+		buffered=False,
+	)
+	assert resp.status_code == 200
+	assert resp.mimetype == "text/event-stream"
+	primer_bloque = next(iter(resp.response))
+	resp.close()
+	texto = primer_bloque.decode("utf-8") if isinstance(primer_bloque, bytes) else primer_bloque
+	eventos = [evento for evento in texto.split("\n\n") if evento]
+	assert [evento.splitlines()[:2] for evento in eventos] == [
+		["id: 1", "event: cambio"],
+		["id: 2", "event: cambio"],
+	]
+	assert json.loads(eventos[1].splitlines()[2][len("data: "):])["tarea"]["estado"] == "completada"
+
+
+def test_exportar_e_importar_ndjson_conserva_las_tareas(cliente, monkeypatch: pytest.MonkeyPatch):
+	from rutas import rutas_tareas
+
+	for numero in range(5):
+		cliente.post("/tareas", json={**_body_tarea_base(), "titulo": f"Tarea {numero}"})
+	cliente.delete("/tareas/2")
+
+	resp = cliente.get("/tareas/exportar")
+	assert resp.status_code == 200
+	assert resp.mimetype == "application/x-ndjson"
+	lineas = resp.data.decode("utf-8").splitlines()
+	exportadas = [json.loads(linea) for linea in lineas]
+	assert [tarea["identificador"] for tarea in exportadas] == ["1", "3", "4", "5"]
+	assert exportadas == cliente.get("/tareas").get_json()
+
+	# Reimportar las mismas tareas las reemplaza; una sin identificador recibe uno nuevo.
+	monkeypatch.setattr(rutas_tareas, "TAREAS_POR_LOTE_IMPORTACION", 2)
+	nueva = json.dumps({**_body_tarea_base(), "titulo": "Importada"})
+	cuerpo = "\n".join([*lineas, nueva]) + "\n"
+	resp = cliente.post("/tareas/importar", data=cuerpo, content_type="application/x-ndjson")
+	assert resp.status_code == 200
+	assert resp.get_json() == {"creadas": 1, "actualizadas": 4, "fallidas": 0, "lotes": 3, "errores": []}
+
+	GestorTareas.limpiar_cache()
+	tareas = cliente.get("/tareas").get_json()
+	assert [tarea["identificador"] for tarea in tareas] == ["1", "3", "4", "5", "6"]
+	assert tareas[:4] == exportadas
+
+
+def test_importar_ndjson_informa_las_lineas_invalidas(cliente):
+	lineas = [
+		json.dumps({**_body_tarea_base(), "identificador": "10"}),
+		"{no es json",
+		"[1, 2]",
+		json.dumps({"titulo": "Sin el resto"}),
+		"",
+		json.dumps({**_body_tarea_base(), "campo_extra": "se ignora"}),
+	]
+	resp = cliente.post("/tareas/importar", data="\n".join(lineas), content_type="application/x-ndjson")
+	assert resp.status_code == 200
+	resumen = resp.get_json()
+	assert (resumen["creadas"], resumen["fallidas"]) == (2, 3)
+	assert [error["linea"] for error in resumen["errores"]] == [2, 3, 4]
+	assert "Faltan campos requeridos" in resumen["errores"][2]["mensaje"]
+	# El contador sigue al identificador importado más alto.
+	assert [tarea["identificador"] for tarea in cliente.get("/tareas").get_json()] == ["10", "11"]
+
+	resp = cliente.post(
+		"/tareas/importar", data=b"x", headers={"Content-Encoding": "br"}, content_type="application/x-ndjson"
+	)
+	assert resp.status_code == 400
+
+
+def test_exportar_e_importar_ndjson_comprimido(cliente):
+	import gzip
+
+	for numero in range(3):
+		cliente.post("/tareas", json={**_body_tarea_base(), "titulo": f"Tarea {numero}"})
+
+	resp = cliente.get("/tareas/exportar?comprimir=gzip")
+	assert resp.status_code == 200
+	assert resp.headers["Content-Encoding"] == "gzip"
+	ndjson = gzip.decompress(resp.data)
+	assert len(ndjson.splitlines()) == 3
+	assert cliente.get("/tareas/exportar?comprimir=zip").status_code == 400
+
+	for identificador in ("1", "2", "3"):
+		cliente.delete(f"/tareas/{identificador}")
+	resp = cliente.post(
+		"/tareas/importar",
+		data=gzip.compress(ndjson),
+		headers={"Content-Encoding": "gzip"},
+		content_type="application/x-ndjson",
+	)
+	assert resp.get_json()["creadas"] == 3
+	assert [tarea["titulo"] for tarea in cliente.get("/tareas").get_json()] == ["Tarea 0", "Tarea 1", "Tarea 2"]
+
+	resp = cliente.post(
+		"/tareas/importar", data=b"no es gzip", headers={"Content-Encoding": "gzip"}
+	)
+	assert resp.status_code == 400
+
+
+@pytest.fixture(params=["estandar", "orjson"])
+def cliente_con_proveedor_json(request, ruta_tareas_temporal):
+	"""Cliente con cada proveedor JSON."""
+	if request.param == "orjson":
+		pytest.importorskip("orjson")
+	aplicacion = crear_aplicacion(proveedor_json=request.param)
+	aplicacion.config.update({"TESTING": True})
+	with aplicacion.test_client() as cliente:
+		yield cliente
+
+
+def test_proveedor_json_se_usa_en_rutas_y_almacenamiento(cliente_con_proveedor_json):
+	cliente = cliente_con_proveedor_json
+	for numero in range(3):
+		resp = cliente.post("/tareas", json={**_body_tarea_base(), "titulo": f"Acción ñ {numero}"})
+		assert resp.status_code == 201
+
+	resp = cliente.get("/tareas")
+	assert [tarea["titulo"] for tarea in resp.get_json()] == [f"Acción ñ {numero}" for numero in range(3)]
+	# JSON compacto en UTF-8, sin escapar caracteres no ASCII.
+	assert "Acción ñ 0".encode("utf-8") in resp.data
+
+	pagina = cliente.get("/tareas?limite=2").get_json()
+	siguiente = cliente.get(f"/tareas?limite=2&cursor={pagina['siguiente_cursor']}").get_json()
+	assert [tarea["identificador"] for tarea in siguiente["tareas"]] == ["3"]
+
+	resp = cliente.post("/tareas", data="{no es json", content_type="application/json")
+	assert resp.status_code == 400
+
+
+def test_proveedor_json_desconocido_falla_al_crear_la_aplicacion():
+	with pytest.raises(ValueError):
+		crear_aplicacion(proveedor_json="inexistente")
+
+
+def test_proveedor_json_conserva_el_comportamiento_de_flask(cliente_con_proveedor_json):
+	import datetime
+	import decimal
+
+	from flask import jsonify
+
+	aplicacion = cliente_con_proveedor_json.application
+	datos = {"total": decimal.Decimal("1.50"), "fecha": datetime.date(2024, 1, 2), "acción": "ñ"}
+	with aplicacion.app_context():
+		# `default` y `sort_keys` como en `DefaultJSONProvider` (claves ordenadas).
+		assert jsonify(datos).get_data() == (
+			'{"acción":"ñ","fecha":"Tue, 02 Jan 2024 00:00:00 GMT","total":"1.50"}\n'
+		).encode("utf-8")
+		assert json.loads(aplicacion.json.dumps(datos, indent=2)) == json.loads(
+			aplicacion.json.dumps(datos)
+		)
+		assert "\n" in aplicacion.json.dumps(datos, indent=2)
+
+		aplicacion.json.sort_keys = False
+		assert aplicacion.json.dumps({"b": 1, "a": 2}) == '{"b":1,"a":2}'
+
+
+def test_cada_aplicacion_conserva_su_proveedor_json():
+	pytest.importorskip("orjson")
+	codificador_proceso = obtener_codificador_json()
+
+	aplicacion_estandar = crear_aplicacion(proveedor_json="estandar")
+	aplicacion_orjson = crear_aplicacion(proveedor_json="orjson")
+
+	assert aplicacion_estandar.json.codificador.nombre == "estandar"
+	assert aplicacion_orjson.json.codificador.nombre == "orjson"
+	assert obtener_codificador_json() is codificador_proceso
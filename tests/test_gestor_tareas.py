@@ -0,0 +1,698 @@
+"""Tests del servicio `GestorTareas` (sin Flask)."""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from modelos.tarea import Tarea
+from servicios.gestor_tareas import GestorTareas
+
+
+def _tarea_base(identificador: str = "1") -> Tarea:
+	return Tarea(
+		identificador=identificador,
+		titulo="Tarea de prueba",
+		descripcion="Descripción de prueba",
+		prioridad="Media",
+		horas_estimadas=1.0,
+		estado="pendiente",
+		asignado_a="Guillermo",
+	)
+
+
+def _campos_tarea_base() -> dict:
+	campos_tarea = _tarea_base().a_diccionario()
+	for campo in ("identificador", "categoria", "analisis_riesgo", "mitigacion_riesgo"):
+		del campos_tarea[campo]
+	return campos_tarea
+
+
+def test_cache_sirve_lecturas_repetidas_sin_releer(ruta_tareas_temporal: Path):
+	GestorTareas.limpiar_cache()
+	GestorTareas.guardar_tareas([_tarea_base()])
+	metricas_previas = GestorTareas.obtener_metricas_cache()
+
+	primera = GestorTareas.cargar_tareas()
+	segunda = GestorTareas.cargar_tareas()
+
+	assert [tarea.identificador for tarea in segunda] == ["1"]
+	assert primera[0] is not segunda[0]
+	metricas_cache = GestorTareas.obtener_metricas_cache()
+	assert metricas_cache["aciertos"] - metricas_previas["aciertos"] == 2
+	assert metricas_cache["fallos"] == metricas_previas["fallos"]
+
+
+def test_cache_detecta_cambios_externos_del_archivo(ruta_tareas_temporal: Path):
+	GestorTareas.limpiar_cache()
+	assert GestorTareas.cargar_tareas() == []
+
+	# Simula la escritura de otro proceso.
+	ruta_tareas_temporal.write_text(
+		json.dumps([_tarea_base("7").a_diccionario(), _tarea_base("8").a_diccionario()]),
+		encoding="utf-8",
+	)
+
+	lista_tareas = GestorTareas.cargar_tareas()
+	assert [tarea.identificador for tarea in lista_tareas] == ["7", "8"]
+	assert GestorTareas.obtener_metricas_cache()["fallos"] == 2
+
+
+def test_edicion_externa_del_json_avanza_las_versiones(ruta_tareas_temporal: Path):
+	GestorTareas.crear(_campos_tarea_base())
+	versiones_vistas = {GestorTareas.obtener_version()}
+	version_tarea = GestorTareas.obtener_version_tarea("1")
+
+	for titulo in ("Editada a mano", "Editada a mano otra vez"):
+		tarea_editada = _tarea_base("1").a_diccionario()
+		tarea_editada["titulo"] = titulo
+		ruta_tareas_temporal.write_text(json.dumps([tarea_editada]), encoding="utf-8")
+
+		# Los metadatos no cambiaron, pero la versión no puede repetir una ya vista
+		# (daría 304 con contenido desactualizado).
+		version = GestorTareas.obtener_version()
+		assert version not in versiones_vistas
+		versiones_vistas.add(version)
+		assert GestorTareas.obtener_version_tarea("1") != version_tarea
+		version_tarea = GestorTareas.obtener_version_tarea("1")
+		assert GestorTareas.obtener_por_id("1").titulo == titulo
+
+		# Otro proceso (caché vacía) obtiene la misma versión.
+		GestorTareas.limpiar_cache()
+		assert GestorTareas.obtener_version() == version
+
+
+def test_modificar_tareas_devueltas_no_altera_la_cache(ruta_tareas_temporal: Path):
+	GestorTareas.limpiar_cache()
+	GestorTareas.guardar_tareas([_tarea_base()])
+
+	GestorTareas.cargar_tareas()[0].estado = "completada"
+
+	assert GestorTareas.cargar_tareas()[0].estado == "pendiente"
+
+
+def test_modo_bitacora_agrega_mutaciones_y_las_reproduce(
+	ruta_tareas_temporal: Path, monkeypatch
+):
+	monkeypatch.setenv("TAREAS_MODO_ESCRITURA", "bitacora")
+	GestorTareas.limpiar_cache()
+	contenido_snapshot = ruta_tareas_temporal.read_text(encoding="utf-8")
+
+	GestorTareas.crear(_campos_tarea_base())
+	GestorTareas.crear(_campos_tarea_base())
+	GestorTareas.actualizar("1", {"estado": "completada"})
+	GestorTareas.eliminar("2")
+
+	# El snapshot no se reescribe; las mutaciones quedan en la bitácora.
+	assert ruta_tareas_temporal.read_text(encoding="utf-8") == contenido_snapshot
+	ruta_bitacora = ruta_tareas_temporal.with_name("tareas.json.bitacora")
+	registros = [
+		json.loads(linea) for linea in ruta_bitacora.read_text(encoding="utf-8").splitlines()
+	]
+	assert [registro["secuencia"] for registro in registros] == [1, 2, 3, 4]
+	assert [registro["operacion"] for registro in registros] == [
+		"crear",
+		"crear",
+		"actualizar",
+		"eliminar",
+	]
+
+	# Un proceso nuevo (caché vacía) reconstruye el estado reproduciendo la bitácora.
+	GestorTareas.limpiar_cache()
+	lista_tareas = GestorTareas.cargar_tareas()
+	assert [(tarea.identificador, tarea.estado) for tarea in lista_tareas] == [
+		("1", "completada")
+	]
+
+
+def test_modo_bitacora_compacta_en_snapshot(ruta_tareas_temporal: Path, monkeypatch):
+	monkeypatch.setenv("TAREAS_MODO_ESCRITURA", "bitacora")
+	GestorTareas.limpiar_cache()
+	for _ in range(3):
+		GestorTareas.crear(_campos_tarea_base())
+	GestorTareas.eliminar("2")
+
+	GestorTareas.compactar_bitacora()
+
+	ruta_bitacora = ruta_tareas_temporal.with_name("tareas.json.bitacora")
+	assert ruta_bitacora.read_bytes() == b""
+	contenido_snapshot = json.loads(ruta_tareas_temporal.read_text(encoding="utf-8"))
+	assert [tarea["identificador"] for tarea in contenido_snapshot] == ["1", "3"]
+
+	# La secuencia continúa después de la compactación.
+	GestorTareas.eliminar("3")
+	registro = json.loads(ruta_bitacora.read_text(encoding="utf-8"))
+	assert registro["secuencia"] == 5
+
+	GestorTareas.limpiar_cache()
+	assert [tarea.identificador for tarea in GestorTareas.cargar_tareas()] == ["1"]
+
+
+def test_modo_bitacora_lee_solo_el_tramo_nuevo(ruta_tareas_temporal: Path, monkeypatch):
+	monkeypatch.setenv("TAREAS_MODO_ESCRITURA", "bitacora")
+	GestorTareas.limpiar_cache()
+	GestorTareas.crear(_campos_tarea_base())
+
+	# Otro proceso agrega una línea a la bitácora.
+	ruta_bitacora = ruta_tareas_temporal.with_name("tareas.json.bitacora")
+	registro_externo = {"secuencia": 2, "operacion": "crear", "tarea": _tarea_base("9").a_diccionario()}
+	with ruta_bitacora.open("a", encoding="utf-8") as archivo_bitacora:
+		archivo_bitacora.write(json.dumps(registro_externo) + "\n")
+
+	lista_tareas = GestorTareas.cargar_tareas()
+	assert [tarea.identificador for tarea in lista_tareas] == ["1", "9"]
+	assert GestorTareas.obtener_metricas_cache()["lecturas_incrementales"] == 1
+
+
+def test_operaciones_por_identificador(ruta_tareas_temporal: Path):
+	GestorTareas.limpiar_cache()
+	primera = GestorTareas.crear(_campos_tarea_base())
+	segunda = GestorTareas.crear(_campos_tarea_base())
+	assert (primera.identificador, segunda.identificador) == ("1", "2")
+
+	actualizada = GestorTareas.actualizar("2", {"estado": "completada", "identificador": "99"})
+	assert actualizada is not None
+	assert (actualizada.identificador, actualizada.estado) == ("2", "completada")
+	assert GestorTareas.obtener_por_id("2").estado == "completada"
+
+	assert GestorTareas.actualizar("5", {"estado": "x"}) is None
+	assert GestorTareas.eliminar("5") is False
+	assert GestorTareas.obtener_por_id("5") is None
+
+
+def test_contador_de_identificadores_es_monotono_y_persistente(ruta_tareas_temporal: Path):
+	GestorTareas.limpiar_cache()
+	GestorTareas.crear(_campos_tarea_base())
+	GestorTareas.crear(_campos_tarea_base())
+	assert GestorTareas.eliminar("2") is True
+
+	# Un proceso nuevo no reutiliza el identificador eliminado.
+	GestorTareas.limpiar_cache()
+	assert GestorTareas.crear(_campos_tarea_base()).identificador == "3"
+
+
+def test_sqlite_migra_desde_json_una_sola_vez(ruta_tareas_temporal: Path, monkeypatch):
+	ruta_tareas_temporal.write_text(
+		json.dumps([_tarea_base("4").a_diccionario(), _tarea_base("7").a_diccionario()]),
+		encoding="utf-8",
+	)
+	monkeypatch.setenv("TAREAS_ALMACENAMIENTO", "sqlite")
+	GestorTareas.limpiar_cache()
+
+	assert [tarea.identificador for tarea in GestorTareas.cargar_tareas()] == ["4", "7"]
+	assert GestorTareas.crear(_campos_tarea_base()).identificador == "8"
+	assert GestorTareas.eliminar("4") is True
+
+	# Cambios posteriores en el JSON ya no se importan.
+	ruta_tareas_temporal.write_text("[]", encoding="utf-8")
+	GestorTareas.limpiar_cache()
+	assert [tarea.identificador for tarea in GestorTareas.cargar_tareas()] == ["7", "8"]
+
+
+def test_sqlite_usa_wal_e_indices(ruta_tareas_temporal: Path, monkeypatch):
+	import sqlite3
+
+	monkeypatch.setenv("TAREAS_ALMACENAMIENTO", "sqlite")
+	GestorTareas.limpiar_cache()
+	GestorTareas.crear(_campos_tarea_base())
+
+	conexion = sqlite3.connect(str(ruta_tareas_temporal.with_suffix(".sqlite3")))
+	try:
+		assert conexion.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+		indices = {fila[1] for fila in conexion.execute("PRAGMA index_list(tareas)")}
+	finally:
+		conexion.close()
+	assert {
+		"indice_tareas_estado",
+		"indice_tareas_prioridad",
+		"indice_tareas_asignado_a",
+	} <= indices
+
+
+def test_sqlite_detecta_escrituras_de_otro_proceso(ruta_tareas_temporal: Path, monkeypatch):
+	from servicios.almacenamiento_sqlite import AlmacenamientoSqlite
+	from servicios.almacenamiento_tareas import Mutacion
+
+	monkeypatch.setenv("TAREAS_ALMACENAMIENTO", "sqlite")
+	GestorTareas.limpiar_cache()
+	GestorTareas.crear(_campos_tarea_base())
+
+	# Otra conexión (otro proceso) escribe directamente en la base.
+	otro_almacenamiento = AlmacenamientoSqlite(ruta_tareas_temporal.with_suffix(".sqlite3"))
+	estado_ajeno = otro_almacenamiento.cargar()
+	tarea_ajena = _tarea_base("2")
+	estado_ajeno.tareas["2"] = tarea_ajena
+	estado_ajeno.ultimo_identificador = 2
+	estado_ajeno.secuencia += 1
+	otro_almacenamiento.persistir_mutaciones(
+		estado_ajeno, [Mutacion(estado_ajeno.secuencia, "crear", tarea_ajena)]
+	)
+	otro_almacenamiento.cerrar()
+
+	assert GestorTareas.obtener_por_id("2") is not None
+	assert GestorTareas.crear(_campos_tarea_base()).identificador == "3"
+
+
+def test_sqlite_reemplazo_completo_versiona_las_tareas_con_la_secuencia_final(ruta_tareas_temporal: Path):
+	from servicios.almacenamiento_sqlite import AlmacenamientoSqlite
+	from servicios.almacenamiento_tareas import EstadoTareas
+
+	ruta = ruta_tareas_temporal.with_suffix(".sqlite3")
+	otro_almacenamiento = AlmacenamientoSqlite(ruta)
+	otro_almacenamiento.persistir_todo(EstadoTareas({"1": _tarea_base("1")}, secuencia=5))
+	otro_almacenamiento.cerrar()
+
+	# Estado armado con una secuencia vieja: al persistir, la secuencia avanza y
+	# la versión de cada tarea debe avanzar con ella (si no, dos contenidos
+	# distintos compartirían ETag).
+	almacenamiento = AlmacenamientoSqlite(ruta)
+	estado = EstadoTareas({"1": _tarea_base("1")}, secuencia=2)
+	almacenamiento.persistir_todo(estado)
+	almacenamiento.cerrar()
+	assert estado.secuencia == 6
+	assert estado.obtener_version_tarea("1") == 6
+
+
+def test_lectura_en_streaming_equivale_a_json_loads(ruta_tareas_temporal: Path, monkeypatch):
+	import servicios.almacenamiento_json as almacenamiento_json
+
+	# Bloques diminutos para forzar cortes en medio de cadenas, números y escapes.
+	monkeypatch.setattr(almacenamiento_json, "TAMANO_BLOQUE_LECTURA", 7)
+	tareas = [_tarea_base(str(numero)) for numero in range(1, 30)]
+	tareas[3].titulo = 'Título con "comillas", ñ y \\ barra'
+	tareas[5].horas_estimadas = 12345.678
+	contenido = json.dumps([tarea.a_diccionario() for tarea in tareas] + [7, "x"], indent=2)
+	ruta_tareas_temporal.write_text(contenido, encoding="utf-8")
+
+	leidas = list(almacenamiento_json.iterar_tareas_json(ruta_tareas_temporal))
+
+	assert [tarea.a_diccionario() for tarea in leidas] == [
+		tarea.a_diccionario() for tarea in tareas
+	]
+
+
+def test_snapshot_invalido_o_truncado_se_considera_vacio(ruta_tareas_temporal: Path):
+	contenido = json.dumps([_tarea_base().a_diccionario(), _tarea_base("2").a_diccionario()])
+	for contenido_invalido in (contenido[:-10], contenido + " []", '{"a": 1}'):
+		ruta_tareas_temporal.write_text(contenido_invalido, encoding="utf-8")
+		GestorTareas.limpiar_cache()
+		assert GestorTareas.cargar_tareas() == []
+
+
+def test_snapshot_corrupto_no_se_relee_hasta_el_final(monkeypatch):
+	import io
+
+	import servicios.almacenamiento_json as almacenamiento_json
+
+	monkeypatch.setattr(almacenamiento_json, "TAMANO_BLOQUE_LECTURA", 64)
+	monkeypatch.setattr(almacenamiento_json, "MAXIMO_CARACTERES_TRAS_ERROR", 1024)
+	decodificaciones = 0
+	raw_decode_original = json.JSONDecoder.raw_decode
+
+	def _contar_raw_decode(decodificador, *argumentos):
+		nonlocal decodificaciones
+		decodificaciones += 1
+		return raw_decode_original(decodificador, *argumentos)
+
+	monkeypatch.setattr(json.JSONDecoder, "raw_decode", _contar_raw_decode)
+	tarea = json.dumps(_tarea_base().a_diccionario())
+	archivo = io.StringIO("[{\"titulo\": x}, " + ", ".join([tarea] * 2000) + "]")
+
+	with pytest.raises(json.JSONDecodeError):
+		list(almacenamiento_json._iterar_elementos_lista_json(archivo))
+	# Con el error al principio, solo se lee un tramo acotado del archivo.
+	assert archivo.tell() < 2 * 1024
+	assert decodificaciones <= 1024 // 64 + 1
+
+
+def test_guardado_en_streaming_conserva_el_formato(ruta_tareas_temporal: Path, monkeypatch):
+	import servicios.almacenamiento_json as almacenamiento_json
+
+	monkeypatch.setattr(almacenamiento_json, "TAREAS_POR_BLOQUE_ESCRITURA", 2)
+	GestorTareas.limpiar_cache()
+	tareas = [_tarea_base(str(numero)) for numero in range(1, 8)]
+	tareas[0].titulo = "Revisión ñandú"
+	tareas[1].horas_estimadas = 3
+	tareas[2].categoria = ["anidada", {"valor": 1}]
+	GestorTareas.guardar_tareas(tareas)
+
+	assert ruta_tareas_temporal.read_text(encoding="utf-8") == json.dumps(
+		[tarea.a_diccionario() for tarea in tareas], ensure_ascii=False, indent=4
+	)
+	# No quedan temporales tras el reemplazo atómico.
+	assert list(ruta_tareas_temporal.parent.glob("*.tmp")) == []
+
+	GestorTareas.guardar_tareas([])
+	assert ruta_tareas_temporal.read_text(encoding="utf-8") == "[]"
+
+
+def test_iterar_tareas_devuelve_copias_una_a_una(ruta_tareas_temporal: Path):
+	GestorTareas.limpiar_cache()
+	GestorTareas.guardar_tareas([_tarea_base("1"), _tarea_base("2")])
+
+	iterador = GestorTareas.iterar_tareas()
+	primera = next(iterador)
+	primera.titulo = "Modificada"
+	# Una escritura durante el recorrido no altera el recorrido ya iniciado.
+	GestorTareas.crear(_campos_tarea_base())
+
+	assert [tarea.identificador for tarea in iterador] == ["2"]
+	assert GestorTareas.obtener_por_id("1").titulo == "Tarea de prueba"
+
+
+def test_commit_agrupado_persiste_rafagas_en_pocos_lotes(ruta_tareas_temporal: Path, monkeypatch):
+	import threading
+
+	monkeypatch.setenv("TAREAS_MODO_ESCRITURA", "bitacora")
+	monkeypatch.setenv("TAREAS_COMMIT_AGRUPADO_MS", "20")
+	GestorTareas.limpiar_cache()
+
+	identificadores: list[str] = []
+	errores: list[BaseException] = []
+
+	def _crear(campos_tarea: dict) -> None:
+		try:
+			identificadores.append(GestorTareas.crear(campos_tarea).identificador)
+		except BaseException as error:
+			errores.append(error)
+
+	hilos = [threading.Thread(target=_crear, args=(_campos_tarea_base(),)) for _ in range(30)]
+	# Una solicitud inválida falla sola, sin afectar al resto de su lote.
+	hilos.append(threading.Thread(target=_crear, args=({"campo_desconocido": 1},)))
+	for hilo in hilos:
+		hilo.start()
+	for hilo in hilos:
+		hilo.join()
+
+	assert len(errores) == 1 and isinstance(errores[0], TypeError)
+	assert sorted(identificadores, key=int) == [str(numero) for numero in range(1, 31)]
+	metricas = GestorTareas.obtener_metricas_commit_agrupado()
+	assert metricas["escrituras"] == 31
+	assert metricas["lotes"] < 31
+
+	# Al volver, cada solicitud ya está en disco.
+	lineas_bitacora = (
+		ruta_tareas_temporal.with_name("tareas.json.bitacora").read_text(encoding="utf-8").splitlines()
+	)
+	assert [json.loads(linea)["secuencia"] for linea in lineas_bitacora] == list(range(1, 31))
+	GestorTareas.limpiar_cache()
+	assert len(GestorTareas.cargar_tareas()) == 30
+
+
+def test_indices_coinciden_con_un_recorrido_completo(ruta_tareas_temporal: Path):
+	import random
+
+	GestorTareas.limpiar_cache()
+	generador = random.Random(7)
+	estados = ["pendiente", "En proceso", "completada"]
+	prioridades = ["Alta", "media", "baja", "otra"]
+	for _ in range(60):
+		campos_tarea = _campos_tarea_base()
+		campos_tarea["estado"] = generador.choice(estados)
+		campos_tarea["prioridad"] = generador.choice(prioridades)
+		campos_tarea["horas_estimadas"] = generador.choice([1, 2.5, 4, 8, "sin estimar"])
+		GestorTareas.crear(campos_tarea)
+		# Se fuerza la construcción de los índices con las primeras tareas.
+		GestorTareas.consultar_tareas(ordenar_por="horas_estimadas")
+	for identificador in generador.sample(range(1, 61), 20):
+		GestorTareas.eliminar(str(identificador))
+	for identificador in generador.sample(range(1, 61), 20):
+		GestorTareas.actualizar(
+			str(identificador),
+			{"estado": generador.choice(estados), "horas_estimadas": generador.choice([3, 6])},
+		)
+
+	todas = GestorTareas.cargar_tareas()
+	consultadas = GestorTareas.consultar_tareas(
+		filtros={"estado": ["PENDIENTE", "en proceso"]}, horas_minimas=2, horas_maximas=6
+	)
+	esperadas = [
+		tarea.identificador
+		for tarea in sorted(todas, key=lambda tarea: int(tarea.identificador))
+		if tarea.estado.lower() in ("pendiente", "en proceso")
+		and isinstance(tarea.horas_estimadas, (int, float))
+		and 2 <= tarea.horas_estimadas <= 6
+	]
+	assert [tarea.identificador for tarea in consultadas] == esperadas
+
+	ordenadas = GestorTareas.consultar_tareas(ordenar_por="horas_estimadas")
+	numericas = [tarea for tarea in ordenadas if isinstance(tarea.horas_estimadas, (int, float))]
+	assert [tarea.horas_estimadas for tarea in numericas] == sorted(
+		tarea.horas_estimadas for tarea in numericas
+	)
+	assert len(ordenadas) == len(todas)
+
+
+def test_tarea_compacta_interna_y_convierte_por_lotes(ruta_tareas_temporal: Path):
+	diccionarios = [
+		dict(_tarea_base(str(identificador)).a_diccionario(), estado="".join(["pend", "iente"]))
+		for identificador in range(1, 4)
+	]
+	tareas = Tarea.desde_lista(diccionarios + [{"titulo": "incompleta"}, "no es dict"], omitir_invalidas=True)
+
+	assert not hasattr(tareas[0], "__dict__")
+	assert tareas[0].estado is tareas[1].estado is tareas[2].estado
+	assert Tarea.a_lista(tareas) == diccionarios
+
+	GestorTareas.guardar_tareas(tareas)
+	actualizada = GestorTareas.actualizar("1", {"estado": "".join(["hech", "a"])})
+	assert actualizada.estado is sys.intern("hecha")
+	with pytest.raises(ValueError):
+		GestorTareas.actualizar("1", {"campo_inventado": 1})
+	assert GestorTareas.obtener_por_id("1").estado == "hecha"
+
+
+def test_fragmentos_json_se_reutilizan_hasta_que_la_tarea_cambia(
+	ruta_tareas_temporal: Path, monkeypatch
+):
+	GestorTareas.guardar_tareas([_tarea_base("1"), _tarea_base("2")])
+	codificadas: list[str] = []
+	original = Tarea.a_diccionario
+
+	def a_diccionario_contando(tarea: Tarea) -> dict:
+		codificadas.append(tarea.identificador)
+		return original(tarea)
+
+	monkeypatch.setattr(Tarea, "a_diccionario", a_diccionario_contando)
+
+	primera = [fragmento for _, fragmento in GestorTareas.iterar_tareas_json()]
+	assert [json.loads(fragmento) for fragmento in primera] == [
+		original(_tarea_base("1")),
+		original(_tarea_base("2")),
+	]
+	codificadas.clear()
+	assert [fragmento for _, fragmento in GestorTareas.iterar_tareas_json()] == primera
+	assert codificadas == []
+
+	GestorTareas.actualizar("2", {"estado": "hecha"})
+	codificadas.clear()
+	segunda = [fragmento for _, fragmento in GestorTareas.iterar_tareas_json()]
+	assert codificadas == ["2"]
+	assert segunda[0] is primera[0]
+	assert json.loads(segunda[1])["estado"] == "hecha"
+
+
+def test_registro_de_cambios_acotado_usa_la_bitacora_como_respaldo(
+	ruta_tareas_temporal: Path, monkeypatch
+):
+	monkeypatch.setenv("TAREAS_CAMBIOS_LIMITE", "2")
+	for _ in range(4):
+		GestorTareas.crear(_campos_tarea_base())
+
+	# Modo completo: solo quedan en memoria los dos últimos cambios.
+	cambios, secuencia_actual = GestorTareas.obtener_cambios(2)
+	assert [cambio["secuencia"] for cambio in cambios] == [3, 4]
+	assert secuencia_actual == 4
+	assert GestorTareas.obtener_cambios(1) == (None, 4)
+
+	# Un reemplazo completo no tiene cambios individuales: hay que releer.
+	GestorTareas.guardar_tareas(GestorTareas.cargar_tareas())
+	assert GestorTareas.obtener_cambios(4) == (None, 5)
+	assert GestorTareas.obtener_cambios(5) == ([], 5)
+
+	# En modo bitácora, lo descartado de la memoria se lee del disco, también
+	# tras reiniciar el proceso.
+	monkeypatch.setenv("TAREAS_MODO_ESCRITURA", "bitacora")
+	GestorTareas.limpiar_cache()
+	for _ in range(3):
+		GestorTareas.crear(_campos_tarea_base())
+	GestorTareas.limpiar_cache()
+	cambios, secuencia_actual = GestorTareas.obtener_cambios(5)
+	assert [(cambio["secuencia"], cambio["identificador"]) for cambio in cambios] == [
+		(6, "5"),
+		(7, "6"),
+		(8, "7"),
+	]
+	assert GestorTareas.obtener_cambios(4) == (None, 8)
+
+
+def test_estimador_de_horas_agrupa_y_se_mantiene_con_cada_mutacion(ruta_tareas_temporal: Path):
+	GestorTareas.limpiar_cache()
+
+	def _crear(titulo: str, horas: float, prioridad: str = "Alta", categoria: str | None = "Backend") -> str:
+		campos_tarea = {**_campos_tarea_base(), "titulo": titulo, "descripcion": "", "prioridad": prioridad}
+		campos_tarea["horas_estimadas"] = horas
+		tarea = GestorTareas.crear(campos_tarea)
+		if categoria is not None:
+			GestorTareas.actualizar(tarea.identificador, {"categoria": categoria})
+		return tarea.identificador
+
+	for numero in range(3):
+		_crear(f"Crear endpoint de pagos v{numero}", 4)
+		_crear(f"Crear endpoint de pagos v{numero}", 12, prioridad="Baja")
+
+	# Solo las tareas de la misma prioridad y categoría: 4 horas, sin dispersión.
+	estimacion = GestorTareas.estimar_horas("Crear endpoint de pagos", prioridad="alta", categoria="backend")
+	assert estimacion["horas"] == 4
+	assert estimacion["agrupacion"] == "prioridad_y_categoria"
+	assert estimacion["confianza"] > 0.8
+	# Otra prioridad sin tareas parecidas: se amplía a todas, con menos confianza.
+	estimacion = GestorTareas.estimar_horas("Crear endpoint de pagos", prioridad="Media")
+	assert estimacion["agrupacion"] == "todas"
+	assert estimacion["confianza"] < 0.6
+	assert GestorTareas.estimar_horas("Redactar acta de reunión") is None
+
+	# El estimador ya construido sigue a las modificaciones y las bajas.
+	identificadores = [
+		tarea.identificador
+		for tarea in GestorTareas.cargar_tareas()
+		if tarea.prioridad == "Alta"
+	]
+	for identificador in identificadores:
+		GestorTareas.actualizar(identificador, {"horas_estimadas": 6})
+	assert GestorTareas.estimar_horas("Crear endpoint de pagos", prioridad="Alta", categoria="Backend")["horas"] == 6
+	GestorTareas.eliminar(identificadores[0])
+	estimacion = GestorTareas.estimar_horas("Crear endpoint de pagos", prioridad="Alta", categoria="Backend")
+	# Quedan dos tareas de prioridad alta: no alcanzan y se amplía a todas.
+	assert estimacion["agrupacion"] == "todas"
+	assert identificadores[0] not in estimacion["vecinos"]
+
+
+def test_fragmentos_de_formatos_nuevos_no_interfieren_con_las_escrituras():
+	# Los fragmentos se calculan fuera del cerrojo (streaming, compactación)
+	# mientras un escritor los invalida: pedir un formato por primera vez no debe
+	# romper la invalidación en curso.
+	import threading
+
+	from servicios.almacenamiento_tareas import EstadoTareas
+
+	tarea = _tarea_base()
+	estado = EstadoTareas({tarea.identificador: tarea})
+	for numero in range(2000):
+		estado.obtener_fragmento_json(tarea, formato=f"previo:{numero}", codificar=lambda _tarea: b"{}")
+	errores: list[BaseException] = []
+	lectura_terminada = threading.Event()
+
+	def _leer() -> None:
+		for numero in range(5000):
+			estado.obtener_fragmento_json(tarea, formato=f"nuevo:{numero}", codificar=lambda _tarea: b"{}")
+		lectura_terminada.set()
+
+	def _escribir() -> None:
+		try:
+			while not lectura_terminada.is_set():
+				estado.guardar_tarea(tarea)
+		except BaseException as excepcion:
+			errores.append(excepcion)
+			lectura_terminada.wait()
+
+	escritor = threading.Thread(target=_escribir)
+	lector = threading.Thread(target=_leer)
+	escritor.start()
+	lector.start()
+	lector.join()
+	escritor.join()
+	assert errores == []
+
+
+def test_lecturas_no_esperan_la_persistencia_de_otra_escritura(
+	ruta_tareas_temporal: Path, monkeypatch
+):
+	# Mientras un escritor persiste (fsync lento), las lecturas del proceso se
+	# sirven del último estado confirmado en lugar de esperarlo.
+	import threading
+
+	from servicios.almacenamiento_json import AlmacenamientoJson
+
+	monkeypatch.setenv("TAREAS_MODO_ESCRITURA", "bitacora")
+	GestorTareas.limpiar_cache()
+	GestorTareas.crear(_campos_tarea_base())
+	version_previa = GestorTareas.obtener_version()
+
+	persistir_original = AlmacenamientoJson.persistir_mutaciones
+	persistiendo = threading.Event()
+	continuar = threading.Event()
+
+	def persistir_lento(self, estado, mutaciones):
+		persistiendo.set()
+		continuar.wait(5)
+		persistir_original(self, estado, mutaciones)
+
+	monkeypatch.setattr(AlmacenamientoJson, "persistir_mutaciones", persistir_lento)
+	escritor = threading.Thread(target=GestorTareas.actualizar, args=("1", {"titulo": "Nuevo"}))
+	escritor.start()
+	assert persistiendo.wait(5)
+
+	lecturas: dict = {}
+
+	def _leer() -> None:
+		lecturas["tarea"] = GestorTareas.obtener_por_id("1")
+		lecturas["version"] = GestorTareas.obtener_version()
+		lecturas["listado"] = GestorTareas.consultar_tareas()
+
+	lector = threading.Thread(target=_leer)
+	lector.start()
+	lector.join(2)
+	lectura_bloqueada = lector.is_alive()
+	continuar.set()
+	escritor.join()
+	lector.join()
+
+	assert not lectura_bloqueada
+	# Lo que todavía no es duradero no se ve.
+	assert lecturas["tarea"].titulo == "Tarea de prueba"
+	assert lecturas["version"] == version_previa
+	assert [tarea.titulo for tarea in lecturas["listado"]] == ["Tarea de prueba"]
+
+	assert GestorTareas.obtener_por_id("1").titulo == "Nuevo"
+	assert GestorTareas.obtener_version() == version_previa + 1
+	GestorTareas.limpiar_cache()
+	assert GestorTareas.obtener_por_id("1").titulo == "Nuevo"
+
+
+def test_cerrojo_archivo_admite_lectores_simultaneos_y_excluye_al_escritor(tmp_path: Path):
+	import threading
+
+	from servicios.cerrojo_archivo import CerrojoArchivo
+
+	cerrojo = CerrojoArchivo(tmp_path / "tareas.json.lock")
+	# Si los lectores se serializaran, la barrera nunca se completaría.
+	ambos_leyendo = threading.Barrier(2, timeout=5)
+	soltar_lectores = threading.Event()
+	escritor_dentro = threading.Event()
+
+	def _leer():
+		with cerrojo.compartido():
+			with cerrojo.compartido():
+				ambos_leyendo.wait()
+			soltar_lectores.wait(5)
+
+	def _escribir():
+		with cerrojo.exclusivo():
+			with cerrojo.compartido():
+				escritor_dentro.set()
+
+	lectores = [threading.Thread(target=_leer) for _ in range(2)]
+	for lector in lectores:
+		lector.start()
+	escritor = threading.Thread(target=_escribir)
+	escritor.start()
+	assert not escritor_dentro.wait(0.2)
+	soltar_lectores.set()
+	for hilo in (*lectores, escritor):
+		hilo.join(5)
+	assert escritor_dentro.is_set()
+	assert not ambos_leyendo.broken
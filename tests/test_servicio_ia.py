@@ -0,0 +1,313 @@
+"""Tests del servicio de IA (sin llamadas reales a OpenAI).
+
+Se reemplaza la clase `OpenAI` del registro de clientes por un cliente falso.
+"""
+
+from __future__ import annotations
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import servicios.clientes_openai as clientes_openai
+from servicios.agrupador_consultas import AgrupadorConsultas
+from servicios.cache_ia import CacheRespuestasIA, obtener_cache_ia, reiniciar_cache_ia
+from servicios.servicio_ia import _consultar_openai, generar_campos_tarea, obtener_metricas_agrupacion
+
+
+class _ClienteOpenAIFalso:
+	"""Imita el SDK con Chat Completions únicamente (sin Responses API)."""
+
+	instancias: list["_ClienteOpenAIFalso"] = []
+	# Respuestas a devolver en orden; sin respuestas, "respuesta N".
+	respuestas: list[str] = []
+
+	def __init__(self, **argumentos) -> None:
+		self.argumentos = argumentos
+		self.consultas: list[dict] = []
+		self.cerrado = False
+		self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._crear))
+		_ClienteOpenAIFalso.instancias.append(self)
+
+	def _crear(self, **argumentos):
+		self.consultas.append(argumentos)
+		if _ClienteOpenAIFalso.respuestas:
+			contenido = _ClienteOpenAIFalso.respuestas.pop(0)
+		else:
+			contenido = f" respuesta {len(self.consultas)} "
+		mensaje = SimpleNamespace(content=contenido)
+		return SimpleNamespace(choices=[SimpleNamespace(message=mensaje)])
+
+	def close(self) -> None:
+		self.cerrado = True
+
+
+@pytest.fixture()
+def openai_falso(monkeypatch: pytest.MonkeyPatch):
+	"""Registro de clientes vacío que crea clientes falsos."""
+	_ClienteOpenAIFalso.instancias = []
+	_ClienteOpenAIFalso.respuestas = []
+	monkeypatch.setattr(clientes_openai, "OpenAI", _ClienteOpenAIFalso)
+	monkeypatch.setenv("OPENAI_API_KEY", "clave-de-prueba")
+	monkeypatch.setenv("OPENAI_MODEL", "modelo-de-prueba")
+	clientes_openai.cerrar_clientes_openai()
+	reiniciar_cache_ia()
+	yield _ClienteOpenAIFalso
+	clientes_openai.cerrar_clientes_openai()
+	reiniciar_cache_ia()
+
+
+def test_consultas_reutilizan_un_cliente_por_configuracion(openai_falso, monkeypatch: pytest.MonkeyPatch):
+	monkeypatch.setenv("OPENAI_TIMEOUT_SEGUNDOS", "5")
+	monkeypatch.setenv("OPENAI_CONEXIONES_MAXIMAS", "4")
+
+	# Consultas distintas: ninguna se responde desde la caché.
+	hilos = [
+		threading.Thread(target=_consultar_openai, args=("sistema", f"usuario {numero}"))
+		for numero in range(8)
+	]
+	for hilo in hilos:
+		hilo.start()
+	for hilo in hilos:
+		hilo.join()
+	assert _consultar_openai("sistema", "usuario") == "respuesta 9"
+
+	assert len(openai_falso.instancias) == 1
+	cliente = openai_falso.instancias[0]
+	assert cliente.argumentos["timeout"] == 5.0
+	assert cliente.argumentos["http_client"] is not None
+	assert cliente.consultas[0]["model"] == "modelo-de-prueba"
+	# El SDK falso solo tiene Chat Completions: se detecta una vez al crearlo.
+	assert clientes_openai.obtener_cliente_openai("clave-de-prueba").apis == (clientes_openai.API_CHAT,)
+
+	# Otra clave usa otro cliente; cerrar el registro cierra los pools.
+	monkeypatch.setenv("OPENAI_API_KEY", "otra-clave")
+	_consultar_openai("sistema", "usuario de otra clave")
+	assert len(openai_falso.instancias) == 2
+	clientes_openai.cerrar_clientes_openai()
+	assert all(instancia.cerrado for instancia in openai_falso.instancias)
+
+
+def test_consulta_sin_api_key_no_crea_cliente(openai_falso, monkeypatch: pytest.MonkeyPatch):
+	monkeypatch.setenv("OPENAI_API_KEY", " ")
+	with pytest.raises(ValueError):
+		_consultar_openai("sistema", "usuario")
+	assert openai_falso.instancias == []
+
+
+def test_cache_responde_consultas_repetidas_sin_llamar_al_proveedor(openai_falso, cliente):
+	openai_falso.respuestas = ["Backend", "texto", "texto con otra temperatura", "Datos"]
+	cuerpo = {"titulo": "Revisar propuesta comercial", "categoria": ""}
+	assert cliente.post("/ai/tareas/categorize", json=cuerpo).status_code == 200
+	assert cliente.post("/ai/tareas/categorize", json=cuerpo).status_code == 200
+	assert _consultar_openai("sistema", "usuario") == _consultar_openai("sistema", "usuario")
+	# Otra temperatura es otra consulta.
+	_consultar_openai("sistema", "usuario", temperatura=0.7)
+	assert len(openai_falso.instancias[0].consultas) == 3
+
+	# Cache-Control: no-cache consulta al proveedor y guarda la respuesta nueva.
+	resp = cliente.post("/ai/tareas/categorize", json=cuerpo, headers={"Cache-Control": "no-cache"})
+	assert resp.status_code == 200
+	assert len(openai_falso.instancias[0].consultas) == 4
+	cliente.post("/ai/tareas/categorize", json=cuerpo)
+	assert len(openai_falso.instancias[0].consultas) == 4
+
+	metricas = cliente.get("/ai/cache").get_json()
+	assert metricas["aciertos_memoria"] == 3
+	assert metricas["fallos"] == 3
+	assert metricas["omisiones"] == 1
+	assert metricas["guardadas"] == 4
+	assert metricas["tasa_aciertos"] == 0.5
+
+
+def test_cache_no_guarda_respuestas_que_el_llamador_rechaza(openai_falso, cliente):
+	openai_falso.respuestas = ["mucho", "mucho", "2.5"]
+	cuerpo = {"titulo": "Revisar propuesta comercial", "horas_estimadas": None}
+
+	# Una estimación que no es un número no se repite desde la caché.
+	assert cliente.post("/ai/tareas/estimate", json=cuerpo).status_code == 400
+	assert cliente.post("/ai/tareas/estimate", json=cuerpo).status_code == 400
+	assert cliente.post("/ai/tareas/estimate", json=cuerpo).get_json()["horas_estimadas"] == 2.5
+	assert cliente.post("/ai/tareas/estimate", json=cuerpo).get_json()["horas_estimadas"] == 2.5
+	assert len(openai_falso.instancias[0].consultas) == 3
+	assert obtener_cache_ia().obtener_metricas()["guardadas"] == 1
+
+
+def test_cache_vence_por_ttl_y_descarta_lo_menos_usado():
+	ahora = [1000.0]
+	cache = CacheRespuestasIA(capacidad=2, ttl_segundos=60, reloj=lambda: ahora[0])
+	cache.guardar("a", "respuesta a")
+	cache.guardar("b", "respuesta b")
+	assert cache.obtener("a") == "respuesta a"
+	# "b" es la menos usada: sale al guardar "c".
+	cache.guardar("c", "respuesta c")
+	assert cache.obtener("b") is None
+	assert cache.obtener("c") == "respuesta c"
+
+	ahora[0] += 61
+	assert cache.obtener("a") is None
+	assert cache.obtener_metricas()["entradas_memoria"] == 1
+
+	assert not CacheRespuestasIA(capacidad=10, ttl_segundos=0).activa
+
+
+def test_cache_sqlite_se_comparte_entre_procesos(tmp_path, monkeypatch: pytest.MonkeyPatch):
+	ruta = tmp_path / "cache_ia.sqlite3"
+	primera = CacheRespuestasIA(capacidad=10, ttl_segundos=60, ruta_sqlite=ruta)
+	primera.guardar("clave", "respuesta guardada")
+
+	# Otra instancia (como otro worker) la encuentra en SQLite y la sube a memoria.
+	segunda = CacheRespuestasIA(capacidad=10, ttl_segundos=60, ruta_sqlite=ruta)
+	assert segunda.obtener("clave") == "respuesta guardada"
+	assert segunda.obtener("clave") == "respuesta guardada"
+	metricas = segunda.obtener_metricas()
+	assert (metricas["aciertos_sqlite"], metricas["aciertos_memoria"]) == (1, 1)
+	primera.cerrar()
+	segunda.cerrar()
+
+	monkeypatch.setenv("OPENAI_CACHE_SQLITE_PATH", str(ruta))
+	monkeypatch.setenv("OPENAI_CACHE_CAPACIDAD", "0")
+	reiniciar_cache_ia()
+	try:
+		assert obtener_cache_ia().obtener("clave") == "respuesta guardada"
+	finally:
+		reiniciar_cache_ia()
+
+
+def test_cache_sqlite_inaccesible_no_hace_fallar_las_consultas(tmp_path):
+	# Un directorio no se puede abrir como base SQLite.
+	cache = CacheRespuestasIA(capacidad=10, ttl_segundos=60, ruta_sqlite=tmp_path)
+	cache.guardar("clave", "respuesta")
+	assert cache.obtener("clave") == "respuesta"
+	assert cache.obtener("otra") is None
+
+	metricas = cache.obtener_metricas()
+	assert (metricas["errores_sqlite"], metricas["guardadas"], metricas["fallos"]) == (2, 1, 1)
+	cache.cerrar()
+
+
+def test_consultas_iguales_en_curso_comparten_una_llamada(openai_falso, monkeypatch: pytest.MonkeyPatch):
+	_consultar_openai("sistema", "preparar cliente")
+	cliente = openai_falso.instancias[0]
+	crear_original = cliente.chat.completions.create
+	liberar = threading.Event()
+
+	def _crear_lento(**argumentos):
+		liberar.wait(5)
+		return crear_original(**argumentos)
+
+	monkeypatch.setattr(cliente.chat.completions, "create", _crear_lento)
+	metricas_iniciales = obtener_metricas_agrupacion()
+	resultados = []
+	hilos = [
+		threading.Thread(target=lambda: resultados.append(_consultar_openai("sistema", "doble envío")))
+		for _ in range(5)
+	]
+	for hilo in hilos:
+		hilo.start()
+	# Se libera la llamada cuando las cinco consultas ya están esperando.
+	while obtener_metricas_agrupacion()["agrupadas"] - metricas_iniciales["agrupadas"] < 4:
+		threading.Event().wait(0.005)
+	liberar.set()
+	for hilo in hilos:
+		hilo.join()
+
+	assert resultados == ["respuesta 2"] * 5
+	assert len(cliente.consultas) == 2
+	metricas = obtener_metricas_agrupacion()
+	assert metricas["ejecutadas"] - metricas_iniciales["ejecutadas"] == 1
+	assert metricas["en_curso"] == 0
+
+
+def test_agrupador_comparte_el_error_con_las_consultas_en_espera():
+	agrupador = AgrupadorConsultas()
+	empezada = threading.Event()
+	liberar = threading.Event()
+
+	def _fallar():
+		empezada.set()
+		liberar.wait(5)
+		raise RuntimeError("proveedor caído")
+
+	errores = []
+
+	def _consultar():
+		try:
+			agrupador.ejecutar("clave", _fallar)
+		except RuntimeError as excepcion:
+			errores.append(str(excepcion))
+
+	primera = threading.Thread(target=_consultar)
+	primera.start()
+	empezada.wait(5)
+	segunda = threading.Thread(target=_consultar)
+	segunda.start()
+	while agrupador.obtener_metricas()["agrupadas"] < 1:
+		threading.Event().wait(0.005)
+	liberar.set()
+	primera.join()
+	segunda.join()
+
+	assert errores == ["proveedor caído", "proveedor caído"]
+	# Terminada la consulta, la misma clave vuelve a ejecutarse.
+	assert agrupador.ejecutar("clave", lambda: "de nuevo") == "de nuevo"
+	assert agrupador.obtener_metricas() == {"ejecutadas": 2, "agrupadas": 1, "en_curso": 0}
+
+
+def test_campos_tarea_se_generan_en_una_consulta_json_y_se_reparan_una_vez(openai_falso):
+	openai_falso.respuestas = [
+		'```json\n{"descripcion": "Revisar y ajustar la propuesta.", "categoria": "Ventas", '
+		'"analisis_riesgo": "Plazos ajustados.", "mitigacion_riesgo": ""}\n```',
+		'{"categoria": "documentacion", "horas_estimadas": "3,5", "mitigacion_riesgo": "Acordar plazos; revisar"}',
+	]
+	campos = ["descripcion", "categoria", "horas_estimadas", "analisis_riesgo", "mitigacion_riesgo"]
+
+	valores, errores = generar_campos_tarea({"titulo": "Revisar propuesta comercial"}, campos)
+
+	assert errores == {}
+	assert valores == {
+		"descripcion": "Revisar y ajustar la propuesta.",
+		"categoria": "Documentación",
+		"horas_estimadas": 3.5,
+		"analisis_riesgo": "Plazos ajustados.",
+		"mitigacion_riesgo": "Acordar plazos; revisar",
+	}
+	consultas = openai_falso.instancias[0].consultas
+	assert len(consultas) == 2
+	assert all(consulta["response_format"] == {"type": "json_object"} for consulta in consultas)
+	# La reparación solo pide los campos inválidos, con los válidos como contexto.
+	sistema, usuario = (mensaje["content"] for mensaje in consultas[1]["messages"])
+	assert "- categoria:" in sistema and "- horas_estimadas:" in sistema and "- mitigacion_riesgo:" in sistema
+	assert "- descripcion:" not in sistema and "- analisis_riesgo:" not in sistema
+	assert "Análisis de riesgo: Plazos ajustados." in usuario
+	assert "- horas_estimadas: falta en la respuesta" in usuario
+
+
+def test_campos_tarea_no_reintentan_mas_de_una_vez(openai_falso):
+	openai_falso.respuestas = ["no es JSON", '{"horas_estimadas": true}']
+
+	valores, errores = generar_campos_tarea({"titulo": "Revisar propuesta"}, ["horas_estimadas"])
+
+	assert valores == {}
+	assert list(errores) == ["horas_estimadas"]
+	assert len(openai_falso.instancias[0].consultas) == 2
+
+
+def test_campos_tarea_no_cachean_la_respuesta_invalida(openai_falso):
+	valida = '{"categoria": "Backend", "horas_estimadas": 2}'
+	openai_falso.respuestas = ['{"categoria": "Ventas", "horas_estimadas": 2}', '{"categoria": "Backend"}', valida]
+	tarea = {"titulo": "Revisar propuesta comercial"}
+
+	assert generar_campos_tarea(tarea, ["categoria", "horas_estimadas"]) == (
+		{"categoria": "Backend", "horas_estimadas": 2.0},
+		{},
+	)
+	# La primera respuesta (inválida) no quedó en la caché: la repetición vuelve a
+	# consultar una sola vez y la respuesta válida sí se guarda.
+	for _ in range(2):
+		assert generar_campos_tarea(tarea, ["categoria", "horas_estimadas"]) == (
+			{"categoria": "Backend", "horas_estimadas": 2.0},
+			{},
+		)
+	assert len(openai_falso.instancias[0].consultas) == 3